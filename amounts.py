@@ -0,0 +1,157 @@
+import re
+
+import pandas as pd
+
+# 금액 단위 → 원
+UNITS = {
+    '원': 1, '천원': 1_000, '백만원': 1_000_000, '억원': 100_000_000, '조원': 1_000_000_000_000,
+    '천': 1_000, '백만': 1_000_000, '억': 100_000_000, '조': 1_000_000_000_000,
+}
+# "588,000,000원", "1,200백만원", "(단위 : 백만원)" 처럼 숫자나 '단위' 바로 뒤의 ~원
+UNIT_WON = r'(?:\d|단위\s*[:：]?)\s*((?:조|억|백만|천)?원)'
+# "12.5억", "3조" 처럼 원 없이 끝나는 단위 (뒤에 한글이 붙으면 단위가 아니다)
+UNIT_BARE = r'\d\s*(조|억|백만|천)(?![가-힣])'
+# 수량(주식 수·인원) 앞의 배수: "12,000천주", "1.2만주"
+COUNT_UNITS = {'천': 1_000, '만': 10_000, '백만': 1_000_000, '억': 100_000_000}
+UNIT_COUNT = r'\d\s*(백만|천|만|억)\s*(?:주|명)'
+# 괄호 안은 주석 ("(주1)", "(단위 : 원)", "(보통주)") — 숫자를 찾기 전에 지운다
+NOTE = r'\([^)]*\)'
+# 첫 번째 숫자. 앞의 -, △, ▲ 는 음수
+NUMBER = r'([-−△▲])?\s*(\d[\d,]*(?:\.\d+)?)'
+PLACEHOLDERS = {'', '-', '−', '해당사항없음', '해당없음', 'N/A'}
+
+_UNIT_WON = re.compile(UNIT_WON)
+_UNIT_BARE = re.compile(UNIT_BARE)
+_UNIT_COUNT = re.compile(UNIT_COUNT)
+_NOTE = re.compile(NOTE)
+_NUMBER = re.compile(NUMBER)
+
+
+def _scale(text: str, unit: str) -> int:
+    if unit == '':
+        m = _UNIT_COUNT.search(text)
+        return COUNT_UNITS[m.group(1)] if m else 1
+    m = _UNIT_WON.search(text) or _UNIT_BARE.search(text)
+    return UNITS[m.group(1)] if m else UNITS[unit]
+
+
+def parse_amount(value, unit: str = '원') -> int | None:
+    # 셀 하나: 단위를 찾아 원 단위 정수로. unit은 단위 표기가 없을 때의 기본값, ''이면 단위 없는 수(주식 수 등)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * (UNITS[unit] if unit else 1)))
+    text = str(value).strip()
+    body = _NOTE.sub('', text).strip()
+    if body in PLACEHOLDERS:
+        return None
+    m = _NUMBER.search(body)
+    if m is None:
+        return None
+    n = float(m.group(2).replace(',', '')) * _scale(text, unit)
+    return -int(round(n)) if m.group(1) else int(round(n))
+
+
+def parse_count(value) -> int | None:
+    return parse_amount(value, '')
+
+
+def _strings(values) -> pd.Series:
+    if hasattr(values, 'to_pandas'):
+        # pyarrow Array/ChunkedArray
+        values = values.to_pandas()
+    s = pd.Series(values, dtype=object)
+    return s.where(s.notna()).astype('string').str.strip()
+
+
+def normalize(values, unit: str = '원') -> pd.Series:
+    # 열 전체를 한 번에: parse_amount와 같은 규칙을 pandas 문자열 연산으로 적용해 Int64(원)로 돌려준다
+    s = _strings(values)
+    body = s.str.replace(NOTE, '', regex=True).str.strip()
+    number = body.str.extract(NUMBER)
+    num = pd.to_numeric(number[1].str.replace(',', '', regex=False), errors='coerce')
+    if unit == '':
+        scale = s.str.extract(UNIT_COUNT)[0].map(COUNT_UNITS).fillna(1)
+    else:
+        found = s.str.extract(UNIT_WON)[0].fillna(s.str.extract(UNIT_BARE)[0])
+        scale = found.map(UNITS).fillna(UNITS[unit])
+    sign = 1 - 2 * number[0].notna().astype('float64')
+    out = (num * scale.astype('float64') * sign).round()
+    out[body.isin(PLACEHOLDERS).fillna(True)] = None
+    return out.astype('Int64')
+
+
+def to_unit(values, unit: str = '원', scale: int = 1) -> pd.Series:
+    # 문서에서 읽은 문자열은 원으로 정규화한 뒤 시트 표시 단위(억·백만원 등)로 나누고,
+    # 이미 숫자인 값(시트에서 읽은 행)은 표시 단위 그대로 둔다
+    if hasattr(values, 'to_pandas'):
+        values = values.to_pandas()
+    s = pd.Series(values, dtype=object)
+    text = s.map(lambda v: isinstance(v, str)).astype(bool)
+    out = pd.to_numeric(s.where(~text), errors='coerce').astype('float64')
+    if text.any():
+        out[text] = normalize(s[text], unit).astype('float64') / scale
+    return out
+
+
+def to_unit_one(value, unit: str = '원', scale: int = 1):
+    if not isinstance(value, str):
+        return value
+    n = parse_amount(value, unit)
+    return None if n is None else (n if scale == 1 else n / scale)
+
+
+# 픽스처(20250528000460.zip 합병 개요, contracts_20250523.json)와 공시에서 실제로 본 표기
+CORPUS = [
+    ('588,000,000원', '원', 588_000_000),
+    ('8,664,789,500원', '원', 8_664_789_500),
+    ('12,311,598,310원', '원', 12_311_598_310),
+    ('15,106,836,691원', '원', 15_106_836_691),
+    ('39740415000', '원', 39_740_415_000),
+    ('315,793,988,713', '원', 315_793_988_713),
+    ('1,200백만원', '원', 1_200_000_000),
+    ('1,200 백만원', '원', 1_200_000_000),
+    ('3,500(단위 : 백만원)', '원', 3_500_000_000),
+    ('12.5억원', '원', 1_250_000_000),
+    ('12.5억', '원', 1_250_000_000),
+    ('1조', '원', 1_000_000_000_000),
+    ('850천원', '원', 850_000),
+    ('5,000,000,000(주1)', '원', 5_000_000_000),
+    ('-1,234,000', '원', -1_234_000),
+    ('△ 52,000,000', '원', -52_000_000),
+    ('1,500', '백만원', 1_500_000_000),
+    ('-', '원', None),
+    ('', '원', None),
+    ('해당사항없음', '원', None),
+    ('(주1) -', '원', None),
+    (None, '원', None),
+    ('보통주 5,880,000주', '', 5_880_000),
+    ('보통주 17,329,579주', '', 17_329_579),
+    ('104명', '', 104),
+    ('12,000천주', '', 12_000_000),
+    ('1.2만주', '', 12_000),
+    ('3,500 백만주', '', 3_500_000_000),
+]
+
+
+def check(corpus=CORPUS) -> list:
+    # 셀 단위 함수와 열 단위 함수가 말뭉치 전체에서 같은 값을 내는지
+    failures = []
+    for unit in {u for _, u, _ in corpus}:
+        cases = [(v, want) for v, u, want in corpus if u == unit]
+        vec = normalize([v for v, _ in cases], unit).tolist()
+        for (value, want), got_vec in zip(cases, vec):
+            got = parse_amount(value, unit)
+            got_vec = None if pd.isna(got_vec) else int(got_vec)
+            if got != want or got_vec != want:
+                failures.append((value, unit, want, got, got_vec))
+    return failures
+
+
+if __name__ == '__main__':
+    failures = check()
+    for value, unit, want, got, got_vec in failures:
+        print(f"⚠️ {value!r} (기본 단위 {unit or '없음'}): 기대 {want}, 셀 {got}, 열 {got_vec}")
+    if failures:
+        raise SystemExit(1)
+    print(f"✅ 금액 정규화 말뭉치 {len(CORPUS)}건 통과")
@@ -0,0 +1,251 @@
+import os
+import argparse
+from bisect import bisect_left
+from datetime import datetime
+
+from openpyxl import load_workbook, Workbook
+
+from close_queue import CloseQueue, to_yyyymmdd
+from record_index import RecordIndex, KEY_COL, read_json, write_section
+from workbook_commit import WorkbookCommit, atomic_save
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+
+# 시트별 기준 날짜 컬럼과 중복 판정 키 (각 파이프라인의 filter_new_rows와 같은 조합)
+SHEETS = {
+    'main':    {'date_col': '날짜 (D)',  'keys': ['날짜 (D)', '공시회사', '계약 금액(억)']},
+    '신규투자': {'date_col': '공시일',    'keys': ['공시회사', '공시일', '투자구분']},
+    '합병':    {'date_col': '최종보고일', 'keys': []},
+}
+
+
+def archive_index_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.archive.json'
+
+
+def archive_path(excel_path: str, year: str) -> str:
+    base, ext = os.path.splitext(excel_path)
+    return f'{base}.{year}{ext}'
+
+
+def archive_paths(excel_path: str) -> list:
+    # (연도, 보관 파일) — 오래된 해부터. 재색인·재집계가 전체 이력을 볼 때 쓴다
+    data = read_json(archive_index_path(excel_path))
+    years = sorted({y for section in data.values() for y in section.get('years', {})})
+    return [(y, archive_path(excel_path, y)) for y in years if os.path.exists(archive_path(excel_path, y))]
+
+
+def _clean(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def dedup_key(sheet: str, values) -> list | None:
+    # JSON에 담을 수 있게 날짜는 YYYYMMDD, 금액은 float으로 맞춘다
+    cols = SHEETS[sheet]['keys']
+    if not cols:
+        return None
+    key = []
+    for col in cols:
+        v = values.get(col)
+        if col in ('날짜 (D)', '공시일'):
+            v = to_yyyymmdd(v) if _clean(v) else ''
+        elif col == '계약 금액(억)':
+            try:
+                v = float(v)
+            except (TypeError, ValueError):
+                v = None
+        else:
+            v = _clean(v)
+        key.append(v)
+    return key
+
+
+class ArchiveIndex:
+    # 보관 파일로 옮긴 행의 요약: 중복 판정 키, 회사별 마지막 Cnt, 접수번호·보조키 → 연도
+    def __init__(self, path: str, sheet: str, data: dict):
+        self.path = path
+        self.sheet = sheet
+        section = data.get(sheet, {})
+        self.years = section.get('years', {})
+        self.keys = {tuple(k) for k in section.get('keys', [])}
+        self.cnt = section.get('cnt', {})
+        self.rcept = section.get('rcept', {})
+        self.alias = section.get('alias', {})
+        self.dirty = False
+
+    @classmethod
+    def load(cls, excel_path: str, sheet: str) -> 'ArchiveIndex':
+        path = archive_index_path(excel_path)
+        return cls(path, sheet, read_json(path))
+
+    def __len__(self):
+        return sum(self.years.values())
+
+    def __contains__(self, rcept_no):
+        return rcept_no in self.rcept
+
+    def resolve(self, *aliases):
+        for a in aliases:
+            if a and a in self.alias:
+                return self.alias[a]
+        return None
+
+    def year_of(self, rcept_no):
+        return self.rcept.get(rcept_no)
+
+    def add(self, year: str, values, rcept_no, aliases=()):
+        key = dedup_key(self.sheet, values)
+        if key is not None:
+            self.keys.add(tuple(key))
+        company = _clean(values.get('공시회사'))
+        cnt = values.get('Cnt')
+        if company and isinstance(cnt, (int, float)):
+            self.cnt[company] = max(int(cnt), self.cnt.get(company, 0))
+        if rcept_no:
+            self.rcept[rcept_no] = year
+            for a in aliases:
+                if a:
+                    self.alias[a] = rcept_no
+        self.years[year] = self.years.get(year, 0) + 1
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        write_section(self.path, self.sheet, {
+            'years': self.years, 'keys': [list(k) for k in self.keys],
+            'cnt': self.cnt, 'rcept': self.rcept, 'alias': self.alias,
+        })
+        self.dirty = False
+
+
+def _aliases(sheet: str):
+    # 파이프라인 모듈이 이 모듈을 가져오므로 보조키 함수는 쓸 때 가져온다
+    if sheet == 'main':
+        from dart_update import sales_aliases
+        return sales_aliases
+    if sheet == '합병':
+        from merge_update import merger_aliases
+        return merger_aliases
+    return lambda values: []
+
+
+def _append(ws, header: list, rows: list):
+    # 보관 시트의 헤더 순서에 맞춰 붙인다. 보관 시트에 없는 컬럼은 뒤에 추가
+    target = [c.value for c in ws[1]] if ws.max_row >= 1 and ws.cell(1, 1).value is not None else []
+    if not target:
+        for i, col in enumerate(header, start=1):
+            ws.cell(row=1, column=i, value=col)
+        target = list(header)
+    for col in header:
+        if col not in target:
+            ws.cell(row=1, column=len(target) + 1, value=col)
+            target.append(col)
+    pos = {col: i for i, col in enumerate(target, start=1)}
+    for cells in rows:
+        r = ws.max_row + 1
+        for col, cell in zip(header, cells):
+            if col is None:
+                continue
+            out = ws.cell(row=r, column=pos[col], value=cell.value)
+            out.number_format = cell.number_format
+
+
+def rotate(excel_path: str = EXCEL_PATH, before: str = None, dry_run: bool = False) -> dict:
+    # before(YYYY) 이전 연도의 행을 연도별 보관 파일로 옮긴다. 익일종가 대기 중인 행은 남긴다
+    before = before or str(datetime.now().year)
+    commit = WorkbookCommit.open(excel_path)
+    wb = commit.wb
+    moved = {}
+    plans = []
+    for sheet, conf in SHEETS.items():
+        if sheet not in wb.sheetnames:
+            continue
+        ws = wb[sheet]
+        header = [c.value for c in ws[1]]
+        if conf['date_col'] not in header:
+            continue
+        idx_date = header.index(conf['date_col'])
+        idx_key = header.index(KEY_COL) if KEY_COL in header else None
+        queue = commit.sidecar(CloseQueue, sheet)
+        waiting = queue.rows(commit.sidecar(RecordIndex, sheet))
+        by_year = {}
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
+            d = row[idx_date].value
+            ymd = to_yyyymmdd(d) if _clean(d) else None
+            if ymd is None or ymd[:4] >= before or row[0].row in waiting:
+                continue
+            by_year.setdefault(ymd[:4], []).append(row)
+        if by_year:
+            plans.append((sheet, ws, header, idx_key, queue, by_year))
+            moved[sheet] = {y: len(rows) for y, rows in sorted(by_year.items())}
+    if dry_run or not plans:
+        commit.close()
+        return moved
+
+    # 1) 보관 파일과 보관 색인을 먼저 쓴다. 여기서 죽어도 원본은 그대로라 다시 돌리면 된다
+    books, indexes = {}, []
+    for sheet, ws, header, idx_key, queue, by_year in plans:
+        index = ArchiveIndex.load(excel_path, sheet)
+        indexes.append(index)
+        prior_rcept, prior_keys = set(index.rcept), set(index.keys)
+        aliases = _aliases(sheet)
+        for year, rows in sorted(by_year.items()):
+            path = archive_path(excel_path, year)
+            if path not in books:
+                books[path] = load_workbook(path) if os.path.exists(path) else Workbook()
+                if not os.path.exists(path):
+                    books[path].remove(books[path].active)
+            book = books[path]
+            target = book[sheet] if sheet in book.sheetnames else book.create_sheet(sheet)
+            fresh = []
+            for row in rows:
+                values = dict(zip(header, (c.value for c in row)))
+                rcept = _clean(row[idx_key].value) if idx_key is not None else ''
+                key = dedup_key(sheet, values)
+                # 이전 회전이 원본 저장 전에 끊겼다면 이미 보관된 행이다
+                if (rcept in prior_rcept) if rcept else (key is not None and tuple(key) in prior_keys):
+                    continue
+                index.add(year, values, rcept, aliases(values))
+                fresh.append(row)
+            _append(target, header, fresh)
+    for path, book in books.items():
+        atomic_save(book, path)
+    for index in indexes:
+        index.save()
+
+    # 2) 원본 시트에서 지우고, 행 번호가 바뀌었으니 접수번호 색인과 익일종가 대기열을 다시 맞춘다
+    for sheet, ws, header, idx_key, queue, by_year in plans:
+        deleted = sorted(row[0].row for rows in by_year.values() for row in rows)
+        start = end = None
+        for r in reversed(deleted):
+            if end is None:
+                start = end = r
+            elif r == start - 1:
+                start = r
+            else:
+                ws.delete_rows(start, end - start + 1)
+                start = end = r
+        if end is not None:
+            ws.delete_rows(start, end - start + 1)
+        queue.renumber(lambda r: r - bisect_left(deleted, r))
+        commit.sidecar(RecordIndex, sheet).rebuild(ws, _aliases(sheet))
+    commit.save()
+    return moved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="지난 연도의 행을 연도별 보관 엑셀로 옮겨 매일 여는 파일을 작게 유지")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로")
+    parser.add_argument("--before", type=str, default=None, help="이 연도(YYYY) 이전 행을 옮깁니다. 기본값은 올해")
+    parser.add_argument("--dry-run", action="store_true", help="옮길 행 수만 출력")
+    args = parser.parse_args()
+
+    moved = rotate(args.excel, args.before, args.dry_run)
+    if not moved:
+        print("옮길 행이 없습니다.")
+    for sheet, years in moved.items():
+        for year, n in years.items():
+            verb = '이동 예정' if args.dry_run else '이동 완료'
+            print(f"✅ {sheet} {year}년 {n}건 {verb} → {archive_path(args.excel, year)}")
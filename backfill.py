@@ -0,0 +1,101 @@
+import os
+import time
+import argparse
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from dart_client import CORP_WORKERS, clear_cache, fetch_list, make_session
+from frame_backend import available_backends, check, get_frames, rows
+
+OUT_DIR = os.path.join('parquet', 'lists')
+# 이름 → (공시유형 코드, 포함, 제외 보고서명 패턴). 각 파이프라인의 select_*와 같은 조건
+KINDS = {
+    'sales':  ('I001', '단일판매', '해지'),
+    'invest': ('I001', '신규시설', '자회사|철회'),
+    'merger': ('C004', r'증권신고서\(합병', None),
+}
+
+
+def month_windows(bgn_de: str, end_de: str) -> list:
+    # list.json은 회사 지정 없이 긴 기간을 조회할 수 없어 한 달씩 나눈다
+    start = datetime.strptime(bgn_de, '%Y%m%d').date()
+    end = datetime.strptime(end_de, '%Y%m%d').date()
+    out = []
+    while start <= end:
+        nxt = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        out.append((start.strftime('%Y%m%d'), min(nxt - timedelta(days=1), end).strftime('%Y%m%d')))
+        start = nxt
+    return out
+
+
+def fetch_months(session, bgn_de: str, end_de: str, detail_ty: str, workers: int = CORP_WORKERS) -> list:
+    # 월별 목록을 동시에 받는다. 결과는 월별 원본 행 리스트
+    windows = month_windows(bgn_de, end_de)
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(windows)), 1)) as pool:
+        parts = list(pool.map(lambda w: fetch_list(session, w[0], w[1], detail_ty), windows))
+    clear_cache()
+    return parts
+
+
+def backfill(session, bgn_de: str, end_de: str, kinds=None, backend: str = None,
+             out_dir: str = OUT_DIR, timings: dict = None, raw: dict = None) -> dict:
+    frames = get_frames(backend)
+    timings = {} if timings is None else timings
+    raw = {} if raw is None else raw
+    lists, results = {}, {}
+    for name in kinds or KINDS:
+        detail_ty, include, exclude = KINDS[name]
+        started = time.perf_counter()
+        if detail_ty not in raw:
+            raw[detail_ty] = fetch_months(session, bgn_de, end_de, detail_ty)
+        timings['fetch'] = timings.get('fetch', 0) + time.perf_counter() - started
+
+        started = time.perf_counter()
+        if detail_ty not in lists:
+            # 월별로 프레임을 만든 뒤 잇는다 (Arrow는 청크를 복사하지 않고 이어 붙인다)
+            lists[detail_ty] = frames.dedup(frames.concat([frames.reports(p) for p in raw[detail_ty]]), ['rcept_no'])
+        selected = frames.select(lists[detail_ty], include, exclude)
+        months = []
+        for ym, part in frames.partitions(selected, 'rcept_dt'):
+            frames.write_parquet(part, os.path.join(out_dir, name, f'ym={ym}', 'part-0.parquet'))
+            months.append(ym)
+        summary = frames.summarize(selected, 'corp_name', 'rcept_dt')
+        timings['process'] = timings.get('process', 0) + time.perf_counter() - started
+        results[name] = {'frame': selected, 'months': months, 'summary': summary}
+    return results
+
+
+if __name__ == '__main__':
+    today = date.today()
+    parser = argparse.ArgumentParser(description="여러 해 공시 목록을 받아 중복 제거·집계 후 월별 Parquet으로 저장")
+    parser.add_argument("--from", dest="bgn", type=str, default=f'{today.year - 1}0101', help="시작일 YYYYMMDD")
+    parser.add_argument("--to", dest="end", type=str, default=today.strftime('%Y%m%d'), help="종료일 YYYYMMDD")
+    parser.add_argument("--kind", action="append", choices=list(KINDS), help="공시유형 (기본: 전체)")
+    parser.add_argument("--backend", choices=['pandas', 'arrow'], default=None,
+                        help="DataFrame 백엔드 (기본: DART_FRAME_BACKEND 또는 pandas)")
+    parser.add_argument("--out", type=str, default=OUT_DIR, help="Parquet 출력 디렉터리")
+    parser.add_argument("--top", type=int, default=10, help="회사별 건수 상위 몇 개를 출력할지")
+    parser.add_argument("--check", action="store_true",
+                        help="받은 목록을 pandas와 Arrow로 모두 처리해 결과가 같은지 비교")
+    args = parser.parse_args()
+
+    session = make_session()
+    timings, raw = {}, {}
+    results = backfill(session, args.bgn, args.end, args.kind, args.backend, args.out, timings, raw)
+    frames = get_frames(args.backend)
+    for name, res in results.items():
+        print(f"✅ {name}: {len(rows(frames, res['frame']))}건, {len(res['months'])}개월 → {os.path.join(args.out, name)}")
+        for corp, n, last in rows(frames, res['summary'])[:args.top]:
+            print(f"   {corp:<20}{n:>6}건  마지막 {last}")
+    print(f"({frames.name}) 목록 수집 {timings.get('fetch', 0):.2f}초, 처리·저장 {timings.get('process', 0):.2f}초")
+
+    if args.check:
+        if 'arrow' not in available_backends():
+            print("⚠️ pyarrow가 없어 비교할 수 없습니다.")
+        for name in results:
+            detail_ty, include, exclude = KINDS[name]
+            failures = check([r for part in raw[detail_ty] for r in part], include, exclude)
+            if failures:
+                print(f"⚠️ {name}: pandas와 다른 단계 — {', '.join(f'{b}:{s}' for b, s in failures)}")
+            else:
+                print(f"✅ {name}: pandas·Arrow 결과 일치")
@@ -0,0 +1,144 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from zipfile import ZipFile, ZIP_DEFLATED
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '20250528000460.zip')
+VARIANTS = ['contract-legacy', 'contract-stream', 'merger-legacy', 'merger-stream']
+TABLE_KEYS = ['법인명', '납입자본금']
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def contract_legacy(path):
+    from bs4 import BeautifulSoup
+    with open(path, 'rb') as f:
+        content = f.read()
+    z = ZipFile(io.BytesIO(content))
+    fname = next(f for f in z.namelist() if f.lower().endswith(('.xml', '.html')))
+    html = z.read(fname).decode('utf-8', errors='ignore')
+    soup = BeautifulSoup(html, 'lxml')
+    for tbl in soup.find_all('table'):
+        if any(k in tbl.get_text() for k in TABLE_KEYS):
+            return len(tbl.get_text())
+    return None
+
+
+def contract_stream(path):
+    from doc_stream import open_member, find_table
+    with open(path, 'rb') as f, open_member(f, ('.xml', '.html')) as member:
+        html = find_table(member, lambda text: any(k in text for k in TABLE_KEYS))
+    return len(html) if html else None
+
+
+def merger_legacy(path):
+    # 기존 parse_merger_overview의 메모리 사용 패턴: 압축 본문, 해제된 바이트, 디코딩된 문자열, 블록 soup
+    from bs4 import BeautifulSoup
+    with open(path, 'rb') as f:
+        content = f.read()
+    with ZipFile(io.BytesIO(content)) as z:
+        with z.open(z.namelist()[0]) as f:
+            xml = f.read().decode('utf-8', errors='replace')
+    part = xml.split("(1) 합병 당사회사의 개요", 1)
+    if len(part) < 2:
+        return None
+    soup = BeautifulSoup("(1) 합병 당사회사의 개요" + part[1], 'html.parser')
+    table = soup.find('table')
+    starts = [m.start() for m in re.finditer(re.escape("1. 사업의 개요"), xml)]
+    paras = []
+    for i, s in enumerate(starts):
+        blk = xml[s:(starts[i + 1] if i + 1 < len(starts) else len(xml))]
+        soup2 = BeautifulSoup(blk, 'html.parser')
+        paras.append(next((p.get_text(strip=True) for p in soup2.find_all('p') if p.get_text(strip=True)), ""))
+    return len(table.find_all('tr')) if table else None, paras[:2]
+
+
+def merger_stream(path):
+    from merge_update import parse_merger_document
+    with open(path, 'rb') as f:
+        out = parse_merger_document(f, '')
+    return out and (out['합병법인'], out['사업개요(피합병)'][:20])
+
+
+RUNNERS = {
+    'contract-legacy': contract_legacy,
+    'contract-stream': contract_stream,
+    'merger-legacy': merger_legacy,
+    'merger-stream': merger_stream,
+}
+
+
+def run_variant(name: str, path: str) -> dict:
+    import bs4, lxml.etree  # noqa: F401  기준 RSS에 import 비용을 포함시킨다
+    import doc_stream, merge_update  # noqa: F401
+    base = rss_mb()
+    tracemalloc.start()
+    started = time.perf_counter()
+    RUNNERS[name](path)
+    seconds = time.perf_counter() - started
+    py_peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return {'variant': name, 'seconds': round(seconds, 3),
+            'rss_peak_mb': round(rss_mb(), 1), 'rss_delta_mb': round(rss_mb() - base, 1),
+            'py_peak_mb': round(py_peak, 1)}
+
+
+def scaled_fixture(scale: int, out_dir: str) -> str:
+    # 본문 뒤에 원문 문단을 반복해 붙여 공시 크기만 키운다
+    if scale <= 1:
+        return FIXTURE
+    with ZipFile(FIXTURE) as z:
+        name = z.namelist()[0]
+        xml = z.read(name).decode('utf-8', errors='replace')
+    filler = ''.join(re.findall(r'<P>[^<]{20,}</P>', xml)[:2000])
+    idx = xml.rfind('</BODY>')
+    idx = idx if idx >= 0 else len(xml)
+    padded = xml[:idx] + filler * (len(xml) * (scale - 1) // max(len(filler), 1)) + xml[idx:]
+    path = os.path.join(out_dir, f'fixture_x{scale}.zip')
+    with ZipFile(path, 'w', compression=ZIP_DEFLATED) as z:
+        z.writestr(name, padded)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공시 문서 다운로드·파싱 경로의 메모리/시간 벤치마크")
+    parser.add_argument("--scale", type=str, default="1,4", help="원문 대비 문서 크기 배수 목록 (예: 1,4,8)")
+    parser.add_argument("--variant", action="append", choices=VARIANTS, help="실행할 변형 (기본: 전체)")
+    parser.add_argument("--run", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--zip", type=str, default=FIXTURE, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_variant(args.run, args.zip)))
+        return
+
+    print(f"{'variant':<17}{'scale':>6}{'size(MB)':>10}{'sec':>8}{'rss_peak':>10}{'rss_delta':>11}{'py_peak':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in [int(s) for s in args.scale.split(',')]:
+            path = scaled_fixture(scale, tmp)
+            with ZipFile(path) as z:
+                size = z.infolist()[0].file_size / 1024 / 1024
+            for name in args.variant or VARIANTS:
+                # 변형마다 새 프로세스에서 돌려 최대 RSS가 서로 섞이지 않게 한다
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--run', name, '--zip', path],
+                    capture_output=True, text=True, check=True,
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{name:<17}{scale:>6}{size:>10.1f}{r['seconds']:>8.2f}"
+                      f"{r['rss_peak_mb']:>10.1f}{r['rss_delta_mb']:>11.1f}{r['py_peak_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
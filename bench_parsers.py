@@ -0,0 +1,140 @@
+import io
+import os
+import re
+import time
+import argparse
+from zipfile import ZipFile
+
+import html_backend
+from html_backend import get_backend, available_backends
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '20250528000460.zip')
+
+
+def sise_page(days: int = 10) -> str:
+    # 네이버 sise_day 페이지와 같은 구조의 표 (7칸 행 사이에 구분선 행이 섞여 있다)
+    rows = ['<tr><th>날짜</th><th>종가</th><th>전일비</th><th>시가</th><th>고가</th><th>저가</th><th>거래량</th></tr>']
+    for i in range(days):
+        rows.append(
+            f'<tr onmouseover="mouseOver(this)"><td align="center"><span class="tah p10 gray03">2025.05.{28 - i:02d}</span></td>'
+            f'<td class="num"><span class="tah p11">{12_340 + i * 10:,}</span></td>'
+            '<td class="num"><img src="x.gif"> <span class="tah p11 red02">\n\t\t\t\t150\n\t\t\t\t</span></td>'
+            '<td class="num"><span class="tah p11">12,200</span></td><td class="num"><span class="tah p11">12,400</span></td>'
+            '<td class="num"><span class="tah p11">12,100</span></td><td class="num"><span class="tah p11">123,456</span></td></tr>'
+        )
+        if i % 5 == 4:
+            rows.append('<tr><td colspan="7" height="8"></td></tr>')
+    return ('<html><head><title>sise</title></head><body>'
+            f'<table cellspacing="0" class="type2">{"".join(rows)}</table>'
+            '<table class="Nnavi"><tr><td class="on"><a href="#">1</a></td></tr></table></body></html>')
+
+
+def company_page() -> str:
+    # wisereport 기업개요 페이지에서 쓰는 부분만 흉내 낸다
+    return ('<html><body><table><tr><td class="td0101"><dl>'
+            '<dt class="line-left">KOSPI : 전기전자</dt><dt class="line-left">WICS : 반도체와반도체장비</dt>'
+            '</dl></td></tr></table>'
+            '<table id="cTB11" class="gHead01"><tr><th class="txt" scope="row">주가/전일대비</th><td class="num">12,340원</td></tr>'
+            '<tr><th class="txt" scope="row">시가총액</th><td class="num">\n 4,567억원 </td></tr></table></body></html>')
+
+
+def nested_page() -> str:
+    # 바깥 서식 표 안에 계약 표가 들어 있는 공시 (라벨이 안쪽 표에 있어도 바깥 표 전체를 골라야 한다)
+    inner = ('<TABLE><TR><TD>계약금액</TD><TD>1,234,567,890</TD></TR>'
+             '<TR><TD>계약상대</TD><TD>(주)상대방</TD></TR></TABLE>')
+    return ('<HTML><BODY><TABLE><TR><TD>회사명</TD><TD>테스트</TD></TR></TABLE>'
+            '<TABLE><TR><TD>1. 판매ㆍ공급계약 내용</TD><TD>설비 공급</TD></TR>'
+            f'<TR><TD>2. 세부내용</TD><TD>{inner}</TD></TR>'
+            '<TR><TD>3. 시작일</TD><TD>2025-05-28</TD></TR></TABLE>'
+            f'<TABLE><TR><TD>기타</TD><TD>{inner}</TD></TR></TABLE></BODY></HTML>')
+
+
+def nested_table_parity() -> bool:
+    # 스트리밍 find_table이 BeautifulSoup find_all로 처음 맞는 표를 찾는 예전 경로와 같은 표를 고르는지
+    from bs4 import BeautifulSoup
+    from doc_stream import find_table
+    page = nested_page()
+    found = find_table(io.BytesIO(page.encode('utf-8')), lambda text: '계약금액' in text)
+    legacy = next(t for t in BeautifulSoup(page, 'lxml').find_all('table') if '계약금액' in t.get_text())
+    parser = get_backend('bs4')
+    return ([[c.text for c in row] for row in parser.table_rows(found or '')]
+            == [[c.text for c in row] for row in parser.table_rows(str(legacy))])
+
+
+def fixture_xml() -> str:
+    with ZipFile(FIXTURE) as z:
+        return z.read(z.namelist()[0]).decode('utf-8', errors='replace')
+
+
+def workloads() -> dict:
+    from close_queue import parse_sise_day
+    from merge_update import parse_merger_document
+    from doc_stream import find_table
+    xml = fixture_xml()
+    nested = nested_page().encode('utf-8')
+    sise = sise_page(10)
+    company = company_page()
+
+    def merger():
+        with open(FIXTURE, 'rb') as f:
+            return parse_merger_document(f, '')
+
+    def market():
+        parser = get_backend()
+        wics = [t for t in parser.select_texts(company, 'td.td0101 dl dt.line-left') if t.startswith('WICS')]
+        cap = [[(c.tag, c.text) for c in cells]
+               for cells in parser.table_rows(company, 'table#cTB11', 'th.txt, td.num')]
+        return wics, cap
+
+    def contract():
+        html = find_table(io.BytesIO(nested), lambda text: '계약금액' in text)
+        return [[(re.sub(r'\s+', '', c.raw), c.text) for c in row] for row in get_backend().table_rows(html)]
+
+    return {
+        # 문서 전체의 모든 표를 셀 텍스트로 펼친다 (parse_contract / 투자 표 파싱의 상한)
+        # raw는 호출부에서 공백을 모두 지운 뒤에만 쓰므로 공백 차이는 비교하지 않는다
+        'document-tables': lambda: [[(re.sub(r'\s+', '', c.raw), c.text) for c in row]
+                                    for row in get_backend().table_rows(xml, all_tables=True)],
+        'merger-document': merger,
+        'sise-day': lambda: parse_sise_day(sise),
+        'market-info': market,
+        # 겹친 표: find_table이 고른 바깥 표를 백엔드마다 같은 행·칸으로 읽는지 (안쪽 표의 행도 포함)
+        'nested-table': contract,
+    }
+
+
+def run(fn, backend: str, repeat: int):
+    os.environ['DART_HTML_BACKEND'] = backend
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 파서 백엔드별 결과 일치 여부와 처리 시간 비교")
+    parser.add_argument("--backend", action="append", choices=list(html_backend.BACKENDS),
+                        help="비교할 백엔드 (기본: 설치된 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="작업별 반복 횟수 (가장 빠른 값을 보고)")
+    args = parser.parse_args()
+
+    backends = [b for b in (args.backend or list(html_backend.BACKENDS)) if b in available_backends()]
+    missing = set(args.backend or html_backend.BACKENDS) - set(backends)
+    if missing:
+        print(f"⚠️ 설치되지 않은 백엔드는 건너뜁니다: {', '.join(sorted(missing))}")
+
+    print(f"{'workload':<18}{'backend':<12}{'sec':>9}{'vs bs4':>9}  parity")
+    for name, fn in workloads().items():
+        reference, ref_sec = run(fn, 'bs4', args.repeat)
+        for backend in backends:
+            out, sec = (reference, ref_sec) if backend == 'bs4' else run(fn, backend, args.repeat)
+            parity = 'ok' if out == reference else 'MISMATCH'
+            print(f"{name:<18}{backend:<12}{sec:>9.4f}{ref_sec / sec:>8.1f}x  {parity}")
+    print(f"{'nested-table':<18}{'find_table':<12}{'':>9}{'':>9}  {'ok' if nested_table_parity() else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import date, timedelta
+
+NAME = '공시.xlsx'
+SIZES = '1000,10000,100000'
+BATCH = 50
+SECTORS = ['반도체와반도체장비', '전자장비와기기', '디스플레이장비및부품', '기계', '화학', '조선', '자동차부품', '제약']
+KINDS = ['신규시설투자', '시설증설', '공장신설', '설비투자']
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def business_days(end: date, n: int) -> list:
+    days, d = [], end
+    while len(days) < n:
+        if d.weekday() < 5:
+            days.append(d)
+        d -= timedelta(days=1)
+    return days[::-1]
+
+
+def companies(rows: int, rng) -> list:
+    # (회사명, 종목코드, 거래소, 업종) — 회사 수는 이력 크기에 비례 (회사당 평균 20건)
+    return [(f'합성기업{i:05d}', f'{100000 + i:06d}', rng.choice(['KS', 'KQ']), rng.choice(SECTORS))
+            for i in range(max(rows // 20, 50))]
+
+
+def sales_rows(rows: int, rng, start: int = 0, end: date = date(2025, 6, 30)) -> list:
+    from records import SalesRecord
+    corps = companies(rows, rng)
+    days = business_days(end, max(rows // 40, 1))
+    out, cnt = [], {}
+    for i in range(rows):
+        name, code, market, sector = rng.choice(corps)
+        d = days[i * len(days) // rows]
+        amount = round(rng.lognormvariate(4, 1.2), 2)
+        close = rng.randrange(1_000, 200_000, 10)
+        cnt[name] = cnt.get(name, 0) + 1
+        out.append((SalesRecord(
+            stock_code=code, company=name, date=d.strftime('%Y%m%d'), exchange=market,
+            content=f'{sector} 관련 설비 공급계약 {i % 97}차', amount=amount,
+            sales_ratio=round(rng.uniform(1, 80), 2), counterparty=f'거래처{rng.randrange(500):03d}',
+            start=d.strftime('%Y-%m-%d'), end=(d + timedelta(days=rng.randrange(30, 720))).strftime('%Y-%m-%d'),
+            sector=sector, market_cap=rng.randrange(300, 50_000), prev_close=close, today_close=close,
+            next_close=close if i < rows - 20 else None, rcept_no=f'2025{start + i:010d}',
+        ), cnt[name]))
+    return out
+
+
+def invest_rows(rows: int, rng, start: int = 0, end: date = date(2025, 6, 30)) -> list:
+    from records import InvestRecord
+    corps = companies(rows, rng)
+    days = business_days(end, max(rows // 40, 1))
+    out = []
+    for i in range(rows):
+        name, code, _, _ = rng.choice(corps)
+        d = days[i * len(days) // rows]
+        close = rng.randrange(1_000, 200_000, 10)
+        out.append(InvestRecord(
+            company=name, date=d.strftime('%Y%m%d'), stock_code=code, kind=rng.choice(KINDS) + f' {i % 13}',
+            amount=round(rng.lognormvariate(9, 1.3), 1), equity_stated=round(rng.lognormvariate(11, 1), 1),
+            equity_ratio=round(rng.uniform(1, 60), 2), decided=d.strftime('%Y-%m-%d'),
+            start=d.strftime('%Y-%m-%d'), end=(d + timedelta(days=rng.randrange(90, 900))).strftime('%Y-%m-%d'),
+            prev_close=close, today_close=close, next_close=close if i < rows - 20 else None,
+        ))
+    return out
+
+
+def merger_rows(rows: int, rng, start: int = 0, end: date = date(2025, 6, 30)) -> list:
+    from records import MergerRecord
+    corps = companies(rows, rng)
+    days = business_days(end, max(rows // 40, 1))
+    out = []
+    for i in range(rows):
+        acq, _, _, sector = rng.choice(corps)
+        tgt = rng.choice(corps)[0]
+        d = days[i * len(days) // rows]
+        out.append(MergerRecord(
+            company=acq, acquirer=acq, target=tgt, reported=d.strftime('%Y%m%d'),
+            capital_acquirer=rng.randrange(10**8, 10**11), capital_target=rng.randrange(10**8, 10**11),
+            assets_acquirer=rng.randrange(10**9, 10**13), assets_target=rng.randrange(10**9, 10**13),
+            listed_acquirer='상장(코스닥)', listed_target=rng.choice(['비상장', '상장(코넥스)']),
+            shares_acquirer=rng.randrange(10**6, 10**8), shares_target=rng.randrange(10**6, 10**8),
+            overview=f'{sector} 사업을 영위하며 ' + '주요 제품은 부품·장비이고 국내외 고객사에 공급합니다. ' * 3,
+            rcept_no=f'2025{5_000_000_000 + start + i:010d}', corp_code=f'{i:08d}',
+        ))
+    return out
+
+
+def write_sheet(wb, sheet: str, header: list, records: list, cls, cnt: list = None):
+    # 실제 update_excel처럼 레코드를 DataFrame으로 모은 뒤 (날짜는 datetime, 결측은 빈 셀) 시트에 쓴다
+    from records import to_frame, from_frame
+    ws = wb.create_sheet(sheet)
+    ws.append(header)
+    for i, r in enumerate(from_frame(to_frame(records, cls), cls)):
+        ws.append([cnt[i] if col == 'Cnt' else r.get(col) for col in header])
+
+
+def generate(rows: int, out_dir: str, seed: int = 0) -> str:
+    # 실제 시트와 같은 컬럼의 합성 이력 + 접수번호 색인·익일종가 대기열·검색 색인·회사 집계까지 만든다
+    from openpyxl import Workbook, load_workbook
+    from record_index import RecordIndex, KEY_COL
+    from close_queue import CloseQueue
+    from records import SalesRecord, InvestRecord, MergerRecord
+    import search_index
+    import company_stats
+    from dart_update import sales_aliases
+    from merge_update import merger_aliases
+
+    rng = random.Random(seed)
+    path = os.path.join(out_dir, NAME)
+    wb = Workbook(write_only=True)
+    sales = sales_rows(rows, rng)
+    write_sheet(wb, 'main', SalesRecord.columns() + ['Cnt'], [r for r, _ in sales], SalesRecord,
+                [c for _, c in sales])
+    write_sheet(wb, '신규투자', InvestRecord.columns(), invest_rows(rows, rng), InvestRecord)
+    # 합병 시트는 '최초보고일'이 없던 예전 배치라 update_excel이 insert_cols를 탄다
+    write_sheet(wb, '합병', [c for c in MergerRecord.columns() if c != 'corp_code'],
+                merger_rows(rows, rng), MergerRecord)
+    wb.save(path)
+
+    wb = load_workbook(path)
+    for sheet, alias_fn in (('main', sales_aliases), ('합병', merger_aliases)):
+        index = RecordIndex.load(path, sheet)
+        index.rebuild(wb[sheet], alias_fn)
+        index.save()
+    for sheet, date_col, next_col in (('main', '날짜 (D)', '익일종가(원)'), ('신규투자', '공시일', '익일종가')):
+        ws = wb[sheet]
+        header = [c.value for c in ws[1]]
+        queue = CloseQueue.load(path, sheet)
+        idx_key = header.index(KEY_COL) + 1 if KEY_COL in header else None
+        queue.seed(ws, header.index('종목코드') + 1, header.index(date_col) + 1, header.index(next_col) + 1, idx_key)
+        queue.save()
+    search_index.rebuild(path)
+    company_stats.rebuild(path)
+    return path
+
+
+def batch(kind: str, rows: int, overlap: int = 5):
+    # 하루치 새 공시 BATCH건. 앞의 overlap건은 이미 시트에 있는 접수번호라 upsert 경로를 탄다
+    from records import SalesRecord, InvestRecord, MergerRecord, to_frame
+    rng = random.Random(rows)
+    if kind == 'sales':
+        fresh = [r for r, _ in sales_rows(BATCH - overlap, rng, start=rows, end=date(2025, 7, 1))]
+        old = [r for r, _ in sales_rows(rows, random.Random(0))][-overlap:]
+        return to_frame(old + fresh, SalesRecord)
+    if kind == 'invest':
+        return to_frame(invest_rows(BATCH, rng, start=rows, end=date(2025, 7, 1)), InvestRecord)
+    return to_frame(merger_rows(BATCH, rng, start=rows, end=date(2025, 7, 1)), MergerRecord)
+
+
+def _read_groupby(path: str):
+    # dart_update.update_excel 앞부분: 기존 시트를 읽어 회사별 마지막 Cnt를 구한다
+    import pandas as pd
+    existing = pd.read_excel(path, sheet_name='main', usecols=['날짜 (D)', '공시회사', '계약 금액(억)', 'Cnt'],
+                             parse_dates=['날짜 (D)'])
+    latest = existing.sort_values(['공시회사', '날짜 (D)']).groupby('공시회사', as_index=False).last()
+    return len(latest)
+
+
+def _sales_filter_setup(path: str, rows: int):
+    import pandas as pd
+    existing = pd.read_excel(path, sheet_name='main', usecols=['날짜 (D)', '공시회사', '계약 금액(억)', 'Cnt'],
+                             parse_dates=['날짜 (D)'])
+    return batch('sales', rows), existing
+
+
+def _sales_filter(state):
+    from dart_update import filter_new_rows
+    new, existing = state
+    return len(filter_new_rows(new, existing))
+
+
+def _close_scan_setup(path: str, rows: int):
+    from workbook_commit import WorkbookCommit
+    from close_queue import CloseQueue
+    ws = WorkbookCommit.open(path).wb['main']
+    header = [c.value for c in ws[1]]
+    return ws, CloseQueue(path, 'main', {}), [header.index(c) + 1 for c in ('종목코드', '날짜 (D)', '익일종가(원)')]
+
+
+def _close_scan(state):
+    # fill_next_close가 대기열 파일 없이 처음 돌 때의 시트 전체 스캔
+    ws, queue, cols = state
+    queue.seed(ws, *cols)
+    return len(queue)
+
+
+def _update(module: str, kind: str):
+    def run(state):
+        import importlib
+        path, df = state
+        importlib.import_module(module).update_excel(df, path)
+        return len(df)
+    return lambda path, rows: (path, batch(kind, rows)), run
+
+
+def _invest_filter(state):
+    from invest_update import filter_new_rows
+    path, df = state
+    return len(filter_new_rows(df, path))
+
+
+# 작업 이름 → (준비, 측정). 준비 단계의 시간·메모리는 측정에 넣지 않는다
+OPS = {
+    'open-workbook':        (lambda path, rows: path,
+                             lambda path: len(__import__('workbook_commit').WorkbookCommit.open(path).wb.sheetnames)),
+    'sales-read-groupby':   (lambda path, rows: path, _read_groupby),
+    'sales-filter_new_rows': (_sales_filter_setup, _sales_filter),
+    'sales-update_excel':   _update('dart_update', 'sales'),
+    'invest-filter_new_rows': (lambda path, rows: (path, batch('invest', rows)), _invest_filter),
+    'invest-update_excel':  _update('invest_update', 'invest'),
+    'close-scan':           (_close_scan_setup, _close_scan),
+    'merge-update_excel':   _update('merge_update', 'merger'),
+}
+
+
+def run_op(name: str, path: str, rows: int, py_peak: bool) -> dict:
+    import pandas, openpyxl  # noqa: F401  기준 RSS에 import 비용을 포함시킨다
+    import dart_update, invest_update, merge_update  # noqa: F401
+    setup, fn = OPS[name]
+    state = setup(path, rows)
+    base = rss_mb()
+    if py_peak:
+        tracemalloc.start()
+    started = time.perf_counter()
+    fn(state)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if py_peak else None
+    if py_peak:
+        tracemalloc.stop()
+    return {'op': name, 'rows': rows, 'seconds': round(seconds, 4),
+            'rss_peak_mb': round(rss_mb(), 1), 'rss_delta_mb': round(rss_mb() - base, 1),
+            'py_peak_mb': None if peak is None else round(peak, 1)}
+
+
+def copy_store(src_dir: str, dst_dir: str) -> str:
+    # 작업마다 워크북과 사이드카(<엑셀 이름>.*)를 새로 복사해 서로의 쓰기가 섞이지 않게 한다
+    os.makedirs(dst_dir, exist_ok=True)
+    for f in os.listdir(src_dir):
+        shutil.copy2(os.path.join(src_dir, f), os.path.join(dst_dir, f))
+    return os.path.join(dst_dir, NAME)
+
+
+def slope(results: list, op: str) -> list:
+    # 인접한 크기 사이의 log(시간)/log(행 수) 기울기: 1이면 선형, 2면 제곱
+    pts = sorted((r['rows'], r['seconds']) for r in results if r['op'] == op)
+    return [math.log(t2 / t1) / math.log(n2 / n1) if t1 > 0 and t2 > 0 else float('nan')
+            for (n1, t1), (n2, t2) in zip(pts, pts[1:])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이력 크기에 따라 느려지는 저장 경로의 시간·메모리 벤치마크 (합성 워크북)")
+    parser.add_argument("--sizes", type=str, default=SIZES, help="시트당 행 수 목록 (예: 1000,10000,100000)")
+    parser.add_argument("--op", action="append", choices=list(OPS), help="실행할 작업 (기본: 전체)")
+    parser.add_argument("--py-peak", action="store_true",
+                        help="tracemalloc으로 Python 할당 최대치도 잰다 (시간이 느려진다)")
+    parser.add_argument("--keep", type=str, default=None, help="생성한 합성 워크북을 이 디렉터리에 남긴다")
+    parser.add_argument("--json", type=str, default=None, help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--run", choices=list(OPS), help=argparse.SUPPRESS)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--path", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_op(args.run, args.path, args.rows, args.py_peak)))
+        return
+    if args.generate:
+        generate(args.rows, args.path)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    ops = args.op or list(OPS)
+    results = []
+    print(f"{'op':<24}{'rows':>8}{'sec':>9}{'rss_peak':>10}{'rss_delta':>11}{'py_peak':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(s) for s in args.sizes.split(',')]:
+            src = os.path.join(args.keep or tmp, f'rows_{rows}')
+            if not os.path.exists(os.path.join(src, NAME)):
+                os.makedirs(src, exist_ok=True)
+                started = time.perf_counter()
+                # 생성도 별도 프로세스에서 한다. 부모가 커지면 자식의 최대 RSS가 부모 크기부터 시작한다
+                subprocess.run([sys.executable, os.path.abspath(__file__), '--generate', '--path', src,
+                                '--rows', str(rows)], check=True, cwd=here)
+                print(f"   (합성 워크북 {rows:,}행 생성 {time.perf_counter() - started:.1f}초)")
+            for name in ops:
+                path = copy_store(src, os.path.join(tmp, 'run', f'{rows}_{name}'))
+                # 작업마다 새 프로세스에서 돌려 최대 RSS가 서로 섞이지 않게 한다
+                cmd = [sys.executable, os.path.abspath(__file__), '--run', name, '--path', path, '--rows', str(rows)]
+                out = subprocess.run(cmd + (['--py-peak'] if args.py_peak else []),
+                                     capture_output=True, text=True, check=True, cwd=here)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                results.append(r)
+                py = '-' if r['py_peak_mb'] is None else f"{r['py_peak_mb']:.1f}"
+                print(f"{name:<24}{rows:>8}{r['seconds']:>9.3f}{r['rss_peak_mb']:>10.1f}{r['rss_delta_mb']:>11.1f}{py:>9}")
+                shutil.rmtree(os.path.dirname(path))
+
+    if len({r['rows'] for r in results}) > 1:
+        print("\n크기 증가에 대한 시간 기울기 (1.0 = 선형)")
+        for name in ops:
+            print(f"{name:<24}" + ''.join(f"{s:>8.2f}" for s in slope(results, name)))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+        print(f"✅ 결과 저장 → {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import os
+from datetime import datetime, date
+
+from html_backend import get_backend
+from record_index import read_json, write_section
+from trading_calendar import get_calendar
+
+SISE_URL = "https://finance.naver.com/item/sise_day.naver?code={code}&page={page}"
+MAX_ATTEMPTS = 5
+MAX_PAGES = 30
+
+
+def queue_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.closes.json'
+
+
+def to_yyyymmdd(value) -> str | None:
+    if value is None:
+        return None
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y%m%d')
+    s = str(value).strip()
+    for fmt in ('%Y%m%d', '%Y-%m-%d', '%Y.%m.%d'):
+        try:
+            return datetime.strptime(s, fmt).strftime('%Y%m%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_sise_day(html: str) -> list:
+    records = []
+    for cols in get_backend().table_rows(html, "table.type2", all_tables=True):
+        if len(cols) != 7:
+            continue
+        date_txt = cols[0].text
+        close_txt = cols[1].text.replace(",", "")
+        if not date_txt or not close_txt:
+            continue
+        try:
+            records.append((datetime.strptime(date_txt, "%Y.%m.%d").date(), int(close_txt)))
+        except ValueError:
+            continue
+    return records
+
+
+def fetch_price_history(session, stock_code: str, oldest: date, headers=None) -> list:
+    # 가장 오래된 대기일의 전일까지 덮을 만큼만 페이지를 넘긴다
+    history = {}
+    for page in range(1, MAX_PAGES + 1):
+        resp = session.get(SISE_URL.format(code=stock_code, page=page), headers=headers, timeout=5)
+        resp.raise_for_status()
+        records = parse_sise_day(resp.text)
+        new = [r for r in records if r[0] not in history]
+        if not new:
+            break
+        history.update(new)
+        if min(history) < oldest:
+            break
+    return sorted(history.items())
+
+
+def closes_for(history: list, target: date):
+    dates = [d for d, _ in history]
+    try:
+        idx = dates.index(target)
+    except ValueError:
+        return None, None, None
+    prev_close = history[idx - 1][1] if idx >= 1 else None
+    next_close = history[idx + 1][1] if idx + 1 < len(history) else None
+    return prev_close, history[idx][1], next_close
+
+
+def row_key(row: int) -> str:
+    # 접수번호 컬럼이 없는 시트(신규투자)·예전 행은 행 번호로 넣고, 쓸 때 종목코드·공시일로 확인한다
+    return f'row:{row}'
+
+
+class CloseQueue:
+    # 익일종가가 비어 있는 행: {sheet: {접수번호 또는 row:N: {'code', 'date', 'attempts', 'row'}}}
+    def __init__(self, path: str, sheet: str, data: dict):
+        self.path = path
+        self.sheet = sheet
+        self.initialized = sheet in data
+        self.pending = data.setdefault(sheet, {})
+        self.dirty = False
+        # 예전 파일은 행 번호가 그대로 키였다
+        for key in [k for k in self.pending if k.isdigit()]:
+            self.pending[row_key(int(key))] = dict(self.pending.pop(key), row=int(key))
+            self.dirty = True
+
+    @classmethod
+    def load(cls, excel_path: str, sheet: str) -> 'CloseQueue':
+        path = queue_path(excel_path)
+        return cls(path, sheet, read_json(path))
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, row: int, stock_code, rcept_dt, key: str = None) -> bool:
+        rcept_dt = to_yyyymmdd(rcept_dt)
+        if stock_code in (None, '') or rcept_dt is None:
+            return False
+        self.pending[key or row_key(row)] = {
+            'code': str(stock_code).strip().zfill(6), 'date': rcept_dt, 'attempts': 0, 'row': row
+        }
+        self.dirty = True
+        return True
+
+    def done(self, key: str):
+        if self.pending.pop(key, None) is not None:
+            self.dirty = True
+
+    def retry(self, key: str):
+        entry = self.pending.get(key)
+        if entry is None:
+            return
+        entry['attempts'] += 1
+        if entry['attempts'] >= MAX_ATTEMPTS:
+            del self.pending[key]
+        self.dirty = True
+
+    def groups(self) -> dict:
+        out = {}
+        for key, entry in self.pending.items():
+            out.setdefault(entry['code'], []).append((key, entry['date']))
+        return out
+
+    def row_of(self, key: str, entry: dict, index=None) -> int | None:
+        # 접수번호로 넣은 행은 쓸 때 색인에서 지금 행 번호를 찾는다 (보관 회전·정렬로 행이 옮겨져도 맞게)
+        if index is not None and key in index:
+            return index.row_for(key)
+        return entry.get('row')
+
+    def rows(self, index=None) -> set:
+        return {r for r in (self.row_of(k, e, index) for k, e in self.pending.items()) if r is not None}
+
+    def matches(self, ws, row: int, entry: dict, idx_code: int, idx_date: int) -> bool:
+        # 그 행에 아직 대기열에 넣은 종목코드·공시일이 있는지 (RecordIndex.verify와 같은 확인)
+        code = ws.cell(row, idx_code).value
+        return (code not in (None, '') and str(code).strip().zfill(6) == entry['code']
+                and to_yyyymmdd(ws.cell(row, idx_date).value) == entry['date'])
+
+    def renumber(self, fn):
+        # 행을 지운 뒤 (archive.rotate) 행 번호 힌트와 행 번호 키를 새 번호로 바꾼다
+        pending = {}
+        for key, entry in self.pending.items():
+            if entry.get('row') is not None:
+                entry['row'] = fn(entry['row'])
+                if key.startswith('row:'):
+                    key = row_key(entry['row'])
+            pending[key] = entry
+        self.pending = pending
+        self.dirty = True
+
+    def seed(self, ws, idx_code: int, idx_date: int, idx_next: int, idx_key: int = None):
+        # 큐 파일이 없거나 시트와 어긋났을 때 시트를 스캔해 다시 만든다
+        self.pending.clear()
+        for row in range(2, ws.max_row + 1):
+            if ws.cell(row, idx_next).value is not None:
+                continue
+            key = ws.cell(row, idx_key).value if idx_key else None
+            self.add(row, ws.cell(row, idx_code).value, ws.cell(row, idx_date).value,
+                     str(key).strip() if key not in (None, '') else None)
+        self.initialized = True
+        self.dirty = True
+
+    def due(self, calendar=None) -> int:
+        # D+1 거래일 장이 끝나 지금 채울 수 있는 행 수 (달력 추정값 기준)
+        calendar = calendar or get_calendar()
+        return sum(calendar.next_close_ready(datetime.strptime(e['date'], '%Y%m%d').date())
+                   for e in self.pending.values())
+
+    def resolve(self, session, headers=None, calendar=None) -> dict:
+        # 종목별로 시세를 한 번만 받아 대기 행 전체에 적용한다. D+1 장이 끝나지 않은 행은 요청하지 않는다
+        # 돌려주는 값은 {키: (대기열 항목, (전일, 당일, 익일))} — 쓰기 전에 행을 확인하라고 항목도 같이 준다
+        calendar = calendar or get_calendar()
+        calendar.ensure(session, [datetime.strptime(e['date'], '%Y%m%d').date() for e in self.pending.values()],
+                        headers=headers)
+        filled = {}
+        for code, entries in self.groups().items():
+            targets = [(key, datetime.strptime(d, '%Y%m%d').date()) for key, d in entries]
+            targets = [(key, t) for key, t in targets if calendar.next_close_ready(t)]
+            if not targets:
+                continue
+            history = fetch_price_history(session, code, min(t for _, t in targets), headers)
+            for key, target in targets:
+                # D+1이 관측 범위(calendar.through) 밖이면 '장이 끝났다'는 추정일 뿐이라, 종가가 없어도 실패로 세지 않는다
+                confirmed = calendar.observed(calendar.next_session(target))
+                if not history:
+                    self.retry(key)
+                    continue
+                prev_c, today_c, next_c = closes_for(history, target)
+                if today_c is None:
+                    if confirmed:
+                        self.retry(key)
+                    continue
+                filled[key] = (dict(self.pending[key]), (prev_c, today_c, next_c))
+                if next_c is not None:
+                    self.done(key)
+                elif confirmed:
+                    self.retry(key)
+        calendar.save()
+        return filled
+
+    def save(self):
+        if not self.dirty:
+            return
+        write_section(self.path, self.sheet, self.pending)
+        self.dirty = False
@@ -0,0 +1,245 @@
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from close_queue import to_yyyymmdd
+from record_index import record_key, legacy_row_key
+from archive import archive_paths
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+SHEET = 'main'
+
+# 계약 행(contracts)이 바뀔 때마다 트리거가 회사별 합계·월별 합계·계약상대별 합계를 증분으로 고친다
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    rcept_no TEXT PRIMARY KEY,
+    company TEXT NOT NULL, stock_code TEXT, date TEXT NOT NULL,
+    amount REAL NOT NULL DEFAULT 0, ratio REAL NOT NULL DEFAULT 0,
+    counterparty TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS contracts_company ON contracts(company, date);
+CREATE TABLE IF NOT EXISTS company_totals (
+    company TEXT PRIMARY KEY, stock_code TEXT, n INTEGER NOT NULL, amount REAL NOT NULL, last_date TEXT
+);
+CREATE TABLE IF NOT EXISTS company_months (
+    company TEXT NOT NULL, ym TEXT NOT NULL, n INTEGER NOT NULL, amount REAL NOT NULL, ratio REAL NOT NULL,
+    PRIMARY KEY (company, ym)
+);
+CREATE INDEX IF NOT EXISTS company_months_ym ON company_months(ym);
+CREATE TABLE IF NOT EXISTS company_counterparties (
+    company TEXT NOT NULL, counterparty TEXT NOT NULL, n INTEGER NOT NULL, amount REAL NOT NULL,
+    PRIMARY KEY (company, counterparty)
+);
+CREATE TRIGGER IF NOT EXISTS contracts_ai AFTER INSERT ON contracts BEGIN
+    INSERT INTO company_totals (company, stock_code, n, amount, last_date)
+    VALUES (new.company, new.stock_code, 1, new.amount, new.date)
+    ON CONFLICT(company) DO UPDATE SET
+        n = n + 1, amount = amount + excluded.amount,
+        stock_code = coalesce(excluded.stock_code, stock_code),
+        last_date = max(last_date, excluded.last_date);
+    INSERT INTO company_months (company, ym, n, amount, ratio)
+    VALUES (new.company, substr(new.date, 1, 6), 1, new.amount, new.ratio)
+    ON CONFLICT(company, ym) DO UPDATE SET
+        n = n + 1, amount = amount + excluded.amount, ratio = ratio + excluded.ratio;
+    INSERT INTO company_counterparties (company, counterparty, n, amount)
+    VALUES (new.company, new.counterparty, 1, new.amount)
+    ON CONFLICT(company, counterparty) DO UPDATE SET
+        n = n + 1, amount = amount + excluded.amount;
+END;
+CREATE TRIGGER IF NOT EXISTS contracts_ad AFTER DELETE ON contracts BEGIN
+    UPDATE company_totals SET
+        n = n - 1, amount = amount - old.amount,
+        last_date = (SELECT max(date) FROM contracts WHERE company = old.company)
+    WHERE company = old.company;
+    UPDATE company_months SET n = n - 1, amount = amount - old.amount, ratio = ratio - old.ratio
+    WHERE company = old.company AND ym = substr(old.date, 1, 6);
+    UPDATE company_counterparties SET n = n - 1, amount = amount - old.amount
+    WHERE company = old.company AND counterparty = old.counterparty;
+    DELETE FROM company_totals WHERE company = old.company AND n <= 0;
+    DELETE FROM company_months WHERE company = old.company AND n <= 0;
+    DELETE FROM company_counterparties WHERE company = old.company AND n <= 0;
+END;
+"""
+
+SUMMARY = """
+SELECT t.company, t.stock_code, t.n, round(t.amount, 2) AS amount, t.last_date,
+       round(coalesce((SELECT sum(m.ratio) FROM company_months m
+                       WHERE m.company = t.company AND m.ym > :start AND m.ym <= :end), 0), 2) AS trailing_ratio,
+       (SELECT c.counterparty FROM company_counterparties c
+        WHERE c.company = t.company AND c.counterparty <> ''
+        ORDER BY c.amount DESC, c.n DESC LIMIT 1) AS top_counterparty
+FROM company_totals t
+"""
+
+
+def stats_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.stats.sqlite'
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _number(value) -> float:
+    try:
+        return 0.0 if value is None or pd.isna(value) else float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def to_contract(key: str, values) -> dict | None:
+    company = values.get('공시회사')
+    date = to_yyyymmdd(values.get('날짜 (D)')) if pd.notna(values.get('날짜 (D)')) else None
+    if company is None or pd.isna(company) or not date:
+        return None
+    code = values.get('종목코드')
+    counterparty = values.get('계약상대')
+    return {
+        'rcept_no': str(key),
+        'company': str(company).strip(),
+        'stock_code': None if code is None or pd.isna(code) else str(code).split('.')[0].zfill(6),
+        'date': date,
+        'amount': _number(values.get('계약 금액(억)')),
+        'ratio': _number(values.get('매출액 대비(%) (A)')),
+        'counterparty': '' if counterparty is None or pd.isna(counterparty) else str(counterparty).strip(),
+    }
+
+
+def upsert(conn, contracts: list):
+    # 정정공시로 값이 바뀐 행은 지웠다가 다시 넣어 트리거가 이전 기여분을 빼고 새 값을 더하게 한다
+    contracts = list({c['rcept_no']: c for c in contracts}.values())
+    conn.executemany("DELETE FROM contracts WHERE rcept_no = ?", [(c['rcept_no'],) for c in contracts])
+    conn.executemany(
+        "INSERT INTO contracts (rcept_no, company, stock_code, date, amount, ratio, counterparty) "
+        "VALUES (:rcept_no, :company, :stock_code, :date, :amount, :ratio, :counterparty)",
+        contracts,
+    )
+
+
+class CompanyStats:
+    # update_excel과 같은 커밋에서 반영한 행을 모았다가 엑셀 저장 후 한 트랜잭션으로 갱신한다
+    def __init__(self, excel_path: str, sheet: str):
+        self.excel_path = excel_path
+        self.path = stats_path(excel_path)
+        self.sheet = sheet
+        self.pending = {}
+
+    @classmethod
+    def load(cls, excel_path: str, sheet: str = SHEET) -> 'CompanyStats':
+        return cls(excel_path, sheet)
+
+    def put(self, key: str, values):
+        contract = to_contract(key, values) if key is not None else None
+        if contract is not None:
+            self.pending[contract['rcept_no']] = contract
+
+    def save(self):
+        if not self.pending:
+            return
+        if not os.path.exists(self.path):
+            # 처음에는 방금 저장된 시트 전체로 만든다 (새 행도 이미 들어 있다)
+            rebuild(self.excel_path)
+            self.pending = {}
+            return
+        conn = connect(self.path)
+        try:
+            stale = any(legacy_row_key(k) for (k,) in
+                        conn.execute("SELECT rcept_no FROM contracts WHERE rcept_no LIKE '%row:%'"))
+            if not stale:
+                with conn:
+                    upsert(conn, list(self.pending.values()))
+        finally:
+            conn.close()
+        if stale:
+            # 행 번호 키로 만든 예전 집계는 같은 행이 두 번 세어질 수 있어 새로 만든다
+            rebuild(self.excel_path)
+        self.pending = {}
+
+
+def rebuild(excel_path: str) -> int:
+    # 보관 파일로 옮긴 지난 연도까지 포함해 전체 이력으로 만든다
+    contracts = []
+    for year, path in archive_paths(excel_path) + [(None, excel_path)]:
+        with pd.ExcelFile(path) as xls:
+            if SHEET not in xls.sheet_names:
+                continue
+            df = pd.read_excel(xls, sheet_name=SHEET)
+        for values in df.to_dict('records'):
+            key = record_key(SHEET, values)
+            contract = to_contract(key, values) if key is not None else None
+            if contract is not None:
+                contracts.append(contract)
+    path = stats_path(excel_path)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = connect(path)
+    try:
+        with conn:
+            upsert(conn, contracts)
+    finally:
+        conn.close()
+    return len(contracts)
+
+
+def window(as_of: str = None, months: int = 12) -> dict:
+    # (start, end] 구간의 YYYYMM. as_of가 속한 달을 포함해 months개월
+    end = datetime.strptime(as_of, '%Y%m%d') if as_of else datetime.now()
+    y, m = divmod(end.year * 12 + end.month - 1 - months, 12)
+    return {'start': f'{y:04d}{m + 1:02d}', 'end': end.strftime('%Y%m')}
+
+
+def summary(excel_path: str, company: str = None, min_ratio: float = None,
+            as_of: str = None, months: int = 12, order: str = 'trailing_ratio', limit: int = 50) -> list:
+    path = stats_path(excel_path)
+    if not os.path.exists(path):
+        return []
+    params = window(as_of, months)
+    where = []
+    if company:
+        where.append("t.company LIKE :company")
+        params['company'] = f'%{company}%'
+    sql = f"SELECT * FROM ({SUMMARY}" + (" WHERE " + " AND ".join(where) if where else "") + ")"
+    if min_ratio is not None:
+        sql += " WHERE trailing_ratio >= :min_ratio"
+        params['min_ratio'] = min_ratio
+    sql += f" ORDER BY {order} DESC LIMIT :limit"
+    params['limit'] = limit
+    conn = connect(path)
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="회사별 단일판매 계약 집계 (건수·누적 금액·최근 12개월 매출액 대비 합계·최대 계약상대)")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로")
+    parser.add_argument("--rebuild", action="store_true", help="main 시트 전체로 집계를 새로 생성")
+    parser.add_argument("--company", type=str, help="회사명(일부)으로 조회")
+    parser.add_argument("--min-ratio", type=float, help="최근 N개월 매출액 대비(%%) 합계가 이 값 이상인 회사만")
+    parser.add_argument("--months", type=int, default=12, help="최근 합계 기간(개월)")
+    parser.add_argument("--as-of", type=str, help="기준일(YYYYMMDD), 기본값은 오늘")
+    parser.add_argument("--order", choices=['trailing_ratio', 'amount', 'n', 'last_date'], default='trailing_ratio',
+                        help="정렬 기준")
+    parser.add_argument("--limit", type=int, default=50, help="최대 출력 수")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        n = rebuild(args.excel)
+        print(f"✅ 회사별 집계 재생성 완료 ({n}건) → {stats_path(args.excel)}")
+    elif not os.path.exists(stats_path(args.excel)):
+        print(f"⚠️ 집계 파일이 없습니다. 먼저 --rebuild로 생성하세요: {stats_path(args.excel)}")
+
+    rows = summary(args.excel, args.company, args.min_ratio, args.as_of, args.months, args.order, args.limit)
+    if rows:
+        print(f"{'공시회사':<16}{'건수':>6}{'누적 금액(억)':>14}{f'{args.months}개월 비율(%)':>16}  {'최근 공시':<9} 최대 계약상대")
+        for r in rows:
+            print(f"{r['company']:<16}{r['n']:>6}{r['amount']:>14,.1f}{r['trailing_ratio']:>16,.2f}  "
+                  f"{r['last_date'] or '-':<9} {r['top_counterparty'] or '-'}")
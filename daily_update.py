@@ -0,0 +1,73 @@
+import time
+import argparse
+from datetime import datetime
+
+import pipeline
+from dart_client import make_session
+from profiling import StageProfiler, add_profile_args
+from run_journal import RunJournal
+from sinks import Sinks, open_sinks, add_sink_args
+from watchlist import add_watchlist_args, enable as enable_watchlist
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+
+
+def collect_all(session, target_date: str, excel_path: str, sinks: Sinks = None, journal=None) -> dict:
+    # 등록된 모든 공시유형(단일판매·신규시설 투자·합병 등)을 동시에 수집한다
+    return pipeline.collect_all(session, target_date, excel_path, sinks, journal=journal)
+
+
+def commit_all(session, results: dict, excel_path: str, journal=None):
+    pipeline.commit_all(session, results, excel_path, journal=journal)
+
+
+def main(target_date: str, excel_path: str, record: str = None, replay: str = None,
+         replay_latency: bool = None, profiler: StageProfiler = None, sink_specs=(),
+         watchlist: str = None, journal: bool = True):
+    # collect 단계는 스레드에서 돌기 때문에 cProfile에는 대기 시간만 잡힌다. 파이프라인별 핫스팟은 각 스크립트의 --profile로 본다
+    profiler = profiler or StageProfiler()
+    started = time.perf_counter()
+    session = make_session(record=record, replay=replay, replay_latency=replay_latency)
+    # 중간에 죽어도 다음 실행이 시트 반영이 끝나지 않은 공시부터 이어 가도록 공시별 단계를 남긴다
+    journal = RunJournal.load(excel_path) if journal else None
+    try:
+        enable_watchlist(session, watchlist)
+        with profiler.stage('collect_all'), open_sinks(sink_specs) as sinks:
+            results = collect_all(session, target_date, excel_path, sinks, journal)
+        with profiler.stage('enrich'):
+            # 모든 공시유형의 회사를 모아 다중회사 재무 API를 배치로 한 번에 조회한다
+            pipeline.enrich_all(session, results, target_date, journal)
+        with profiler.stage('commit_all'):
+            commit_all(session, results, excel_path, journal)
+    finally:
+        session.close()
+    print(f"✅ 일일 업데이트 완료 ({time.perf_counter() - started:.1f}s)")
+    print(profiler.report(), end='')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="단일판매·신규시설 투자·합병 공시 일괄 업데이트")
+    parser.add_argument(
+        "--date",
+        type=str,
+        default=datetime.now().strftime("%Y%m%d"),
+        help="조회할 날짜(YYYYMMDD), 기본값은 오늘"
+    )
+    parser.add_argument(
+        "--excel",
+        type=str,
+        default=EXCEL_PATH,
+        help="업데이트할 엑셀 파일 경로"
+    )
+    parser.add_argument("--record", type=str, help="모든 HTTP 요청/응답을 기록할 아카이브(zip) 경로")
+    parser.add_argument("--replay", type=str, help="네트워크 대신 응답을 재생할 아카이브(zip) 경로")
+    parser.add_argument("--replay-latency", action="store_true", help="재생 시 기록된 응답 시간만큼 대기")
+    add_sink_args(parser)
+    add_watchlist_args(parser)
+    add_profile_args(parser)
+    parser.add_argument("--no-journal", action="store_true",
+                        help="실행 저널을 쓰지 않고 목록 전체를 처음부터 처리 (재생·벤치마크용)")
+    args = parser.parse_args()
+    main(args.date, args.excel, args.record, args.replay, args.replay_latency or None,
+         StageProfiler(args.profile, args.profile_memory), args.sink, args.watchlist,
+         not args.no_journal)
@@ -0,0 +1,113 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from http_archive import RecordingSession, ReplaySession
+
+load_dotenv()
+API_KEY = os.getenv("DART_API_KEY")
+LIST_URL = 'https://opendart.fss.or.kr/api/list.json'
+DOCUMENT_URL = 'https://opendart.fss.or.kr/api/document.xml'
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36"
+)
+
+CORP_WORKERS = 8
+
+_list_cache = {}
+_list_locks = {}
+_cache_lock = threading.Lock()
+_corp_filter = None
+
+
+def make_session(pool_size: int = 16, record: str = None, replay: str = None,
+                 replay_latency: bool = None) -> requests.Session:
+    # 인자가 없으면 DART_HTTP_RECORD / DART_HTTP_REPLAY / DART_HTTP_REPLAY_LATENCY 환경변수를 따른다
+    record = record or os.getenv("DART_HTTP_RECORD")
+    replay = replay or os.getenv("DART_HTTP_REPLAY")
+    if replay_latency is None:
+        replay_latency = os.getenv("DART_HTTP_REPLAY_LATENCY", "").lower() in ("1", "true", "yes")
+
+    if replay:
+        session = ReplaySession(replay, latency=replay_latency)
+    elif record:
+        session = RecordingSession(record)
+    else:
+        session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _key_lock(key):
+    with _cache_lock:
+        return _list_locks.setdefault(key, threading.Lock())
+
+
+def _fetch_pages(session, params: dict) -> list:
+    reports = []
+    resp = session.get(LIST_URL, params={**params, 'page_no': 1}, timeout=10)
+    resp.raise_for_status()
+    data = resp.json()
+    total_page = int(data.get('total_page', 1))
+    reports.extend(data.get('list', []))
+
+    for page in range(2, total_page + 1):
+        resp = session.get(LIST_URL, params={**params, 'page_no': page}, timeout=10)
+        resp.raise_for_status()
+        page_reports = resp.json().get('list', [])
+        if not page_reports:
+            break
+        reports.extend(page_reports)
+    return reports
+
+
+def set_corp_filter(corp_codes=None):
+    # 관심종목 모드: 지정하면 fetch_list가 시장 전체 대신 회사별(corp_code) 목록만 받아 합친다
+    global _corp_filter
+    _corp_filter = tuple(sorted(set(corp_codes))) if corp_codes else None
+    clear_cache()
+
+
+def fetch_list(session, bgn_de: str, end_de: str, detail_ty: str) -> list:
+    # 같은 (기간, 공시유형) 목록은 한 번만 받아 파이프라인끼리 공유한다
+    corp_codes = _corp_filter
+    key = (bgn_de, end_de, detail_ty, corp_codes)
+    with _key_lock(key):
+        if key in _list_cache:
+            return _list_cache[key]
+
+        base_params = {
+            'crtfc_key': API_KEY,
+            'bgn_de': bgn_de,
+            'end_de': end_de,
+            'pblntf_detail_ty': detail_ty,
+            'page_count': 100,
+            'last_reprt_at': 'Y',
+        }
+        if corp_codes is None:
+            all_reports = _fetch_pages(session, base_params)
+        else:
+            with ThreadPoolExecutor(max_workers=min(CORP_WORKERS, len(corp_codes))) as pool:
+                parts = pool.map(lambda code: _fetch_pages(session, {**base_params, 'corp_code': code}),
+                                 corp_codes)
+                merged = {r['rcept_no']: r for part in parts for r in part}
+            # 시장 전체 조회와 같은 순서(최근 접수 먼저)로 맞춘다
+            all_reports = sorted(merged.values(), key=lambda r: r['rcept_no'], reverse=True)
+
+        _list_cache[key] = all_reports
+        return all_reports
+
+
+def clear_cache():
+    with _cache_lock:
+        _list_cache.clear()
+        _list_locks.clear()
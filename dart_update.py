@@ -1,107 +1,83 @@
-import os
-import io
 import re
+import time
 import argparse
 from datetime import datetime
-import requests
 import pandas as pd
-from zipfile import ZipFile, BadZipFile
-from openpyxl import load_workbook, Workbook
+from zipfile import BadZipFile
 from openpyxl.styles import Alignment
 from pandas.api.types import (
     is_integer_dtype,
     is_float_dtype
 )
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv         
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/114.0.0.0 Safari/537.36"
-    )
-}
-load_dotenv()
-API_KEY = os.getenv("DART_API_KEY")
+from html_backend import get_backend
+from dart_client import USER_AGENT, fetch_list, make_session
+from doc_stream import download_document, open_member, find_table
+from workbook_commit import WorkbookCommit
+from profiling import StageProfiler, add_profile_args
+from record_index import RecordIndex, KEY_COL, alias_key
+from close_queue import CloseQueue, parse_sise_day
+from trading_calendar import get_calendar
+from search_index import SearchIndex
+from company_stats import CompanyStats
+from sinks import Sinks, StoreSink, open_sinks, add_sink_args
+from watchlist import add_watchlist_args, enable as enable_watchlist
+from financials import enrich, extend_header
+from archive import ArchiveIndex
+from records import SalesRecord, from_frame, to_frame as records_frame
+import pipeline
+from pipeline import Deferred, ReportType, RunContext, register
+from label_store import LabelStore, label_map
+from run_journal import RunJournal
+from sector_table import SectorTable, excluded_sector, load_sectors, normalize_sector
+
+HEADERS = {"User-Agent": USER_AGENT}
+
+def select_sales(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[
+        df['report_nm'].str.contains('단일판매') &
+        ~df['report_nm'].str.contains('해지')
+    ].reset_index(drop=True)
+    df['정정'] = df['report_nm'].str.contains('정정')
+    return df
 
-def fetch_sales(session, target_date: str) -> pd.DataFrame:
-    url = 'https://opendart.fss.or.kr/api/list.json'
-    base_params = {
-        'crtfc_key': API_KEY,
-        'bgn_de': target_date,
-        'end_de': target_date,
-        'pblntf_detail_ty': 'I001',
-        'page_count': 100,
-        'last_reprt_at': 'Y',
-    }
-
-    all_reports = []
-    resp = session.get(url, params={**base_params, 'page_no': 1}, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-    total_page = int(data.get('total_page', 1))
-    all_reports.extend(data.get('list', []))
-
-    for page in range(2, total_page + 1):
-        resp = session.get(url, params={**base_params, 'page_no': page}, timeout=10)
-        resp.raise_for_status()
-        reports = resp.json().get('list', [])
-        if not reports:
-            break
-        all_reports.extend(reports)
 
+def fetch_sales(session, target_date: str) -> pd.DataFrame:
+    all_reports = fetch_list(session, target_date, target_date, 'I001')
     df = pd.DataFrame(all_reports)
 
     if df.empty or 'report_nm' not in df.columns:
         return pd.DataFrame()
+    return select_sales(df)
 
-    return df[
-        df['report_nm'].str.contains('단일판매') &
-        ~df['report_nm'].str.contains('정정|해지')
-    ].reset_index(drop=True)
 
+CONTRACT_KEYS = ['계약금액', '판매ㆍ공급계약', '세부내용', '계약내역']
 
-def parse_contract(session, rcept_no: str) -> dict:
-    resp = session.get(
-        'https://opendart.fss.or.kr/api/document.xml',
-        params={'crtfc_key': API_KEY, 'rcept_no': rcept_no},
-        timeout=10
-    )
-    resp.raise_for_status()
-    try:
-        z = ZipFile(io.BytesIO(resp.content))
-    except BadZipFile:
-        return {}
-    fname = next(f for f in z.namelist() if f.lower().endswith(('.xml', '.html')))
-    html = z.read(fname).decode('utf-8', errors='ignore')
-    soup = BeautifulSoup(html, 'lxml')
-
-    contract_table = None
-    for tbl in soup.find_all('table'):
-        text = tbl.get_text()
-        if any(k in text for k in ['계약금액', '판매ㆍ공급계약', '세부내용', '계약내역']):
-            contract_table = tbl
-            break
-    if contract_table is None:
+
+def parse_contract(session, rcept_no: str, labels: dict = None) -> dict:
+    # labels를 넘기면 표 전체의 라벨→값을 채워 준다 (label_store에 저장용)
+    with download_document(session, rcept_no) as spool:
+        try:
+            with open_member(spool, ('.xml', '.html')) as member:
+                if member is None:
+                    return {}
+                html = find_table(member, lambda text: any(k in text for k in CONTRACT_KEYS))
+        except BadZipFile:
+            return {}
+    if html is None:
         return {}
+    rows = get_backend().table_rows(html)
+    if labels is not None:
+        labels.update(label_map(rows))
 
     def get_val(keys):
-        for tr in contract_table.find_all('tr'):
-            tds = tr.find_all('td')
+        for tds in rows:
             if len(tds) < 2:
                 continue
-            label = re.sub(r'\s+', '', tds[0].get_text() + tds[1].get_text())
+            label = re.sub(r'\s+', '', tds[0].raw + tds[1].raw)
             if any(k.replace('ㆍ', '') in label or k in label for k in keys):
-                return tds[-1].get_text(strip=True).replace(',', '')
+                return tds[-1].text.replace(',', '')
         return None
 
-    def get_int(keys):
-        raw = get_val(keys)
-        if raw in (None, '', '-'):
-            return None
-        return int(raw)
-
     def get_float(keys):
         raw = get_val(keys)
         if raw in (None, '', '-'):
@@ -119,9 +95,11 @@ def parse_contract(session, rcept_no: str) -> dict:
     if raw_start in (None, '', '-'):
         raw_start = get_val(['계약(수주)일자', '계약(수주)일'])
 
+    # 금액은 문서 표기 그대로 두고 SalesRecord를 모을 때 단위를 읽어 억 단위로 바꾼다
+    amount = get_val(['계약금액', '계약금액총액'])
     return {
         '내용':             name or '',
-        '계약 금액(억)':     int(get_int(['계약금액', '계약금액총액']) or 0) / 100_000_000,
+        '계약 금액(억)':     amount if amount not in (None, '', '-') else '0',
         '매출액 대비(%) (A)': float(get_float(['매출액대비', '매출액대비(%)']) or 0),
         '시작일 (s)':        raw_start,
         '종료일 (e)':        get_val(['종료일']),
@@ -132,33 +110,40 @@ def fetch_market_info(session, stock_code: str) -> dict:
     url = f"https://navercomp.wisereport.co.kr/v2/company/c1010001.aspx?cmp_cd={stock_code}&cn="
     res = session.get(url, timeout=10)
     res.raise_for_status()
-    soup = BeautifulSoup(res.text, 'lxml')
+    parser = get_backend()
 
     wics = None
-    for dt in soup.select("td.td0101 dl dt.line-left"):
-        txt = dt.get_text(strip=True)
+    for txt in parser.select_texts(res.text, "td.td0101 dl dt.line-left"):
         if txt.startswith("WICS"):
-            wics = txt.split(":", 1)[1].strip()
+            wics = normalize_sector(txt.split(":", 1)[1])
             break
 
     mktcap = None
-    tbl = soup.find("table", id="cTB11")
-    if tbl:
-        for tr in tbl.find_all("tr"):
-            th = tr.find("th", class_="txt")
-            if th and "시가총액" in th.get_text():
-                raw = tr.find("td", class_="num").get_text(strip=True)
-                num_str = raw.replace("억원", "").replace(",", "")
-                try:
-                    mktcap = int(num_str)
-                except ValueError:
-                    mktcap = None
-                break
+    for cells in parser.table_rows(res.text, "table#cTB11", "th.txt, td.num"):
+        th = next((c for c in cells if c.tag == "th"), None)
+        if th and "시가총액" in th.raw:
+            raw = next((c.text for c in cells if c.tag == "td"), "")
+            num_str = raw.replace("억원", "").replace(",", "")
+            try:
+                mktcap = int(num_str)
+            except ValueError:
+                mktcap = None
+            break
 
     return {'업종 분류': wics, '시가총액(억)': mktcap}
 
-def filter_new_rows(result_df: pd.DataFrame, existing_df: pd.DataFrame) -> pd.DataFrame:
-    if existing_df.empty:
+
+def market_info(session, stock_code: str, sectors: SectorTable = None) -> dict:
+    # 일괄 업종표·시세 스냅샷에 있는 값을 쓰고, 빠진 항목이 있을 때만 회사 페이지를 받는다
+    info = sectors.lookup(stock_code) if sectors is not None else {}
+    if info.get('업종 분류') is None or info.get('시가총액(억)') is None:
+        page = fetch_market_info(session, stock_code)
+        info = {k: v if info.get(k) is None else info[k] for k, v in page.items()}
+    return info
+
+def filter_new_rows(result_df: pd.DataFrame, existing_df: pd.DataFrame,
+                    archived: set = frozenset()) -> pd.DataFrame:
+    if existing_df.empty and not archived:
         return result_df.copy()
     key_cols = ['날짜 (D)', '공시회사', '계약 금액(억)']
     existing_keys = set(
@@ -167,24 +152,44 @@ def filter_new_rows(result_df: pd.DataFrame, existing_df: pd.DataFrame) -> pd.Da
             existing_df['공시회사'],
             existing_df['계약 금액(억)']
         )
+    ) if not existing_df.empty else set()
+    existing_keys |= archived
+    keys = zip(
+        result_df['날짜 (D)'].dt.strftime('%Y%m%d'),
+        result_df['공시회사'],
+        result_df['계약 금액(억)']
     )
-    def is_new(row):
-        return (
-            row['날짜 (D)'].strftime('%Y%m%d'),
-            row['공시회사'],
-            row['계약 금액(억)']
-        ) not in existing_keys
-    return result_df[result_df.apply(is_new, axis=1)]
+    return result_df[[k not in existing_keys for k in keys]]
 
 
-def update_excel(result_df: pd.DataFrame, excel_path: str):
-    if os.path.exists(excel_path):
-        try:
-            wb = load_workbook(excel_path)
-        except BadZipFile:
-            wb = Workbook()
-    else:
-        wb = Workbook()
+UPSERT_COLS = ['내용', '계약 금액(억)', '매출액 대비(%) (A)', '계약상대', '시작일 (s)', '종료일 (e)']
+
+
+def sales_aliases(values) -> list:
+    # (회사, 계약상대)가 모두 있을 때만. 회사만으로 찾으면 다른 계약 행을 정정 내용으로 덮어쓴다
+    company, counterparty = values.get('공시회사'), values.get('계약상대')
+    if not company or not counterparty or not str(counterparty).strip():
+        return []
+    return [alias_key(company, counterparty)]
+
+
+def original_rcept_no(labels: dict, rcept_no: str) -> str | None:
+    # 정정 문서에 원공시 접수번호가 적혀 있으면 그 번호 (라벨에 '접수번호'·'원공시'·'정정대상'이 들어간 칸)
+    for label, value in labels.items():
+        if not any(k in label for k in ('접수번호', '원공시', '정정대상')):
+            continue
+        for no in re.findall(r'(?<!\d)(20\d{12})(?!\d)', str(value or '')):
+            if no != str(rcept_no):
+                return no
+    return None
+
+
+def update_excel(result_df: pd.DataFrame, excel_path: str, commit: WorkbookCommit = None):
+    if commit is None:
+        # 끝나면 저장하고, 일찍 끝나거나 실패해도 엑셀 잠금을 놓는다
+        with WorkbookCommit.open(excel_path) as commit:
+            return update_excel(result_df, excel_path, commit=commit)
+    wb = commit.wb
 
     if 'main' in wb.sheetnames:
         ws = wb['main']
@@ -199,7 +204,39 @@ def update_excel(result_df: pd.DataFrame, excel_path: str):
         existing_df = pd.DataFrame(columns=list(result_df.columns) + ['Cnt'])
         ws.append(list(result_df.columns) + ['Cnt'])
 
-    new_rows = filter_new_rows(result_df, existing_df)
+    header_row = [cell.value for cell in ws[1]]
+    if KEY_COL not in header_row:
+        ws.cell(row=1, column=len(header_row) + 1, value=KEY_COL)
+        header_row.append(KEY_COL)
+    extend_header(ws, header_row, result_df.columns)
+
+    index = commit.sidecar(RecordIndex, 'main')
+    if not len(index) and ws.max_row > 1:
+        index.rebuild(ws, sales_aliases)
+    queue = commit.sidecar(CloseQueue, 'main')
+    search = commit.sidecar(SearchIndex, 'main')
+    stats = commit.sidecar(CompanyStats, 'main')
+    archive = ArchiveIndex.load(excel_path, 'main')
+    idx_company = header_row.index('공시회사') + 1
+
+    upsert_idx, insert_idx, late_idx = [], [], []
+    batch_keys = set()
+    for i, key, company in zip(result_df.index, result_df[KEY_COL], result_df['공시회사']):
+        if key in archive:
+            # 보관 파일로 옮긴 공시는 다시 넣지 않는다
+            continue
+        if key in index and not index.verify(ws, key, idx_company, company):
+            index.rebuild(ws, sales_aliases)
+        if key in index:
+            upsert_idx.append(i)
+        elif pd.notna(key) and key in batch_keys:
+            # 같은 배치로 들어온 원공시의 정정공시: 원공시 행을 넣은 뒤에 덮어쓴다
+            late_idx.append(i)
+        else:
+            insert_idx.append(i)
+            batch_keys.add(key)
+
+    new_rows = filter_new_rows(result_df.loc[insert_idx], existing_df, archive.keys)
 
     if not existing_df.empty:
         existing_df_sorted = existing_df.sort_values(['공시회사', '날짜 (D)'])
@@ -211,8 +248,9 @@ def update_excel(result_df: pd.DataFrame, excel_path: str):
         ))
     else:
         existing_max_cnt = {}
+    # 시트에 남은 행이 없는 회사는 보관된 마지막 Cnt에서 이어 간다
+    existing_max_cnt = {**archive.cnt, **existing_max_cnt}
 
-    header_row = [cell.value for cell in ws[1]]
     numeric_cols = [
         col for col in result_df.columns
         if is_integer_dtype(result_df[col]) or is_float_dtype(result_df[col])
@@ -223,12 +261,45 @@ def update_excel(result_df: pd.DataFrame, excel_path: str):
         if col in header_row
     }
 
+    def apply_fmt(cell, col, value):
+        if col in ['날짜 (D)', '시작일 (s)', '종료일 (e)'] and pd.notna(value):
+            cell.number_format = 'yyyy-mm-dd'
+        elif col in col_idx_map:
+            if is_integer_dtype(result_df[col]):
+                cell.number_format = '#,##0'
+            else:
+                cell.number_format = '#,##0.00'
+        if col not in ['내용', '계약상대']:
+            cell.alignment = Alignment(horizontal='center')
+
+    def upsert(df) -> int:
+        n = 0
+        for row in from_frame(df, SalesRecord):
+            r = index.row_for(row[KEY_COL])
+            if r is None:
+                # 원공시가 시트에 들어가지 않았다 (이미 있는 공시와 같은 행으로 걸러진 경우)
+                continue
+            for idx, col in enumerate(header_row, start=1):
+                if col not in UPSERT_COLS:
+                    continue
+                value = row.get(col)
+                cell = ws.cell(row=r, column=idx)
+                cell.value = None if pd.isna(value) else value
+                apply_fmt(cell, col, value)
+            index.put(row[KEY_COL], r, sales_aliases(row))
+            search.put(row[KEY_COL], row)
+            stats.put(row[KEY_COL], row)
+            n += 1
+        return n
+
+    n_upsert = upsert(result_df.loc[upsert_idx])
+
     next_cnt = {
         company: existing_max_cnt.get(company, 0) + 1
         for company in existing_max_cnt
     }
 
-    for _, row in new_rows.iterrows():
+    for row in from_frame(new_rows, SalesRecord):
         company = row['공시회사']
         if company not in next_cnt:
             next_cnt[company] = 1
@@ -247,43 +318,26 @@ def update_excel(result_df: pd.DataFrame, excel_path: str):
         new_row_idx = ws.max_row
 
         for idx, col in enumerate(header_row, start=1):
-            cell = ws.cell(row=new_row_idx, column=idx)
-            value = row.get(col, '')
+            apply_fmt(ws.cell(row=new_row_idx, column=idx), col, row.get(col, ''))
+        index.put(row[KEY_COL], new_row_idx, sales_aliases(row))
+        search.put(row[KEY_COL], row)
+        stats.put(row[KEY_COL], row)
+        if queue.initialized and pd.isna(row.get('익일종가(원)')):
+            queue.add(new_row_idx, row.get('종목코드'), row.get('날짜 (D)'), row[KEY_COL])
 
-            if col in ['날짜 (D)', '시작일 (s)', '종료일 (e)'] and pd.notna(value):
-                cell.number_format = 'yyyy-mm-dd'
-            elif col in col_idx_map:
-                if is_integer_dtype(result_df[col]):
-                    cell.number_format = '#,##0'
-                else:
-                    cell.number_format = '#,##0.00'
-            if col not in ['내용', '계약상대']:
-                cell.alignment = Alignment(horizontal='center')
-
-    wb.save(excel_path)
+    n_upsert += upsert(result_df.loc[late_idx])
+    return n_upsert, len(new_rows)
 
 
 def fetch_closes(session, stock_code: str, rcept_dt: str):
     target_date = datetime.strptime(rcept_dt, "%Y%m%d").date()
+    if not get_calendar().closes_ready(target_date):
+        # 공시일 장이 아직 끝나지 않았으면 요청하지 않고 익일종가 대기열에 맡긴다
+        return None, None, None
     url = f"https://finance.naver.com/item/sise_day.naver?code={stock_code}&page=1"
     resp = session.get(url, headers=HEADERS, timeout=5)
     resp.raise_for_status()
-    records = []
-    soup = BeautifulSoup(resp.text, "lxml")
-    for tr in soup.select("table.type2 tr"):
-        cols = tr.find_all("td")
-        if len(cols) != 7:
-            continue
-        date_txt = cols[0].get_text(strip=True)
-        close_txt = cols[1].get_text(strip=True).replace(",", "")
-        if not date_txt or not close_txt:
-            continue
-        try:
-            dt = datetime.strptime(date_txt, "%Y.%m.%d").date()
-            cl = int(close_txt)
-        except Exception:
-            continue
-        records.append((dt, cl))
+    records = parse_sise_day(resp.text)
     records.sort(key=lambda x: x[0], reverse=True)
     dates = [dt for dt, _ in records]
     closes = [cl for _, cl in records]
@@ -296,8 +350,19 @@ def fetch_closes(session, stock_code: str, rcept_dt: str):
     next_close = closes[idx - 1] if idx - 1 >= 0 else None
     return prev_close, today_close, next_close
 
-def fill_next_close(session, excel_path: str, sheet_name: str='main'):
-    wb = load_workbook(excel_path)
+def fill_next_close(session, excel_path: str, sheet_name: str='main',
+                    commit: WorkbookCommit = None):
+    if commit is None:
+        # 끝나면 저장하고, 일찍 끝나거나 실패해도 엑셀 잠금을 놓는다
+        with WorkbookCommit.open(excel_path) as commit:
+            return fill_next_close(session, excel_path, sheet_name, commit=commit)
+    queue = commit.sidecar(CloseQueue, sheet_name)
+    if queue.initialized and not queue.due():
+        if len(queue):
+            print(f"익일종가 대기 {len(queue)}건: 다음 거래일 장 마감 후 채웁니다.")
+        return
+
+    wb = commit.wb
     if sheet_name not in wb.sheetnames:
         return
     ws = wb[sheet_name]
@@ -308,92 +373,170 @@ def fill_next_close(session, excel_path: str, sheet_name: str='main'):
     idx_prev  = header.index('전일종가(원)') + 1
     idx_today = header.index('당일종가(원)') + 1
     idx_next  = header.index('익일종가(원)') + 1
+    idx_key   = header.index(KEY_COL) + 1 if KEY_COL in header else None
 
-    center = Alignment(horizontal='center', vertical='center')
-
-    for row in range(2, ws.max_row + 1):
-        if ws.cell(row, idx_next).value is not None:
-            continue
+    if not queue.initialized:
+        queue.seed(ws, idx_code, idx_date, idx_next, idx_key)
 
-        code_cell = ws.cell(row, idx_code).value
-        date_cell = ws.cell(row, idx_date).value
-        if code_cell is None or date_cell is None:
+    center = Alignment(horizontal='center', vertical='center')
+    index = commit.sidecar(RecordIndex, sheet_name)
+
+    stale = False
+    for key, (entry, closes) in queue.resolve(session, HEADERS).items():
+        # 접수번호 → 지금 행 번호. 그 행에 종목코드·공시일이 그대로 있을 때만 쓴다
+        row = queue.row_of(key, entry, index)
+        if row is None or not queue.matches(ws, row, entry, idx_code, idx_date):
+            stale = True
             continue
-
-        if hasattr(date_cell, 'strftime'):
-            rcept_dt = date_cell.strftime('%Y%m%d')
-        else:
-            try:
-                rcept_dt = datetime.strptime(str(date_cell), '%Y%m%d').strftime('%Y%m%d')
-            except ValueError:
-                continue
-
-        prev_c, today_c, next_c = fetch_closes(session, str(code_cell), rcept_dt)
-
-        for idx, val in ((idx_prev, prev_c),
-                         (idx_today, today_c),
-                         (idx_next, next_c)):
+        for idx, val in zip((idx_prev, idx_today, idx_next), closes):
             cell = ws.cell(row, idx)
             cell.value = val
             cell.number_format = '#,##0'
             cell.alignment = center
+    if stale:
+        print("⚠️ 익일종가 대기열이 시트 행과 맞지 않아 시트에서 다시 만듭니다.")
+        queue.seed(ws, idx_code, idx_date, idx_next, idx_key)
 
-    wb.save(excel_path)
-    print("✅ 익일종가 업데이트 완료")
+    print(f"✅ 익일종가 업데이트 완료 (대기 {len(queue)}건)")
 
-def main(target_date: str, excel_path: str):
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/114.0.0.0 Safari/537.36"
-        )
-    })
+MAPPING = {'Y':'KS','K':'KQ'}
 
-    df = fetch_sales(session, target_date)
-    records = []
-    mapping = {'Y':'KS','K':'KQ'}
-    market_infos = {
-        code: fetch_market_info(session, code)
-        for code in df['stock_code'].astype(str).unique()
-    }
 
-    for _, row in df.iterrows():
-        if market_infos.get(str(row['stock_code']),{}).get('업종 분류') == '건설':
-            continue
-        prev_c, today_c, next_c = fetch_closes(
-            session, str(row['stock_code']), row['rcept_dt']
+def parse_filing(session, row: dict, ctx: RunContext) -> SalesRecord | Deferred | None:
+    # 공시 한 건을 시장정보·본문·종가까지 채운 레코드로. 건설업과 보관 파일로 옮긴 공시의 정정공시는 None,
+    # 원공시가 아직 색인에 없는 정정공시는 같은 배치에서 다시 찾도록 Deferred
+    code = str(row['stock_code'])
+    market_infos = ctx.cache('market')
+    if code not in market_infos:
+        sectors = ctx.once('sectors', lambda: load_sectors(session, ctx.target_date))
+        market_infos[code] = market_info(session, code, sectors)
+    market = market_infos[code]
+    if excluded_sector(market.get('업종 분류')):
+        return None
+    labels = {}
+    detail = parse_contract(session, row['rcept_no'], labels)
+    ctx.mark('sales', row['rcept_no'], 'fetched')
+    ctx.once('labels:sales', lambda: LabelStore.load(ctx.excel_path, 'sales')).add(
+        row['rcept_no'], row['rcept_dt'], labels)
+    def record(key, closes=(None, None, None)):
+        prev_c, today_c, next_c = closes
+        return SalesRecord(
+            stock_code   = row['stock_code'],
+            company      = row['corp_name'],
+            date         = row['rcept_dt'],
+            exchange     = MAPPING.get(row['corp_cls'], ''),
+            content      = detail.get('내용',''),
+            amount       = detail.get('계약 금액(억)',0.0),
+            sales_ratio  = detail.get('매출액 대비(%) (A)',0.0),
+            counterparty = detail.get('계약상대',''),
+            start        = detail.get('시작일 (s)'),
+            end          = detail.get('종료일 (e)'),
+            sector       = market.get('업종 분류',''),
+            market_cap   = market.get('시가총액(억)',0),
+            prev_close   = prev_c,
+            today_close  = today_c,
+            next_close   = next_c,
+            rcept_no     = key,
         )
-        records.append({
-            '종목코드':      row['stock_code'],
-            '공시회사':      row['corp_name'],
-            '날짜 (D)':      row['rcept_dt'],
-            '거래소':        mapping.get(row['corp_cls'], ''),
-            '내용':          parse_contract(session, row['rcept_no']).get('내용',''),
-            '계약 금액(억)':  parse_contract(session, row['rcept_no']).get('계약 금액(억)',0.0),
-            '매출액 대비(%) (A)': parse_contract(session, row['rcept_no']).get('매출액 대비(%) (A)',0.0),
-            '계약상대':      parse_contract(session, row['rcept_no']).get('계약상대',''),
-            '시작일 (s)':     parse_contract(session, row['rcept_no']).get('시작일 (s)'),
-            '종료일 (e)':     parse_contract(session, row['rcept_no']).get('종료일 (e)'),
-            '업종 분류':      market_infos[str(row['stock_code'])].get('업종 분류',''),
-            '시가총액(억)':    market_infos[str(row['stock_code'])].get('시가총액(억)',0),
-            '전일종가(원)':   prev_c,
-            '당일종가(원)':   today_c,
-            '익일종가(원)':   next_c
-        })
-
-    if records:
-        df_out = pd.DataFrame(records)
-        df_out['날짜 (D)']   = pd.to_datetime(df_out['날짜 (D)'], format='%Y%m%d', errors='coerce')
-        df_out['시작일 (s)'] = pd.to_datetime(df_out['시작일 (s)'], format='%Y-%m-%d', errors='coerce')
-        df_out['종료일 (e)'] = pd.to_datetime(df_out['종료일 (e)'], format='%Y-%m-%d', errors='coerce')
-        update_excel(df_out, excel_path)
-        print(f"✅ {len(records)}건 공시 업데이트 완료")
+
+    if not row['정정']:
+        return record(row['rcept_no'], fetch_closes(session, code, row['rcept_dt']))
+
+    index = ctx.once('index:main', lambda: RecordIndex.load(ctx.excel_path, 'main'))
+    archive = ctx.once('archive:main', lambda: ArchiveIndex.load(ctx.excel_path, 'main'))
+    # 원공시 접수번호가 문서에 있으면 그것으로, 없으면 (회사, 계약상대)로 찾는다
+    original = original_rcept_no(labels, row['rcept_no'])
+    aliases = sales_aliases({'공시회사': row['corp_name'], '계약상대': detail.get('계약상대')})
+    if original is not None:
+        key = original if original in index else None
+        archived = original if original in archive else None
+    else:
+        key = index.resolve(*aliases)
+        archived = archive.resolve(*aliases) if key is None else None
+    if key is None and archived:
+        print(f"보관 파일({archive.year_of(archived)})로 옮긴 공시의 정정공시는 건너뜁니다: "
+              f"{row['corp_name']} ({row['rcept_no']})")
+        return None
+    if key is not None:
+        return record(key)
+
+    def resolve(batch):
+        # 원공시가 같은 목록으로 들어와 아직 시트·색인에 없을 수 있다. 이번 배치에서 나중 것부터 찾는다
+        for rec in reversed(batch):
+            if original is not None and rec.rcept_no == original:
+                return record(original)
+            if original is None and aliases and sales_aliases(rec) == aliases:
+                return record(rec.rcept_no)
+        print(f"원공시를 찾지 못한 정정공시는 다음 실행에서 다시 찾습니다: {row['corp_name']} ({row['rcept_no']})")
+        return None
+
+    return Deferred(resolve)
+
+
+SALES = register(ReportType(
+    name='sales', label='단일판매', detail_ty='I001', sheet='main', record=SalesRecord,
+    select=select_sales, parse=parse_filing,
+    # 같은 배치의 원공시와 정정공시는 접수번호가 같아도 계약 내용이 달라 둘 다 남긴다
+    write=update_excel, key=(KEY_COL, *UPSERT_COLS), needs=('financials',), fill=fill_next_close,
+))
+
+
+def iter_records(session, target_date: str, excel_path: str, market_cache: dict = None, journal=None):
+    # 공시 하나를 끝까지 처리하는 대로 바로 내보낸다. 한 건의 네이버·DART 요청 실패는 그 건만 건너뛴다
+    caches = {'market': market_cache} if market_cache is not None else None
+    yield from pipeline.iter_records(session, SALES, RunContext(target_date, excel_path, caches, journal))
+
+
+def to_frame(records: list) -> pd.DataFrame:
+    # 날짜는 datetime64, 금액은 float64, 종가·시가총액은 Int64, 거래소·업종은 category로 모은다
+    return records_frame(records, SalesRecord)
+
+
+def collect(session, target_date: str, excel_path: str, market_cache: dict = None,
+            sinks: Sinks = None) -> pd.DataFrame:
+    records = []
+    for rec in iter_records(session, target_date, excel_path, market_cache):
+        records.append(rec)
+        if sinks is not None:
+            sinks.emit(rec)
+    return to_frame(records)
+
+
+def main(target_date: str, excel_path: str, profiler: StageProfiler = None,
+         sink_specs=(), flush_every: int = 0, watchlist: str = None, journal: bool = True):
+    profiler = profiler or StageProfiler()
+    session = make_session()
+    enable_watchlist(session, watchlist)
+    journal = RunJournal.load(excel_path) if journal else None
+    started = time.perf_counter()
+
+    def store(records):
+        df = to_frame(records)
+        enrich(session, [df], target_date)
+        n_upsert, n_insert = update_excel(df, excel_path)
+        if journal is not None:
+            # 엑셀 저장이 끝난 공시까지만 반영 완료로 남긴다 (중간 저장마다 그때까지 내보낸 공시)
+            journal.advance('sales', 'committed')
+        print(f"✅ {n_insert}건 추가, {n_upsert}건 정정 반영 완료")
+
+    sinks = open_sinks(sink_specs)
+    sinks.append(StoreSink(store, flush_every))
+    try:
+        with profiler.stage('collect'):
+            for rec in iter_records(session, target_date, excel_path, journal=journal):
+                sinks.emit(rec)
+    finally:
+        # 수집이 중간에 실패해도 그때까지 처리된 공시는 저장한다
+        with profiler.stage('update_excel'):
+            sinks.close()
+    if sinks.count:
+        print(f"첫 공시 처리까지 {sinks.first_at - started:.1f}s, 총 {sinks.count}건")
     else:
         print("신규 업데이트할 공시가 없습니다.")
 
-    fill_next_close(session, excel_path)
+    with profiler.stage('fill_next_close'):
+        fill_next_close(session, excel_path)
+    print(profiler.report(), end='')
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="DART 단일판매 공시 업데이트")
@@ -409,5 +552,12 @@ if __name__ == '__main__':
         default="국내 주요 공시 정리.xlsx",
         help="업데이트할 엑셀 파일 경로"
     )
+    parser.add_argument("--flush-every", type=int, default=0,
+                        help="N건마다 엑셀에 중간 저장 (기본: 수집이 끝난 뒤 한 번)")
+    add_sink_args(parser)
+    add_watchlist_args(parser)
+    add_profile_args(parser)
+    parser.add_argument("--no-journal", action="store_true", help="실행 저널 없이 목록 전체를 처음부터 처리")
     args = parser.parse_args()
-    main(args.date, args.excel)
\ No newline at end of file
+    main(args.date, args.excel, StageProfiler(args.profile, args.profile_memory),
+         args.sink, args.flush_every, args.watchlist, not args.no_journal)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import re
+import codecs
+import tempfile
+from contextlib import contextmanager
+from zipfile import ZipFile
+
+from lxml import etree
+
+from dart_client import API_KEY, DOCUMENT_URL
+
+CHUNK_SIZE = 256 * 1024
+SPOOL_MAX = 2 * 1024 * 1024
+
+
+def download_document(session, rcept_no: str, timeout: int = 30):
+    # 응답 본문을 메모리에 통째로 올리지 않고 일정 크기 이상은 임시 파일로 넘긴다
+    resp = session.get(
+        DOCUMENT_URL,
+        params={'crtfc_key': API_KEY, 'rcept_no': rcept_no},
+        timeout=timeout,
+        stream=True,
+    )
+    try:
+        resp.raise_for_status()
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            spool.write(chunk)
+    finally:
+        resp.close()
+    spool.seek(0)
+    return spool
+
+
+@contextmanager
+def open_member(fileobj, suffixes=None):
+    # suffixes가 없으면 첫 번째 파일, 있으면 확장자가 맞는 첫 파일. 없으면 None
+    with ZipFile(fileobj) as z:
+        names = z.namelist()
+        if suffixes:
+            names = [n for n in names if n.lower().endswith(suffixes)]
+        if not names:
+            yield None
+            return
+        with z.open(names[0]) as member:
+            yield member
+
+
+def iter_text(member, size: int = CHUNK_SIZE, errors: str = 'replace'):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors=errors)
+    while True:
+        raw = member.read(size)
+        if not raw:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(raw)
+        if text:
+            yield text
+
+
+def capture_between(chunks, start: str, end_re: re.Pattern, limit: int = 4 * 1024 * 1024):
+    # start 문자열부터 end_re 첫 매치 끝까지만 버퍼에 담는다 (없으면 문서 끝 또는 limit까지)
+    keep = len(start)
+    buf = ''
+    found = False
+    for chunk in chunks:
+        buf += chunk
+        if not found:
+            i = buf.find(start)
+            if i < 0:
+                buf = buf[-keep:]
+                continue
+            buf = buf[i:]
+            found = True
+        m = end_re.search(buf, len(start))
+        if m:
+            return buf[:m.end()]
+        if len(buf) > limit:
+            return buf
+    return buf if found else None
+
+
+def find_table(member, predicate):
+    # 조건에 맞는 첫 테이블만 직렬화해 돌려주고, 이미 지나간 요소는 바로 트리에서 떼어 메모리를 일정하게 유지한다
+    # 표가 겹쳐 있으면 BeautifulSoup find_all처럼 바깥 표를 고른다: 안쪽 표가 맞으면 그 텍스트를 품은 바깥 표도 맞으므로
+    # 가장 바깥 표가 끝날 때만 조건을 본다
+    depth = 0
+    for event, el in etree.iterparse(member, events=('start', 'end'), html=True,
+                                     encoding='utf-8', recover=True, huge_tree=True):
+        if el.tag == 'table':
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if not depth and predicate(''.join(el.itertext())):
+                return etree.tostring(el, encoding='unicode', method='html')
+        elif event == 'start':
+            continue
+        if depth:
+            continue
+        el.clear()
+        parent = el.getparent()
+        while parent is not None and el.getprevious() is not None:
+            del parent[0]
+    return None
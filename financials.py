@@ -0,0 +1,195 @@
+import os
+import json
+import argparse
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+from dart_client import API_KEY, make_session
+from record_index import read_json
+from watchlist import load_corp_codes
+
+FS_URL = 'https://opendart.fss.or.kr/api/fnlttMultiAcnt.json'
+FS_CACHE = os.getenv('DART_FS_CACHE', 'financials.json')
+# fnlttMultiAcnt는 corp_code를 쉼표로 이어 한 번에 최대 100개까지 받는다
+BATCH = 100
+# 아직 제출되지 않은 보고서(빈 응답)는 하루 뒤에 다시 확인한다
+RETRY_DAYS = 1
+MAX_PERIODS = 6
+
+# (보고서 코드, 이름, 기간 종료월) — 1분기·반기·3분기·사업보고서
+ANNUAL = '11011'
+REPORTS = [('11013', '1분기', 3), ('11012', '반기', 6), ('11014', '3분기', 9), (ANNUAL, '사업보고서', 12)]
+REPORT_NAMES = {code: name for code, name, _ in REPORTS}
+ACCOUNTS = {'매출액': 'revenue', '자본총계': 'equity'}
+ENRICH_COLS = ['최근매출액(억)', '자기자본(억)', '재무기준']
+
+
+def recent_periods(as_of: str, limit: int = MAX_PERIODS) -> list:
+    # 기준일 전에 끝난 보고 기간을 최근 것부터 (year, reprt_code)로
+    d = datetime.strptime(as_of, '%Y%m%d').date()
+    periods = []
+    for year in range(d.year, d.year - 3, -1):
+        for code, _, month in reversed(REPORTS):
+            if date(year, month, 1) < d.replace(day=1) and len(periods) < limit:
+                periods.append((year, code))
+    return periods
+
+
+def to_amount(raw) -> int | None:
+    s = str(raw or '').replace(',', '').strip()
+    if s in ('', '-'):
+        return None
+    try:
+        return int(float(s))
+    except ValueError:
+        return None
+
+
+def fetch_multi(session, corp_codes: list, year: int, reprt_code: str) -> dict:
+    # corp_code → {'revenue', 'equity', 'fs_div'}. 연결(CFS) 값이 있으면 연결, 없으면 별도(OFS)
+    found = {}
+    for i in range(0, len(corp_codes), BATCH):
+        resp = session.get(FS_URL, params={
+            'crtfc_key': API_KEY,
+            'corp_code': ','.join(corp_codes[i:i + BATCH]),
+            'bsns_year': str(year),
+            'reprt_code': reprt_code,
+        }, timeout=20)
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get('status') not in ('000', '013'):
+            raise RuntimeError(f"{data.get('status')} {data.get('message')}")
+        by_fs = {}
+        for item in data.get('list', []):
+            field = ACCOUNTS.get(item.get('account_nm'))
+            amount = to_amount(item.get('thstrm_amount'))
+            if field is None or amount is None:
+                continue
+            by_fs.setdefault(item['corp_code'], {}).setdefault(item.get('fs_div'), {})[field] = amount
+        for corp, divs in by_fs.items():
+            fs_div = 'CFS' if 'CFS' in divs else next(iter(divs))
+            found[corp] = {**divs[fs_div], 'fs_div': fs_div}
+    return found
+
+
+class Financials:
+    # (corp_code, 사업연도, 보고서) 단위 캐시. 값이 없는 항목도 조회일과 함께 남겨 하루에 한 번만 다시 묻는다
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.entries = data
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = FS_CACHE) -> 'Financials':
+        return cls(path, read_json(path))
+
+    @staticmethod
+    def key(corp_code: str, year: int, reprt_code: str) -> str:
+        return f'{corp_code}:{year}:{reprt_code}'
+
+    def fresh(self, entry: dict | None, today: str) -> bool:
+        if entry is None:
+            return False
+        if entry.get('revenue') is not None or entry.get('equity') is not None:
+            return True
+        fetched = datetime.strptime(entry['fetched'], '%Y%m%d')
+        return (datetime.strptime(today, '%Y%m%d') - fetched).days < RETRY_DAYS
+
+    def fill(self, session, corp_codes: list, year: int, reprt_code: str) -> int:
+        today = datetime.now().strftime('%Y%m%d')
+        todo = sorted(c for c in corp_codes if not self.fresh(self.entries.get(self.key(c, year, reprt_code)), today))
+        if not todo:
+            return 0
+        found = fetch_multi(session, todo, year, reprt_code)
+        with self._lock:
+            for c in todo:
+                self.entries[self.key(c, year, reprt_code)] = {**found.get(c, {}), 'fetched': today}
+            self.dirty = True
+        return len(todo)
+
+    def lookup(self, session, corp_codes, as_of: str) -> dict:
+        # 자기자본은 가장 최근 보고서, 매출액은 1년치인 최근 사업보고서에서 가져온다
+        result = {c: {} for c in set(corp_codes) if c}
+        for year, code in recent_periods(as_of):
+            want = [c for c, r in result.items()
+                    if 'equity' not in r or (code == ANNUAL and 'revenue' not in r)]
+            if not want:
+                break
+            self.fill(session, want, year, code)
+            for c in want:
+                entry = self.entries.get(self.key(c, year, code)) or {}
+                r = result[c]
+                if 'equity' not in r and entry.get('equity') is not None:
+                    r['equity'] = entry['equity']
+                    r['basis'] = f"{year} {REPORT_NAMES[code]}"
+                if code == ANNUAL and 'revenue' not in r and entry.get('revenue') is not None:
+                    r['revenue'] = entry['revenue']
+        return result
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+def corp_codes_for(session, df: pd.DataFrame) -> pd.Series:
+    # 합병 목록처럼 corp_code가 있으면 그대로, 없으면 종목코드를 corpCode.xml 매핑으로 바꾼다
+    if 'corp_code' in df.columns:
+        return df['corp_code']
+    table = load_corp_codes(session)
+    return df['종목코드'].map(lambda c: table.get(str(c).split('.')[0].zfill(6)) if pd.notna(c) else None)
+
+
+def enrich(session, frames: list, as_of: str, path: str = FS_CACHE) -> int:
+    # 여러 파이프라인의 행을 모아 회사 목록을 한 번에 조회하고, 각 DataFrame에 ENRICH_COLS를 붙인다
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return 0
+    try:
+        codes = [corp_codes_for(session, df) for df in frames]
+        fin = Financials.load(path)
+        try:
+            found = fin.lookup(session, pd.concat(codes).dropna().unique(), as_of)
+        finally:
+            fin.save()
+    except Exception as e:
+        print(f"⚠️ 재무 정보 조회 실패, 매출액·자기자본 없이 진행합니다: {e}")
+        return 0
+    for df, corp in zip(frames, codes):
+        info = corp.map(lambda c: found.get(c, {}))
+        df['최근매출액(억)'] = info.map(lambda r: r['revenue'] / 100_000_000 if 'revenue' in r else None).astype(float)
+        df['자기자본(억)'] = info.map(lambda r: r['equity'] / 100_000_000 if 'equity' in r else None).astype(float)
+        df['재무기준'] = info.map(lambda r: r.get('basis', ''))
+    return sum(1 for r in found.values() if r)
+
+
+def extend_header(ws, header: list, columns) -> list:
+    # 보강 컬럼이 시트에 없으면 맨 뒤에 추가한다 (기존 열 위치는 그대로)
+    for col in ENRICH_COLS:
+        if col in columns and col not in header:
+            ws.cell(row=1, column=len(header) + 1, value=col)
+            header.append(col)
+    return header
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="다중회사 주요계정으로 최근 매출액·자기자본 조회")
+    parser.add_argument("codes", nargs='+', help="종목코드(6자리) 또는 corp_code(8자리)")
+    parser.add_argument("--as-of", type=str, default=datetime.now().strftime('%Y%m%d'),
+                        help="기준일(YYYYMMDD), 기본값은 오늘")
+    args = parser.parse_args()
+
+    session = make_session()
+    df = pd.DataFrame({'종목코드': [c for c in args.codes if len(c) != 8]})
+    frames = [df, pd.DataFrame({'corp_code': [c for c in args.codes if len(c) == 8]})]
+    n = enrich(session, frames, args.as_of)
+    print(f"✅ {n}개 회사 재무 정보 확인")
+    print(pd.concat([f for f in frames if not f.empty]).to_string(index=False))
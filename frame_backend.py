@@ -0,0 +1,226 @@
+import os
+import random
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_BACKEND = 'pandas'
+# list.json 한 건의 필드. 원본 dict의 나머지 키는 버린다
+LIST_FIELDS = ['corp_code', 'corp_name', 'stock_code', 'corp_cls', 'report_nm', 'rcept_no', 'flr_nm', 'rcept_dt', 'rm']
+
+
+def arrow_schema(columns: list):
+    # records.py의 dtype → Arrow 타입. 파티션마다 같은 스키마로 쓰려고 값에서 추론하지 않는다
+    types = {'datetime64[ns]': pa.timestamp('ns'), 'Int64': pa.int64(), 'float64': pa.float64(),
+             'category': pa.dictionary(pa.int32(), pa.string()), 'string': pa.string()}
+    return pa.schema([(col, types[dtype]) for col, dtype in columns])
+
+
+def _atomic(write, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class PandasFrames:
+    # 기본 경로: 지금까지의 스크립트와 같은 object dtype DataFrame
+    name = 'pandas'
+
+    def reports(self, reports: list) -> pd.DataFrame:
+        df = pd.DataFrame(reports, columns=LIST_FIELDS)
+        df['rcept_dt'] = pd.to_datetime(df['rcept_dt'], format='%Y%m%d', errors='coerce')
+        return df
+
+    def from_pandas(self, df: pd.DataFrame, schema=None) -> pd.DataFrame:
+        return df
+
+    def concat(self, frames: list) -> pd.DataFrame:
+        frames = [f for f in frames if len(f)]
+        return pd.concat(frames, ignore_index=True) if frames else self.reports([])
+
+    def select(self, df: pd.DataFrame, include: str, exclude: str = None) -> pd.DataFrame:
+        mask = df['report_nm'].str.contains(include, na=False)
+        if exclude:
+            mask &= ~df['report_nm'].str.contains(exclude, na=False)
+        return df[mask].reset_index(drop=True)
+
+    def dedup(self, df: pd.DataFrame, keys: list) -> pd.DataFrame:
+        return df.drop_duplicates(subset=keys, keep='first').reset_index(drop=True)
+
+    def summarize(self, df: pd.DataFrame, by: str, date_col: str, amount_col: str = None) -> pd.DataFrame:
+        # by별 건수·마지막 날짜(·금액 합계), 건수 많은 순
+        agg = {'n': (date_col, 'size'), 'last': (date_col, 'max')}
+        if amount_col:
+            agg['amount'] = (amount_col, lambda s: s.sum(min_count=1))
+        out = df.groupby(by, as_index=False, dropna=False).agg(**agg)
+        return out.sort_values(['n', by], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+    def partitions(self, df: pd.DataFrame, date_col: str):
+        months = df[date_col].dt.strftime('%Y-%m')
+        for ym, part in df.groupby(months, sort=True):
+            yield ym, part.reset_index(drop=True)
+
+    def write_parquet(self, df: pd.DataFrame, path: str, schema=None):
+        _atomic(lambda tmp: df.to_parquet(tmp, index=False, schema=schema), path)
+
+    def read_parquet(self, path: str) -> pd.DataFrame:
+        return pd.read_parquet(path)
+
+    def to_pandas(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df
+
+
+class ArrowFrames:
+    # pyarrow Table 경로: 연산은 Arrow 스레드 풀에서 돌고, 단계 사이에는 Table을 그대로 넘긴다(concat·filter·take는 복사 최소)
+    name = 'arrow'
+
+    def __init__(self):
+        self.schema = pa.schema([(f, pa.string()) for f in LIST_FIELDS])
+
+    def reports(self, reports: list):
+        t = pa.Table.from_pylist(reports, schema=self.schema)
+        dt = pc.strptime(t['rcept_dt'], format='%Y%m%d', unit='s', error_is_null=True)
+        return t.set_column(t.schema.get_field_index('rcept_dt'), 'rcept_dt', dt.cast(pa.timestamp('ns')))
+
+    def from_pandas(self, df: pd.DataFrame, schema=None):
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    def concat(self, frames: list):
+        frames = [f for f in frames if f.num_rows]
+        return pa.concat_tables(frames) if frames else self.reports([])
+
+    def select(self, t, include: str, exclude: str = None):
+        mask = pc.fill_null(pc.match_substring_regex(t['report_nm'], include), False)
+        if exclude:
+            mask = pc.and_(mask, pc.invert(pc.fill_null(pc.match_substring_regex(t['report_nm'], exclude), True)))
+        return t.filter(mask)
+
+    def dedup(self, t, keys: list):
+        # 키별 첫 행 번호만 남겨 원래 순서대로 take
+        t = t.append_column('__row', pa.array(range(t.num_rows), pa.int64()))
+        first = t.group_by(keys, use_threads=False).aggregate([('__row', 'min')])['__row_min']
+        return t.take(pc.take(first, pc.sort_indices(first))).drop_columns(['__row'])
+
+    def summarize(self, t, by: str, date_col: str, amount_col: str = None):
+        aggs = [([], 'count_all'), (date_col, 'max')]
+        if amount_col:
+            aggs.append((amount_col, 'sum'))
+        out = t.group_by(by).aggregate(aggs)
+        names = {'count_all': 'n', f'{date_col}_max': 'last', f'{amount_col}_sum': 'amount'}
+        out = out.rename_columns([names.get(c, c) for c in out.column_names])
+        out = out.select([by, 'n', 'last'] + (['amount'] if amount_col else []))
+        return out.sort_by([('n', 'descending'), (by, 'ascending')])
+
+    def partitions(self, t, date_col: str):
+        months = pc.strftime(t[date_col], format='%Y-%m')
+        for ym in sorted(pc.unique(months).drop_null().to_pylist()):
+            yield ym, t.filter(pc.equal(months, ym))
+
+    def write_parquet(self, t, path: str, schema=None):
+        _atomic(lambda tmp: pq.write_table(t if schema is None else t.cast(schema), tmp), path)
+
+    def read_parquet(self, path: str):
+        return pq.read_table(path)
+
+    def to_pandas(self, t) -> pd.DataFrame:
+        # ArrowDtype로 넘기면 문자열·날짜 버퍼를 복사하지 않는다
+        return t.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+BACKENDS = {'pandas': PandasFrames, 'arrow': ArrowFrames}
+_instances = {}
+
+
+def available_backends() -> list:
+    return [name for name in BACKENDS if name != 'arrow' or pa is not None]
+
+
+def get_frames(name: str = None):
+    # DART_FRAME_BACKEND 환경변수로 고른다. 일일 실행은 기본값(pandas) 그대로
+    name = name or os.getenv('DART_FRAME_BACKEND', DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"unknown frame backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name not in available_backends():
+        raise ImportError(f"'{name}' 백엔드를 쓰려면 pyarrow가 필요합니다")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def rows(frames, frame) -> list:
+    # 백엔드와 무관하게 비교할 수 있는 값: 결측은 None, 날짜는 date
+    df = frames.to_pandas(frame)
+    out = []
+    for values in df.astype(object).itertuples(index=False, name=None):
+        out.append(tuple(None if v is None or (not isinstance(v, str) and pd.isna(v))
+                         else v.date() if hasattr(v, 'date') and callable(v.date) else v
+                         for v in values))
+    return out
+
+
+def synthetic_reports(n: int = 5000, seed: int = 0) -> list:
+    # list.json과 같은 모양: 정정·해지·중복 접수번호·빈 필드가 섞여 있다
+    rng = random.Random(seed)
+    names = ['단일판매ㆍ공급계약체결', '[기재정정]단일판매ㆍ공급계약체결', '단일판매ㆍ공급계약해지',
+             '신규시설투자등', '신규시설투자등(자회사의 주요경영사항)', '증권신고서(합병)', '주요사항보고서(유상증자결정)']
+    out = []
+    for i in range(n):
+        no = rng.randrange(n * 3 // 4)
+        out.append({
+            'corp_code': f'{no % 300:08d}', 'corp_name': f'회사{no % 300:03d}',
+            'stock_code': f'{no % 300:06d}' if no % 7 else '', 'corp_cls': rng.choice('YKNE'),
+            'report_nm': rng.choice(names), 'rcept_no': f'2024{no:010d}', 'flr_nm': f'회사{no % 300:03d}',
+            'rcept_dt': f'2024{1 + no % 12:02d}{1 + no % 28:02d}', 'rm': rng.choice(['', '유', '코', None]),
+            'extra': 'x',
+        })
+    return out
+
+
+def check(reports: list = None, include: str = '단일판매', exclude: str = '해지') -> list:
+    # pandas 경로와 Arrow 경로가 같은 결과를 내는지 (목록 적재, 필터, 중복 제거, 집계, Parquet 왕복)
+    import tempfile
+    reports = synthetic_reports() if reports is None else reports
+    outputs = {}
+    for name in available_backends():
+        f = get_frames(name)
+        t = f.dedup(f.concat([f.reports(reports[:len(reports) // 2]), f.reports(reports[len(reports) // 2:])]),
+                    ['rcept_no'])
+        sales = f.select(t, include, exclude)
+        with tempfile.TemporaryDirectory() as tmp:
+            parts = {}
+            for ym, part in f.partitions(sales, 'rcept_dt'):
+                path = os.path.join(tmp, f'ym={ym}', 'part-0.parquet')
+                f.write_parquet(part, path)
+                parts[ym] = rows(f, f.read_parquet(path))
+        outputs[name] = {
+            'reports': rows(f, t),
+            'select': rows(f, sales),
+            'summary': rows(f, f.summarize(t, 'corp_name', 'rcept_dt')),
+            'parquet': parts,
+        }
+    failures = []
+    base = outputs.get('pandas')
+    for name, out in outputs.items():
+        for stage, value in out.items():
+            if value != base[stage]:
+                failures.append((name, stage))
+    return failures
+
+
+if __name__ == '__main__':
+    if 'arrow' not in available_backends():
+        print("⚠️ pyarrow가 없어 Arrow 경로를 비교할 수 없습니다.")
+        raise SystemExit(1)
+    failures = check()
+    for name, stage in failures:
+        print(f"⚠️ {name} 백엔드 {stage} 결과가 pandas와 다릅니다")
+    if failures:
+        raise SystemExit(1)
+    print(f"✅ pandas·Arrow 결과 일치 ({', '.join(available_backends())})")
@@ -0,0 +1,161 @@
+import os
+import re
+import warnings
+import threading
+
+from lxml import etree
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+# 공시 원문은 XML 선언이 붙은 HTML이라 HTML 파서로 읽는 것이 의도된 동작이다
+warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+
+DEFAULT_BACKEND = 'lxml'
+_COMPOUND = re.compile(r'([a-zA-Z][a-zA-Z0-9]*)?((?:[.#][\w-]+)*)$')
+
+
+class Cell:
+    # raw: get_text() 그대로, text: 텍스트 조각마다 strip 후 이어붙인 값 (BS4 get_text(strip=True)와 동일)
+    __slots__ = ('tag', 'raw', 'text')
+
+    def __init__(self, tag: str, raw: str, text: str):
+        self.tag = tag
+        self.raw = raw
+        self.text = text
+
+    def __repr__(self):
+        return f"Cell({self.tag!r}, {self.text!r})"
+
+
+def css_to_xpath(selector: str) -> str:
+    # 이 저장소에서 쓰는 단순 선택자(태그, .class, #id, 자손 결합, 쉼표)만 지원한다
+    groups = []
+    for group in selector.split(','):
+        steps = []
+        for compound in group.split():
+            m = _COMPOUND.match(compound)
+            if not m:
+                raise ValueError(f"unsupported selector: {compound}")
+            step = m.group(1).lower() if m.group(1) else '*'
+            for part in re.findall(r'[.#][\w-]+', m.group(2)):
+                if part[0] == '.':
+                    step += f"[contains(concat(' ', normalize-space(@class), ' '), ' {part[1:]} ')]"
+                else:
+                    step += f"[@id='{part[1:]}']"
+            steps.append(step)
+        groups.append('.//' + '//'.join(steps))
+    return ' | '.join(groups)
+
+
+class Bs4Backend:
+    name = 'bs4'
+
+    def __init__(self, features: str = 'lxml'):
+        self.features = features
+
+    def _cell(self, el) -> Cell:
+        return Cell(el.name, el.get_text(), el.get_text(strip=True))
+
+    def table_rows(self, html: str, table_css: str = 'table', cell_css: str = 'td',
+                   all_tables: bool = False) -> list:
+        soup = BeautifulSoup(html, self.features)
+        tables = soup.select(table_css)
+        if not all_tables:
+            tables = tables[:1]
+        return [[self._cell(c) for c in tr.select(cell_css)]
+                for tbl in tables for tr in tbl.find_all('tr')]
+
+    def select_texts(self, html: str, css: str) -> list:
+        return [el.get_text(strip=True) for el in BeautifulSoup(html, self.features).select(css)]
+
+    def text(self, html: str) -> str:
+        return BeautifulSoup(html, self.features).get_text(strip=True)
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        # 컴파일한 XPath는 스레드마다 따로 둔다 (daily_update가 파이프라인을 스레드로 돌린다)
+        self._local = threading.local()
+
+    def _xpath(self, css: str):
+        cache = self._local.__dict__.setdefault('xpaths', {})
+        xp = cache.get(css)
+        if xp is None:
+            xp = cache[css] = etree.XPath(css_to_xpath(css))
+        return xp
+
+    @staticmethod
+    def _root(html: str):
+        # 공시 원문은 XML 선언을 달고 오기 때문에 바이트로 넘긴다. 파서는 스레드 간에 공유하지 않는다
+        parser = etree.HTMLParser(encoding='utf-8', huge_tree=True)
+        root = etree.fromstring(html.encode('utf-8'), parser)
+        return root if root is not None else etree.fromstring(b'<html></html>', parser)
+
+    @staticmethod
+    def _cell(el) -> Cell:
+        parts = list(el.itertext())
+        return Cell(el.tag, ''.join(parts), ''.join(p.strip() for p in parts))
+
+    def table_rows(self, html: str, table_css: str = 'table', cell_css: str = 'td',
+                   all_tables: bool = False) -> list:
+        tables = self._xpath(table_css)(self._root(html))
+        if not all_tables:
+            tables = tables[:1]
+        cells = self._xpath(cell_css)
+        return [[self._cell(c) for c in cells(tr)]
+                for tbl in tables for tr in tbl.iter('tr')]
+
+    def select_texts(self, html: str, css: str) -> list:
+        return [self._cell(el).text for el in self._xpath(css)(self._root(html))]
+
+    def text(self, html: str) -> str:
+        return self._cell(self._root(html)).text
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    @staticmethod
+    def _cell(node) -> Cell:
+        return Cell(node.tag, node.text(deep=True), node.text(deep=True, strip=True))
+
+    def table_rows(self, html: str, table_css: str = 'table', cell_css: str = 'td',
+                   all_tables: bool = False) -> list:
+        tables = HTMLParser(html).css(table_css)
+        if not all_tables:
+            tables = tables[:1]
+        return [[self._cell(c) for c in tr.css(cell_css)]
+                for tbl in tables for tr in tbl.css('tr')]
+
+    def select_texts(self, html: str, css: str) -> list:
+        return [self._cell(n).text for n in HTMLParser(html).css(css)]
+
+    def text(self, html: str) -> str:
+        body = HTMLParser(html).body
+        return self._cell(body).text if body is not None else ''
+
+
+BACKENDS = {'bs4': Bs4Backend, 'lxml': LxmlBackend, 'selectolax': SelectolaxBackend}
+_instances = {}
+
+
+def available_backends() -> list:
+    return [name for name in BACKENDS if name != 'selectolax' or HTMLParser is not None]
+
+
+def get_backend(name: str = None):
+    # DART_HTML_BACKEND 환경변수로 고를 수 있다. selectolax가 설치돼 있지 않으면 BS4로 대체한다
+    name = name or os.getenv('DART_HTML_BACKEND') or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"unknown html backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name not in available_backends():
+        name = 'bs4'
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from zipfile import ZipFile, ZIP_DEFLATED
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+
+SECRET_PARAMS = {'crtfc_key'}
+SKIP_HEADERS = {'set-cookie', 'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+def request_key(method: str, url: str, params=None) -> str:
+    # API 키는 기록하지 않고, 쿼리 순서와 무관하게 같은 요청은 같은 키가 되도록 정규화한다
+    prepared = requests.Request(method.upper(), url, params=params).prepare()
+    parts = urlsplit(prepared.url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k not in SECRET_PARAMS)
+    return f"{method.upper()} " + urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class HttpArchive:
+    # entries.json + 본문(sha1로 중복 제거)을 하나의 zip에 담는다
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.bodies = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> 'HttpArchive':
+        archive = cls(path)
+        with ZipFile(path) as z:
+            archive.entries = json.loads(z.read('entries.json').decode('utf-8'))
+            for name in z.namelist():
+                if name.startswith('bodies/'):
+                    archive.bodies[name[len('bodies/'):]] = z.read(name)
+        return archive
+
+    def add(self, key: str, resp: requests.Response, elapsed: float):
+        body = resp.content or b''
+        digest = hashlib.sha1(body).hexdigest()
+        entry = {
+            'status': resp.status_code,
+            'reason': resp.reason,
+            'url': key.split(' ', 1)[1],
+            'encoding': resp.encoding,
+            'headers': {k: v for k, v in resp.headers.items() if k.lower() not in SKIP_HEADERS},
+            'elapsed': round(elapsed, 4),
+            'body': digest,
+        }
+        with self._lock:
+            self.bodies[digest] = body
+            self.entries.setdefault(key, []).append(entry)
+
+    def save(self):
+        with self._lock:
+            tmp = self.path + '.tmp'
+            with ZipFile(tmp, 'w', compression=ZIP_DEFLATED) as z:
+                z.writestr('entries.json', json.dumps(self.entries, ensure_ascii=False))
+                for digest, body in self.bodies.items():
+                    z.writestr(f'bodies/{digest}', body)
+            os.replace(tmp, self.path)
+
+
+class RecordingSession(requests.Session):
+    def __init__(self, archive_path: str):
+        super().__init__()
+        self.archive = HttpArchive(archive_path)
+        self._saved = False
+        atexit.register(self.close)
+
+    def request(self, method, url, params=None, **kwargs):
+        started = time.perf_counter()
+        resp = super().request(method, url, params=params, **kwargs)
+        self.archive.add(request_key(method, url, params), resp, time.perf_counter() - started)
+        return resp
+
+    def close(self):
+        if not self._saved:
+            self._saved = True
+            self.archive.save()
+        super().close()
+
+
+class ReplaySession(requests.Session):
+    # 네트워크 없이 기록된 응답을 돌려준다. 같은 요청이 여러 번 기록됐으면 순서대로, 이후에는 마지막 응답을 준다
+    def __init__(self, archive_path: str, latency: bool = False, latency_scale: float = 1.0):
+        super().__init__()
+        self.archive = HttpArchive.load(archive_path)
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self._served = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, **kwargs):
+        key = request_key(method, url, params)
+        recorded = self.archive.entries.get(key)
+        if not recorded:
+            raise requests.ConnectionError(f"replay archive has no response for {key}")
+        with self._lock:
+            i = self._served.get(key, 0)
+            self._served[key] = i + 1
+        entry = recorded[min(i, len(recorded) - 1)]
+        if self.latency:
+            time.sleep(entry['elapsed'] * self.latency_scale)
+
+        resp = requests.Response()
+        resp.status_code = entry['status']
+        resp.reason = entry['reason']
+        resp.url = entry['url']
+        resp.encoding = entry['encoding']
+        resp.headers.update(entry['headers'])
+        resp._content = self.archive.bodies[entry['body']]
+        resp._content_consumed = True
+        resp.request = requests.Request(method.upper(), url, params=params).prepare()
+        return resp
@@ -2,73 +2,62 @@
 
 import argparse
 import os
-import io
 import re
 from datetime import date, datetime
-from zipfile import ZipFile, BadZipFile
+from zipfile import BadZipFile
 
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup, element
-from dotenv import load_dotenv
-from tqdm import tqdm
-from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Alignment, Font
 from pandas.api.types import is_integer_dtype, is_float_dtype
+from close_queue import CloseQueue, parse_sise_day
+from trading_calendar import get_calendar
+from dart_client import fetch_list, make_session
+from doc_stream import download_document, open_member, find_table
+from workbook_commit import WorkbookCommit
+from profiling import StageProfiler, add_profile_args
+from html_backend import get_backend
+from watchlist import add_watchlist_args, enable as enable_watchlist
+from financials import enrich, extend_header
+from archive import ArchiveIndex
+from records import InvestRecord, from_frame, from_values
+import pipeline
+from pipeline import ReportType, RunContext, register
+from label_store import LabelStore, label_map
+from run_journal import RunJournal
 
-load_dotenv()
-API_KEY = os.getenv("DART_API_KEY")
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+
+def select_investments(df: pd.DataFrame) -> pd.DataFrame:
+    mask = df['report_nm'].str.contains('신규시설', na=False)
+    mask &= ~df['report_nm'].str.contains('자회사|철회', na=False)
+    return df[mask].reset_index(drop=True)
 
 def fetch_sales(session, bgn_de: str, end_de: str) -> pd.DataFrame:
-    url = 'https://opendart.fss.or.kr/api/list.json'
-    params = {
-        'crtfc_key': API_KEY,
-        'bgn_de': bgn_de,
-        'end_de': end_de,
-        'pblntf_detail_ty': 'I001',
-        'page_count': 100,
-        'last_reprt_at': 'Y',
-    }
-    all_reports = []
-    resp = session.get(url, params={**params, 'page_no': 1}, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-    total_page = int(data.get('total_page', 1))
-    all_reports.extend(data.get('list', []))
-    for page in range(2, total_page + 1):
-        resp = session.get(url, params={**params, 'page_no': page}, timeout=10)
-        resp.raise_for_status()
-        rpt = resp.json().get('list', [])
-        if not rpt:
-            break
-        all_reports.extend(rpt)
+    all_reports = fetch_list(session, bgn_de, end_de, 'I001')
     df = pd.DataFrame(all_reports)
     if df.empty or 'report_nm' not in df:
         return pd.DataFrame()
-    mask = df['report_nm'].str.contains('신규시설', na=False)
-    mask &= ~df['report_nm'].str.contains('자회사|철회', na=False)
-    return df[mask].reset_index(drop=True)
+    return select_investments(df)
 
-def parse_investment_with_helpers(html) -> dict:
-    table = html if isinstance(html, element.Tag) else \
-            BeautifulSoup(html, 'html.parser').find(id="XFormD1_Form0_Table0")
-    if table is None:
+def parse_investment_with_helpers(html: str, table_css: str = '#XFormD1_Form0_Table0',
+                                  labels: dict = None) -> dict:
+    rows = get_backend().table_rows(html, table_css)
+    if not rows:
         return {}
+    if labels is not None:
+        labels.update(label_map(rows))
     def get_val(keys):
-        for tr in table.find_all('tr'):
-            tds = tr.find_all('td')
+        for tds in rows:
             if len(tds) < 2:
                 continue
-            label = re.sub(r'\s+', '', tds[0].get_text() + (tds[1].get_text() if len(tds)>2 else ''))
-            val   = tds[-1].get_text(strip=True)
+            label = re.sub(r'\s+', '', tds[0].raw + (tds[1].raw if len(tds)>2 else ''))
+            val   = tds[-1].text
             for k in sorted(keys, key=len, reverse=True):
                 if k.replace('ㆍ','') in label or k in label:
                     return val
         return None
-    def get_int(keys):
-        v = get_val(keys)
-        return None if not v or v=='-' else int(v.replace(',',''))
     def get_float(keys):
         v = get_val(keys)
         return None if not v or v=='-' else float(v.replace(',',''))
@@ -79,49 +68,40 @@ def parse_investment_with_helpers(html) -> dict:
         except:
             return None
 
-    amt   = get_int(['투자금액(원)','투자금액'])
-    equity= get_int(['자기자본(원)','자기자본'])
+    # 금액은 문서 표기 그대로 두고 InvestRecord를 모을 때 백만원 단위로 바꾼다
     return {
         '투자구분':    get_val(['투자대상']) or get_val(['투자구분']),
-        '투자금액(백만원)': amt/1_000_000 if amt else None,
-        '자기자본(백만원)': equity/1_000_000 if equity else None,
+        '투자금액(백만원)': get_val(['투자금액(원)','투자금액']),
+        '자기자본(백만원)': get_val(['자기자본(원)','자기자본']),
         '자기자본대비(%)': get_float(['자기자본대비(%)']),
         '결정일':      get_date(['이사회결의일(결정일)','결정일']),
         '시작일':      get_date(['시작일']),
         '종료일':      get_date(['종료일']),
     }
 
-def parse_contract(session, rcept_no: str) -> dict:
-    resp = session.get(
-        'https://opendart.fss.or.kr/api/document.xml',
-        params={'crtfc_key': API_KEY, 'rcept_no': rcept_no},
-        timeout=10
-    )
-    resp.raise_for_status()
-    try:
-        z = ZipFile(io.BytesIO(resp.content))
-    except BadZipFile:
+def parse_contract(session, rcept_no: str, labels: dict = None) -> dict:
+    with download_document(session, rcept_no) as spool:
+        try:
+            with open_member(spool, ('.xml','.html')) as member:
+                if member is None:
+                    return {}
+                html = find_table(member, lambda text: '투자구분' in text)
+        except BadZipFile:
+            return {}
+    if html is None:
         return {}
-    fname = next(f for f in z.namelist() if f.lower().endswith(('.xml','.html')))
-    html  = z.read(fname).decode('utf-8', 'ignore')
-    soup  = BeautifulSoup(html, 'lxml')
-    for tbl in soup.find_all('table'):
-        if '투자구분' in tbl.get_text():
-            return parse_investment_with_helpers(tbl)
-    return {}
+    return parse_investment_with_helpers(html, 'table', labels)
 
 def fetch_history(code: str, page: int = 1) -> pd.DataFrame:
     url = f"https://finance.naver.com/item/sise_day.naver?code={code}&page={page}"
     resp = requests.get(url, headers=HEADERS)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, 'html.parser')
     recs = []
-    for row in soup.select("table.type2 tr"):
-        cols = row.find_all('td')
+    for cols in get_backend().table_rows(resp.text, "table.type2", all_tables=True):
         if len(cols) < 7:
             continue
-        d = cols[0].get_text(strip=True)
-        c = cols[1].get_text(strip=True).replace(',', '')
+        d = cols[0].text
+        c = cols[1].text.replace(',', '')
         if not d or not c:
             continue
         try:
@@ -134,27 +114,14 @@ def fetch_history(code: str, page: int = 1) -> pd.DataFrame:
 
 def fetch_closes(session, stock_code: str, rcept_dt: str):
     target_date = datetime.strptime(rcept_dt, "%Y%m%d").date()
+    if not get_calendar().closes_ready(target_date):
+        # 공시일 장이 아직 끝나지 않았으면 요청하지 않고 익일종가 대기열에 맡긴다
+        return {'전일종가': None, '당일종가': None, '익일종가': None}
     url = f"https://finance.naver.com/item/sise_day.naver?code={stock_code}&page=1"
     resp = session.get(url, headers=HEADERS, timeout=5)
     resp.raise_for_status()
 
-    records = []
-    soup = BeautifulSoup(resp.text, "lxml")
-    for tr in soup.select("table.type2 tr"):
-        cols = tr.find_all("td")
-        if len(cols) != 7:
-            continue
-        date_txt = cols[0].get_text(strip=True)
-        close_txt = cols[1].get_text(strip=True).replace(",", "")
-        if not date_txt or not close_txt:
-            continue
-        try:
-            dt = datetime.strptime(date_txt, "%Y.%m.%d").date()
-            cl = int(close_txt)
-            records.append((dt, cl))
-        except:
-            continue
-
+    records = parse_sise_day(resp.text)
     records.sort(key=lambda x: x[0], reverse=True)
     dates  = [dt for dt, _ in records]
     closes = [cl for _, cl in records]
@@ -173,37 +140,34 @@ def fetch_closes(session, stock_code: str, rcept_dt: str):
         '익일종가': next_close
     }
 
-def update_excel(result_df: pd.DataFrame, excel_path: str, sheet_name: str='신규투자'):
-    if os.path.exists(excel_path):
-        try:
-            wb = load_workbook(excel_path)
-        except BadZipFile:
-            wb = Workbook()
-    else:
-        wb = Workbook()
+def update_excel(result_df: pd.DataFrame, excel_path: str, sheet_name: str='신규투자',
+                 commit: WorkbookCommit = None):
+    if commit is None:
+        # 끝나면 저장하고, 일찍 끝나거나 실패해도 엑셀 잠금을 놓는다
+        with WorkbookCommit.open(excel_path) as commit:
+            return update_excel(result_df, excel_path, sheet_name, commit=commit)
+    wb = commit.wb
 
     if sheet_name in wb.sheetnames:
         ws = wb[sheet_name]
         existing = pd.read_excel(
             excel_path, sheet_name=sheet_name,
-            parse_dates=['공시일','시작일','종료일'],
-            usecols=list(result_df.columns)
+            parse_dates=['공시일'],
+            usecols=['공시회사','공시일']
         )
     else:
         ws = wb.create_sheet(sheet_name)
         ws.append(list(result_df.columns))
         existing = pd.DataFrame(columns=result_df.columns)
 
-    header = [c.value for c in ws[1]]
+    header = extend_header(ws, [c.value for c in ws[1]], result_df.columns)
     if existing.empty:
         new_rows = result_df
     else:
-        mask = ~result_df.apply(
-            lambda r: ((existing['공시회사']==r['공시회사']) &
-                       (existing['공시일']==r['공시일'])).any(),
-            axis=1
-        )
-        new_rows = result_df[mask]
+        existing_keys = set(zip(existing['공시회사'], existing['공시일']))
+        existing_keys |= {(c, pd.Timestamp(d)) for c, d, _ in ArchiveIndex.load(excel_path, sheet_name).keys if d}
+        new_rows = result_df[[k not in existing_keys
+                              for k in zip(result_df['공시회사'], result_df['공시일'])]]
 
     num_cols  = [c for c in result_df.columns
                  if is_integer_dtype(result_df[c]) or is_float_dtype(result_df[c])]
@@ -211,54 +175,68 @@ def update_excel(result_df: pd.DataFrame, excel_path: str, sheet_name: str='신
     align     = Alignment('center','center')
     font      = Font(size=10)
 
-    for _, r in new_rows.iterrows():
+    queue = commit.sidecar(CloseQueue, sheet_name)
+    for r in from_frame(new_rows, InvestRecord):
         ws.append([r.get(col,'') for col in header])
         row = ws.max_row
+        if queue.initialized and pd.isna(r.get('익일종가')):
+            queue.add(row, r.get('종목코드'), r.get('공시일'))
         for col, idx in col_index.items():
             cell = ws.cell(row=row, column=idx)
             cell.alignment = align
             cell.font = font
-            if col in ['공시일','시작일','종료일'] and pd.notna(r[col]):
+            if col in ['공시일','결정일','시작일','종료일'] and pd.notna(r.get(col)):
                 cell.number_format = 'yyyy-mm-dd'
-            elif col == '자기자본대비(%)' and pd.notna(r[col]):
+            elif col == '자기자본대비(%)' and pd.notna(r.get(col)):
                 cell.number_format = '#,##0.00'
             elif col in num_cols:
                 cell.number_format = '#,##0'
 
-    wb.save(excel_path)
 
 def filter_new_rows(result_df: pd.DataFrame, excel_path: str,
                     sheet_name: str='신규투자') -> pd.DataFrame:
     if not os.path.exists(excel_path):
         return result_df.copy()
 
-    existing = pd.read_excel(
-        excel_path,
-        sheet_name=sheet_name,
-        usecols=['공시회사','공시일','투자구분'],
-    )
+    with pd.ExcelFile(excel_path) as xls:
+        if sheet_name not in xls.sheet_names:
+            return result_df.copy()
+        existing = pd.read_excel(
+            xls,
+            sheet_name=sheet_name,
+            usecols=['공시회사','공시일','투자구분'],
+        )
     existing['공시일'] = pd.to_datetime(existing['공시일'], errors='coerce').dt.date
     existing['공시회사'] = existing['공시회사'].astype(str).str.strip()
-    existing['투자구분'] = existing['투자구분'].astype(str).str.strip()
+    existing['투자구분'] = existing['투자구분'].fillna('').astype(str).str.strip()
 
     existing_keys = set(zip(
         existing['공시회사'],
         existing['공시일'],
         existing['투자구분']
     ))
+    existing_keys |= {(c, datetime.strptime(d, '%Y%m%d').date(), g)
+                      for c, d, g in ArchiveIndex.load(excel_path, sheet_name).keys if d}
+    keys = zip(
+        result_df['공시회사'].str.strip(),
+        result_df['공시일'].dt.date,
+        result_df['투자구분'].fillna('').str.strip()
+    )
+    return result_df[[k not in existing_keys for k in keys]].copy()
+
+def fill_next_close(session, excel_path: str, sheet_name: str='신규투자',
+                    commit: WorkbookCommit = None):
+    if commit is None:
+        # 끝나면 저장하고, 일찍 끝나거나 실패해도 엑셀 잠금을 놓는다
+        with WorkbookCommit.open(excel_path) as commit:
+            return fill_next_close(session, excel_path, sheet_name, commit=commit)
+    queue = commit.sidecar(CloseQueue, sheet_name)
+    if queue.initialized and not queue.due():
+        if len(queue):
+            print(f"익일종가 대기 {len(queue)}건: 다음 거래일 장 마감 후 채웁니다.")
+        return
 
-    def is_new(row):
-        key = (
-            row['공시회사'].strip() if isinstance(row['공시회사'], str) else row['공시회사'],
-            row['공시일'],
-            row['투자구분'].strip() if isinstance(row['투자구분'], str) else row['투자구분']
-        )
-        return key not in existing_keys
-
-    return result_df[result_df.apply(is_new, axis=1)].copy()
-
-def fill_next_close(session, excel_path: str, sheet_name: str='신규투자'):
-    wb = load_workbook(excel_path)
+    wb = commit.wb
     if sheet_name not in wb.sheetnames:
         return
     ws = wb[sheet_name]
@@ -270,36 +248,68 @@ def fill_next_close(session, excel_path: str, sheet_name: str='신규투자'):
     idx_today = header.index('당일종가')   + 1
     idx_next  = header.index('익일종가')   + 1
 
-    for row in range(2, ws.max_row + 1):
-        if ws.cell(row, idx_next).value is not None:
-            continue
-
-        code = ws.cell(row, idx_code).value
-        rcept_cell = ws.cell(row, idx_rcept).value
+    if not queue.initialized:
+        queue.seed(ws, idx_code, idx_rcept, idx_next)
 
-        if rcept_cell is None:
+    stale = False
+    for key, (entry, closes) in queue.resolve(session, HEADERS).items():
+        # 신규투자 시트는 접수번호 컬럼이 없어 행 번호로 넣었으니, 그 행에 종목코드·공시일이 그대로 있을 때만 쓴다
+        row = queue.row_of(key, entry)
+        if row is None or not queue.matches(ws, row, entry, idx_code, idx_rcept):
+            stale = True
             continue
-
-        if hasattr(rcept_cell, 'strftime'):
-            rcept_dt = rcept_cell.strftime('%Y%m%d')
-        else:
-            try:
-                rcept_dt = datetime.strptime(str(rcept_cell), '%Y-%m-%d').strftime('%Y%m%d')
-            except ValueError:
-                continue
-
-        closes = fetch_closes(session, code, rcept_dt)
-
-        for idx, key in ((idx_prev, '전일종가'),
-                         (idx_today, '당일종가'),
-                         (idx_next, '익일종가')):
+        for idx, val in zip((idx_prev, idx_today, idx_next), closes):
             cell = ws.cell(row, idx)
-            cell.value = closes[key]
+            cell.value = val
             cell.number_format = '#,##0'
             cell.alignment = Alignment(horizontal='center', vertical='center')
+    if stale:
+        print("⚠️ 익일종가 대기열이 시트 행과 맞지 않아 시트에서 다시 만듭니다.")
+        queue.seed(ws, idx_code, idx_rcept, idx_next)
 
     print('✅ 익일 종가 업데이트 완료')
-    wb.save(excel_path)
+
+
+def parse_filing(session, row: dict, ctx: RunContext) -> InvestRecord:
+    labels = {}
+    d = parse_contract(session, str(row["rcept_no"]), labels) or {}
+    ctx.mark('invest', row["rcept_no"], 'fetched')
+    ctx.once('labels:invest', lambda: LabelStore.load(ctx.excel_path, 'invest')).add(
+        row["rcept_no"], row["rcept_dt"], labels)
+    d.update({
+        "공시회사": row["corp_name"],
+        "공시일":   ctx.target_date,
+        "종목코드": row["stock_code"]
+    })
+    d.update(fetch_closes(session, row["stock_code"], ctx.target_date))
+    return from_values(InvestRecord, d)
+
+
+def write(result_df: pd.DataFrame, excel_path: str, commit: WorkbookCommit = None):
+    # 투자구분까지 같은 공시는 빼고 저장한다
+    new_df = filter_new_rows(result_df, excel_path)
+    if not new_df.empty:
+        update_excel(new_df, excel_path, commit=commit)
+
+
+INVEST = register(ReportType(
+    name='invest', label='신규시설 투자', detail_ty='I001', sheet='신규투자', record=InvestRecord,
+    select=select_investments, parse=parse_filing, write=write,
+    key=('공시회사', '공시일', '투자구분'), needs=('financials',), fill=fill_next_close,
+))
+
+
+def collect(session, target: str, excel_path: str = EXCEL_PATH, journal=None) -> pd.DataFrame:
+    final_df = pipeline.collect(session, INVEST, RunContext(target, excel_path, journal=journal))
+    if final_df.empty:
+        return final_df
+    final_df = final_df.sort_values("공시일")
+
+    new_df = filter_new_rows(final_df, excel_path)
+    if new_df is None or new_df.empty:
+        print("업데이트할 공시가 없습니다.")
+        return pd.DataFrame()
+    return new_df
 
 
 def main():
@@ -312,40 +322,30 @@ def main():
         default=date.today().strftime("%Y%m%d"),
         help="조회 기준일자 (YYYYMMDD). 기본: 오늘"
     )
+    add_watchlist_args(parser)
+    add_profile_args(parser)
+    parser.add_argument("--no-journal", action="store_true", help="실행 저널 없이 목록 전체를 처음부터 처리")
     args = parser.parse_args()
     target = args.date
-
-    sess = requests.Session()
-    sales = fetch_sales(sess, bgn_de=target, end_de=target)
-
-    fill_next_close(sess, '국내 주요 공시 정리.xlsx')
-    if sales.empty:
-        print("오늘 신규시설 투자 공시가 없습니다.")
-        return 
-    
-    parsed = []
-    for rec in tqdm(sales.to_dict("records")):
-        d = parse_contract(sess, str(rec["rcept_no"])) or {}
-        d.update({
-            "공시회사": rec["corp_name"],
-            "공시일":   datetime.strptime(target, "%Y%m%d").date(),
-            "종목코드": rec["stock_code"]
-        })
-        d.update(fetch_closes(sess, rec["stock_code"], target))
-        parsed.append(d)
-
-    final_df = pd.DataFrame(parsed, columns=[
-        "공시회사","공시일","종목코드","투자구분","투자금액(백만원)",
-        "자기자본(백만원)","자기자본대비(%)","결정일","시작일","종료일",
-        "전일종가","당일종가","익일종가"
-    ]).sort_values("공시일")
-
-    new_df = filter_new_rows(final_df, '국내 주요 공시 정리.xlsx')
-
-    if new_df is None or new_df.empty:
-        print("업데이트할 공시가 없습니다.")
-
-    update_excel(new_df, "국내 주요 공시 정리.xlsx")
+    profiler = StageProfiler(args.profile, args.profile_memory)
+    journal = None if args.no_journal else RunJournal.load(EXCEL_PATH)
+
+    sess = make_session()
+    enable_watchlist(sess, args.watchlist)
+    with profiler.stage('fill_next_close'):
+        fill_next_close(sess, EXCEL_PATH)
+
+    with profiler.stage('collect'):
+        new_df = collect(sess, target, EXCEL_PATH, journal)
+    if not new_df.empty:
+        with profiler.stage('enrich'):
+            enrich(sess, [new_df], target)
+        with profiler.stage('update_excel'):
+            update_excel(new_df, EXCEL_PATH)
+    if journal is not None:
+        # 이미 시트에 있던 공시(filter_new_rows로 빠진 것)도 함께 반영 완료
+        journal.advance('invest', 'committed')
+    print(profiler.report(), end='')
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
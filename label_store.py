@@ -0,0 +1,176 @@
+import os
+import re
+import argparse
+import threading
+
+import pandas as pd
+
+from amounts import normalize
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+PART = 'part-0.parquet'
+
+
+def store_dir(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.labels'
+
+
+def label_map(rows) -> dict:
+    # 공시 본문 표의 모든 행을 {라벨: 값}으로. 라벨은 마지막 칸을 뺀 칸들을 공백 없이 이어 붙인 것
+    # ("계약기간" + "시작일" → "계약기간시작일"). 같은 라벨이 또 나오면 "라벨#2"로 남긴다
+    out = {}
+    for tds in rows:
+        if len(tds) < 2:
+            continue
+        label = re.sub(r'\s+', '', ''.join(td.raw for td in tds[:-1]))
+        if not label:
+            continue
+        key, n = label, 1
+        while key in out:
+            n += 1
+            key = f'{label}#{n}'
+        out[key] = tds[-1].text
+    return out
+
+
+def matches(label: str, keys) -> bool:
+    # 파서의 get_val과 같은 규칙: 'ㆍ'를 뺀 키나 키 그대로가 라벨에 들어 있으면 일치
+    return any(k.replace('ㆍ', '') in label or k in label for k in keys)
+
+
+class LabelStore:
+    # 공시유형별 원문 라벨→값 저장소. 접수월별 Parquet 한 파일에 (접수번호, 순서, 라벨, 값) 긴 형식으로 쌓는다
+    def __init__(self, root: str, kind: str):
+        self.root = root
+        self.kind = kind
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, excel_path: str, kind: str) -> 'LabelStore':
+        return cls(store_dir(excel_path), kind)
+
+    def add(self, rcept_no: str, rcept_dt: str, labels: dict):
+        if not labels:
+            return
+        with self._lock:
+            self.pending[str(rcept_no)] = (str(rcept_dt), dict(labels))
+
+    def part_path(self, ym: str) -> str:
+        return os.path.join(self.root, self.kind, f'ym={ym}', PART)
+
+    def months(self) -> list:
+        kind_dir = os.path.join(self.root, self.kind)
+        if not os.path.isdir(kind_dir):
+            return []
+        return sorted(d[3:] for d in os.listdir(kind_dir)
+                      if d.startswith('ym=') and os.path.exists(self.part_path(d[3:])))
+
+    def save(self) -> int:
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        by_month = {}
+        for rcept_no, (rcept_dt, labels) in pending.items():
+            ym = f'{rcept_dt[:4]}-{rcept_dt[4:6]}'
+            part = by_month.setdefault(ym, {'rcept_no': [], 'rcept_dt': [], 'seq': [], 'label': [], 'value': []})
+            for seq, (label, value) in enumerate(labels.items()):
+                part['rcept_no'].append(rcept_no)
+                part['rcept_dt'].append(rcept_dt)
+                part['seq'].append(seq)
+                part['label'].append(label)
+                part['value'].append(value)
+        for ym, cols in by_month.items():
+            new = pd.DataFrame(cols)
+            path = self.part_path(ym)
+            if os.path.exists(path):
+                # 같은 접수번호를 다시 받았으면 (재실행·정정) 새 값으로 바꾼다
+                old = pd.read_parquet(path)
+                old = old[~old['rcept_no'].isin(set(new['rcept_no']))]
+                new = pd.concat([old.astype({'label': 'string'}), new], ignore_index=True)
+            new = new.sort_values(['rcept_no', 'seq']).reset_index(drop=True)
+            new = new.astype({'rcept_no': 'string', 'rcept_dt': 'string', 'seq': 'int16',
+                              'label': 'category', 'value': 'string'})
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + '.tmp'
+            new.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        return len(pending)
+
+    def frame(self, since: str = None, until: str = None) -> pd.DataFrame:
+        # since/until은 YYYYMMDD. 월 파티션으로 먼저 거르고 남은 날짜는 행 단위로 거른다
+        months = [ym for ym in self.months()
+                  if (since is None or ym.replace('-', '') >= since[:6])
+                  and (until is None or ym.replace('-', '') <= until[:6])]
+        if not months:
+            return pd.DataFrame({'rcept_no': pd.Series(dtype='string'), 'rcept_dt': pd.Series(dtype='string'),
+                                 'seq': pd.Series(dtype='int16'), 'label': pd.Series(dtype='category'),
+                                 'value': pd.Series(dtype='string')})
+        df = pd.concat([pd.read_parquet(self.part_path(ym)) for ym in months], ignore_index=True)
+        df['label'] = df['label'].astype('string').astype('category')
+        if since:
+            df = df[df['rcept_dt'] >= since]
+        if until:
+            df = df[df['rcept_dt'] <= until]
+        return df.reset_index(drop=True)
+
+    def derive(self, fields: dict, since: str = None, until: str = None, amounts: dict = None) -> pd.DataFrame:
+        # fields: {새 컬럼: [라벨 키, ...]} → 접수번호별 한 행. 키에 맞는 첫 라벨(표 순서)의 값을 쓴다
+        # amounts: {새 컬럼: 기본 단위} — 금액 컬럼은 원 단위 정수로 바꾼다
+        df = self.frame(since, until)
+        out = df.drop_duplicates('rcept_no')[['rcept_no', 'rcept_dt']].set_index('rcept_no')
+        labels = df['label'].cat.categories
+        for name, keys in fields.items():
+            # 라벨 종류는 수백 개라 일치 판정은 종류마다 한 번만 한다
+            hit = {label for label in labels if matches(label, keys)}
+            picked = df[df['label'].isin(hit)].drop_duplicates('rcept_no').set_index('rcept_no')['value']
+            out[name] = picked.reindex(out.index)
+            if amounts and name in amounts:
+                out[name] = normalize(out[name], amounts[name]).set_axis(out.index)
+        return out.reset_index()
+
+
+def parse_field(spec: str) -> tuple:
+    name, _, keys = spec.partition('=')
+    return name, [k for k in (keys or name).split(',') if k]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="저장해 둔 공시 원문 라벨로 새 컬럼을 다시 계산 (네트워크·HTML 파싱 없음)")
+    parser.add_argument("cmd", choices=['labels', 'derive'], help="labels: 라벨별 등장 횟수, derive: 컬럼 추출")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로 (저장소는 <엑셀 이름>.labels)")
+    parser.add_argument("--kind", type=str, default='sales', help="공시유형 (sales, invest)")
+    parser.add_argument("--field", action="append", default=[],
+                        help="컬럼=라벨키1,라벨키2 (예: 최근매출액=최근매출액). 여러 번 지정 가능")
+    parser.add_argument("--amount", action="append", default=[],
+                        help="원 단위 정수로 바꿀 컬럼 (컬럼 또는 컬럼=기본단위)")
+    parser.add_argument("--since", type=str, default=None, help="YYYYMMDD")
+    parser.add_argument("--until", type=str, default=None, help="YYYYMMDD")
+    parser.add_argument("--top", type=int, default=50, help="labels: 출력할 라벨 수")
+    parser.add_argument("--csv", type=str, default=None, help="derive: CSV로 저장할 경로")
+    args = parser.parse_args()
+
+    store = LabelStore.load(args.excel, args.kind)
+    if args.cmd == 'labels':
+        df = store.frame(args.since, args.until)
+        if df.empty:
+            print("저장된 라벨이 없습니다.")
+        counts = df['label'].astype('string').value_counts().head(args.top)
+        for label, n in counts.items():
+            print(f"{n:>7}  {label}")
+    else:
+        if not args.field:
+            parser.error("--field를 하나 이상 지정하세요")
+        fields = dict(parse_field(f) for f in args.field)
+        amounts = {}
+        for spec in args.amount:
+            name, _, unit = spec.partition('=')
+            amounts[name] = unit or '원'
+        out = store.derive(fields, args.since, args.until, amounts)
+        if args.csv:
+            out.to_csv(args.csv, index=False, encoding='utf-8-sig')
+            print(f"✅ {len(out)}건 → {args.csv}")
+        else:
+            print(out.to_string(index=False))
@@ -1,55 +1,107 @@
 import re
-import io
-import zipfile
-import requests
 import pandas as pd
 from datetime import datetime
-from bs4 import BeautifulSoup
-from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Font
-from dotenv import load_dotenv 
-import os
+from record_index import RecordIndex, KEY_COL, alias_key
+from dart_client import make_session
+from doc_stream import download_document, open_member, iter_text, capture_between
+from workbook_commit import WorkbookCommit
+from search_index import SearchIndex
+from profiling import StageProfiler, add_profile_args
+from html_backend import get_backend
+from watchlist import add_watchlist_args, enable as enable_watchlist
+from financials import ENRICH_COLS, enrich, extend_header
+from archive import ArchiveIndex
+from records import MergerRecord, from_frame, from_values
+import pipeline
+from pipeline import ReportType, RunContext, register
+from run_journal import RunJournal
 
-load_dotenv()
-API_KEY = os.getenv("DART_API_KEY")
 EXCEL_PATH = '국내 주요 공시 정리.xlsx'
 SHEET_NAME = '합병'
 
-def clean_number(val: str) -> int | None:
-    if not isinstance(val, str):
-        return None
-    s = re.sub(r'\(.*?\)', '', val)
-    digits = re.sub(r'[^\d]', '', s)
-    return int(digits) if digits else None
+OVERVIEW_MARKER = "(1) 합병 당사회사의 개요"
+BIZ_MARKER = "1. 사업의 개요"
+STATUS_MARKER = "나. 회사의 현황"
+TABLE_END = re.compile(r'</table\s*>', re.I)
+BIZ_EVENTS = re.compile(
+    r'(?P<start>' + re.escape(BIZ_MARKER) + r')'
+    r'|(?P<status>' + re.escape(STATUS_MARKER) + r')'
+    r'|(?P<end>1\. 합병의 개요|2\. 주요 제품 및 서비스)'
+)
+P_ELEMENT = re.compile(r'<p\b[^>]*>.*?</p\s*>', re.I | re.S)
+P_OPEN = re.compile(r'<p\b', re.I)
+P_CLOSE = re.compile(r'</p\s*>', re.I)
 
 
-def parse_amount(val: str) -> int | None:
-    if not isinstance(val, str):
-        return None
-    s = re.sub(r'\(.*?\)', '', val)
-    digits = re.sub(r'[^\d]', '', s)
-    if not digits:
-        return None
-    base = int(digits)
-    if '백만' in s or '백' in s:
-        return base * 1_000_000
-    return base
-
-def parse_merger_overview(rcept_no: str, corp_name: str) -> dict | None:
-    url  = 'https://opendart.fss.or.kr/api/document.xml'
-    resp = requests.get(url, params={'crtfc_key': API_KEY, 'rcept_no': rcept_no})
-    resp.raise_for_status()
-    with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-        with z.open(z.namelist()[0]) as f:
-            xml = f.read().decode('utf-8', errors='replace')
-
-    part = xml.split("(1) 합병 당사회사의 개요", 1)
-    if len(part) < 2:
+def extract_business_overviews(chunks, limit: int = 2) -> list:
+    # "1. 사업의 개요" 블록마다 "나. 회사의 현황" 뒤(없으면 종료 표식 앞)의 첫 문단을 찾는다.
+    # 문서를 통째로 들고 있지 않도록 표식과 <p> 요소만 순서대로 훑으며 버퍼를 앞에서부터 버린다
+    keep = max(len(BIZ_MARKER), len(STATUS_MARKER), len("2. 주요 제품 및 서비스"))
+    combined = []
+    block = None
+
+    def finish(b):
+        if b is not None:
+            combined.append((b['status_para'] if b['status_seen'] else b['head_para']) or "")
+
+    def handle(events):
+        nonlocal block
+        for _, kind, value in sorted(events, key=lambda e: e[0]):
+            if kind == 'start':
+                finish(block)
+                block = {'head_para': None, 'head_closed': False,
+                         'status_seen': False, 'status_para': None}
+            elif block is None:
+                continue
+            elif kind == 'status':
+                block['status_seen'] = True
+            elif kind == 'end':
+                block['head_closed'] = True
+            elif kind == 'p':
+                need_head = not block['head_closed'] and block['head_para'] is None
+                need_status = block['status_seen'] and block['status_para'] is None
+                if not (need_head or need_status):
+                    continue
+                text = get_backend().text(value)
+                if not text:
+                    continue
+                if need_head:
+                    block['head_para'] = text
+                if need_status:
+                    block['status_para'] = text
+
+    def scan(buf, cut):
+        events = [(m.start(), m.lastgroup, None) for m in BIZ_EVENTS.finditer(buf) if m.start() < cut]
+        events += [(m.start(), 'p', m.group()) for m in P_ELEMENT.finditer(buf) if m.start() < cut]
+        return events
+
+    buf = ''
+    for chunk in chunks:
+        buf += chunk
+        cut = len(buf) - keep
+        last_open = None
+        for m in P_OPEN.finditer(buf):
+            last_open = m.start()
+        if last_open is not None and P_CLOSE.search(buf, last_open) is None:
+            cut = min(cut, last_open)
+        if cut <= 0:
+            continue
+        handle(scan(buf, cut))
+        buf = buf[cut:]
+        if len(combined) >= limit:
+            return combined[:limit]
+    handle(scan(buf, len(buf)))
+    finish(block)
+    return combined[:limit]
+
+
+def parse_merger_document(fileobj, corp_name: str) -> dict | None:
+    with open_member(fileobj) as member:
+        block = capture_between(iter_text(member), OVERVIEW_MARKER, TABLE_END)
+    if block is None:
         return None
-    block = "(1) 합병 당사회사의 개요" + part[1]
-    soup  = BeautifulSoup(block, 'html.parser')
-    table = soup.find('table')
-    rows  = table.find_all('tr') if table else []
+    rows = get_backend().table_rows(block)
 
     merger_data = {}
     mapping    = {
@@ -60,7 +112,7 @@ def parse_merger_overview(rcept_no: str, corp_name: str) -> dict | None:
         r'발행주식.*수': 'shares'
     }
     for tr in rows:
-        texts = [td.get_text(strip=True) for td in tr.find_all('td')]
+        texts = [td.text for td in tr]
         if len(texts) != 3:
             continue
         for pat, field in mapping.items():
@@ -68,91 +120,71 @@ def parse_merger_overview(rcept_no: str, corp_name: str) -> dict | None:
                 merger_data[field] = {'합병법인': texts[1], '피합병법인': texts[2]}
                 break
 
-    starts = [m.start() for m in re.finditer(re.escape("1. 사업의 개요"), xml)]
-    blocks = [
-        xml[starts[i]: (starts[i+1] if i+1 < len(starts) else len(xml))]
-        for i in range(len(starts))
-    ]
-    end_marker = re.compile(r"(?:1\. 합병의 개요|2\. 주요 제품 및 서비스)")
-    combined = []
-    for blk in blocks:
-        if "나. 회사의 현황" in blk:
-            sub   = blk.split("나. 회사의 현황", 1)[1]
-            soup2 = BeautifulSoup(sub, 'html.parser')
-            para  = next((p.get_text(strip=True) for p in soup2.find_all('p') if p.get_text(strip=True)), "")
-        else:
-            m     = end_marker.search(blk)
-            cut   = blk[:m.start()] if m else blk
-            soup2 = BeautifulSoup(cut, 'html.parser')
-            para  = next((p.get_text(strip=True) for p in soup2.find_all('p') if p.get_text(strip=True)), "")
-        combined.append(para)
+    fileobj.seek(0)
+    with open_member(fileobj) as member:
+        combined = extract_business_overviews(iter_text(member))
 
     biz_merge  = combined[0] if combined else ""
     biz_target = combined[1] if len(combined)>1 else ""
 
+    # 금액·주식수는 표기 그대로 두고 MergerRecord를 모을 때 한꺼번에 원·주 단위로 바꾼다
     def G(d,f,r): return d.get(f,{}).get(r)
-    def N(d,f,r): return parse_amount(G(d,f,r))
 
     return {
         '공시회사': corp_name,
         '합병법인':     G(merger_data,'corp_name','합병법인'),
         '피합병법인':   G(merger_data,'corp_name','피합병법인'),
-        '납입자본금(합병)':   N(merger_data,'capital','합병법인'),
-        '납입자본금(피합병)': N(merger_data,'capital','피합병법인'),
-        '자산총액(합병)':     N(merger_data,'assets','합병법인'),
-        '자산총액(피합병)':   N(merger_data,'assets','피합병법인'),
+        '납입자본금(합병)':   G(merger_data,'capital','합병법인'),
+        '납입자본금(피합병)': G(merger_data,'capital','피합병법인'),
+        '자산총액(합병)':     G(merger_data,'assets','합병법인'),
+        '자산총액(피합병)':   G(merger_data,'assets','피합병법인'),
         '합병법인 상장':      G(merger_data,'listing','합병법인'),
         '피합병법인 상장':    G(merger_data,'listing','피합병법인'),
-        '발행주식수(합병)':   clean_number(G(merger_data,'shares','합병법인')),
-        '발행주식수(피합병)': clean_number(G(merger_data,'shares','피합병법인')),
+        '발행주식수(합병)':   G(merger_data,'shares','합병법인'),
+        '발행주식수(피합병)': G(merger_data,'shares','피합병법인'),
         '사업개요(합병)':     biz_merge,
         '사업개요(피합병)':   biz_target
     }
 
-def get_merger_reports_for_date(date_str: str) -> pd.DataFrame:
-    url    = 'https://opendart.fss.or.kr/api/list.json'
-    params = {
-        'crtfc_key':       API_KEY,
-        'pblntf_detail_ty':'C004',
-        'bgn_de':          date_str,
-        'end_de':          date_str,
-        'last_reprt_at':   'Y',
-        'page_no':         1,
-        'page_count':      100
-    }
-    resp = requests.get(url, params=params)
-    data = resp.json().get('list', [])
-    df   = pd.DataFrame(data)
-    df   = df[df['report_nm'].str.contains(r"증권신고서\(합병", na=False)]
-
-    recs = []
-    for _,row in df.iterrows():
-        mv = parse_merger_overview(row['rcept_no'], row['corp_name'])
-        if mv:
-            mv['최종보고일'] = row['rcept_dt']
-            recs.append(mv)
-
-    out = pd.DataFrame(recs)
-
-    if out.empty:
-        return out
-    
-    out['사업개요'] = out.apply(
-        lambda x: x['사업개요(피합병)'] if re.search(r"인수목적|스팩|SPAC", x['합병법인']) else x['사업개요(합병)'],
-        axis=1
-    )
-    out = out.drop(columns=['사업개요(합병)','사업개요(피합병)'])
-
-    cols = ['공시회사','합병법인','피합병법인','최종보고일',
-            '납입자본금(합병)','납입자본금(피합병)',
-            '자산총액(합병)','자산총액(피합병)',
-            '합병법인 상장','피합병법인 상장',
-            '발행주식수(합병)','발행주식수(피합병)',
-            '사업개요']
-    return out[cols]
-
-def update_excel(df_all: pd.DataFrame):
-    wb = load_workbook(EXCEL_PATH)
+
+def parse_merger_overview(rcept_no: str, corp_name: str, session=None) -> dict | None:
+    with download_document(session or make_session(), rcept_no) as spool:
+        return parse_merger_document(spool, corp_name)
+
+def select_mergers(df: pd.DataFrame) -> pd.DataFrame:
+    return df[df['report_nm'].str.contains(r"증권신고서\(합병", na=False)].reset_index(drop=True)
+
+
+def parse_filing(session, row: dict, ctx: RunContext = None) -> MergerRecord | None:
+    mv = parse_merger_overview(row['rcept_no'], row['corp_name'], session)
+    if ctx is not None:
+        ctx.mark('merger', row['rcept_no'], 'fetched')
+    if not mv:
+        return None
+    mv['최종보고일'] = row['rcept_dt']
+    mv[KEY_COL] = row['rcept_no']
+    mv['corp_code'] = row['corp_code']
+    # 스팩 합병은 피합병법인의 사업개요가 실제 사업이다
+    spac = re.search(r"인수목적|스팩|SPAC", mv['합병법인'] or '')
+    mv['사업개요'] = mv['사업개요(피합병)'] if spac else mv['사업개요(합병)']
+    return from_values(MergerRecord, mv)
+
+
+def get_merger_reports_for_date(date_str: str, session=None, journal=None) -> pd.DataFrame:
+    session = session or make_session()
+    return pipeline.collect(session, MERGER, RunContext(date_str, EXCEL_PATH, journal=journal))
+
+def merger_aliases(values) -> list:
+    return [alias_key(values.get('합병법인'), values.get('피합병법인'))]
+
+
+def update_excel(df_all: pd.DataFrame, excel_path: str = EXCEL_PATH,
+                 commit: WorkbookCommit = None):
+    if commit is None:
+        # 끝나면 저장하고, 일찍 끝나거나 실패해도 엑셀 잠금을 놓는다
+        with WorkbookCommit.open(excel_path) as commit:
+            return update_excel(df_all, excel_path, commit=commit)
+    wb = commit.wb
     ws = wb[SHEET_NAME]
 
     header = [c.value for c in ws[1]]
@@ -164,26 +196,41 @@ def update_excel(df_all: pd.DataFrame):
         ws.cell(row=1, column=idx+1, value='최초보고일')
         header.insert(idx, '최초보고일')
 
-    existing = {}
-    idx_corp  = header.index('합병법인')
-    idx_target= header.index('피합병법인')
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        key = (row[idx_corp].value, row[idx_target].value)
-        existing[key] = row[0].row
+    if KEY_COL not in header:
+        ws.cell(row=1, column=len(header) + 1, value=KEY_COL)
+        header.append(KEY_COL)
+    extend_header(ws, header, df_all.columns)
+
+    index = commit.sidecar(RecordIndex, SHEET_NAME)
+    if not len(index) and ws.max_row > 1:
+        index.rebuild(ws, merger_aliases)
+    search = commit.sidecar(SearchIndex, SHEET_NAME)
+    archive = ArchiveIndex.load(excel_path, SHEET_NAME)
+    idx_corp = header.index('합병법인') + 1
+
+    def lookup(series):
+        key = series[KEY_COL] if series[KEY_COL] in index else index.resolve(*merger_aliases(series))
+        if key is not None and not index.verify(ws, key, idx_corp, series['합병법인']):
+            index.rebuild(ws, merger_aliases)
+            key = series[KEY_COL] if series[KEY_COL] in index else index.resolve(*merger_aliases(series))
+        return key
 
     date_cols  = {'최종보고일','최초보고일'}
     comma_cols = {'납입자본금(합병)','납입자본금(피합병)','자산총액(합병)','자산총액(피합병)','발행주식수(합병)','발행주식수(피합병)'}
     wrap_col   = '사업개요'
 
     def apply_fmt(cell, col):
-        if col in date_cols and isinstance(cell.value, str):
+        if col in date_cols and isinstance(cell.value, (str, datetime)):
             try:
-                cell.value = datetime.strptime(cell.value, '%Y%m%d')
+                if isinstance(cell.value, str):
+                    cell.value = datetime.strptime(cell.value, '%Y%m%d')
                 cell.number_format = 'yyyy-mm-dd'
             except:
                 pass
         elif col in comma_cols and isinstance(cell.value, (int,float)):
             cell.number_format = '#,##0'
+        elif col in ENRICH_COLS and isinstance(cell.value, float):
+            cell.number_format = '#,##0.00'
         if col==wrap_col:
             cell.alignment=Alignment(wrap_text=True)
         else:
@@ -191,12 +238,15 @@ def update_excel(df_all: pd.DataFrame):
         cell.font=Font(size=10)
 
     start_row = ws.max_row + 1
-    for idx, series in df_all.iterrows():
-        key = (series["합병법인"], series["피합병법인"])
-        if key in existing:
-            r = existing[key]
+    for series in from_frame(df_all, MergerRecord):
+        key = lookup(series)
+        if key is None and (series[KEY_COL] in archive or archive.resolve(*merger_aliases(series))):
+            # 보관 파일로 옮긴 합병은 다시 넣지 않는다
+            continue
+        if key is not None:
+            r = index.row_for(key)
             for col_idx, col_name in enumerate(header, start=1):
-                if col_name in df_all.columns:
+                if col_name in df_all.columns and col_name != KEY_COL:
                     val = series[col_name]
                     cell = ws.cell(row=r, column=col_idx)
                     if cell.value != val:
@@ -214,19 +264,38 @@ def update_excel(df_all: pd.DataFrame):
                 cell = ws.cell(row=r, column=col_idx, value=val)
                 apply_fmt(cell, col_name)
             start_row += 1
+            key = series[KEY_COL]
+        index.put(key, r, merger_aliases(series))
+        search.put(key, series)
 
-    wb.save(EXCEL_PATH)
     print("✅ 업데이트 완료료")
 
 
-def main(date_str: str):
-    df_new = get_merger_reports_for_date(date_str)
+MERGER = register(ReportType(
+    name='merger', label='합병', detail_ty='C004', sheet=SHEET_NAME, record=MergerRecord,
+    select=select_mergers, parse=parse_filing, write=update_excel,
+    key=(KEY_COL,), needs=('financials',), create_sheet=False,
+))
+
+
+def main(date_str: str, profiler: StageProfiler = None, watchlist: str = None, journal: bool = True):
+    profiler = profiler or StageProfiler()
+    session = make_session()
+    enable_watchlist(session, watchlist)
+    journal = RunJournal.load(EXCEL_PATH) if journal else None
+    with profiler.stage('collect'):
+        df_new = get_merger_reports_for_date(date_str, session, journal)
     if not df_new.empty:
-        update_excel(df_new)
+        with profiler.stage('enrich'):
+            enrich(session, [df_new], date_str)
+        with profiler.stage('update_excel'):
+            update_excel(df_new)
+        if journal is not None:
+            journal.advance('merger', 'committed')
     else:
         
         print(f"오늘 합병 관련 증권신고가 없습니다.")
-        return
+    print(profiler.report(), end='')
 
 if __name__=='__main__':
     import argparse
@@ -237,5 +306,8 @@ if __name__=='__main__':
         default=datetime.now().strftime("%Y%m%d"),
         help="조회할 날짜(YYYYMMDD), 기본값은 오늘"
     )
+    add_watchlist_args(parser)
+    add_profile_args(parser)
+    parser.add_argument("--no-journal", action="store_true", help="실행 저널 없이 목록 전체를 처음부터 처리")
     args = parser.parse_args()
-    main(args.date)
\ No newline at end of file
+    main(args.date, StageProfiler(args.profile, args.profile_memory), args.watchlist, not args.no_journal)
\ No newline at end of file
@@ -0,0 +1,199 @@
+import os
+import json
+import zlib
+import argparse
+
+import pandas as pd
+
+from frame_backend import arrow_schema, get_frames
+from records import SalesRecord, InvestRecord, MergerRecord
+from workbook_commit import _signature
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+OUT_DIR = 'parquet'
+MANIFEST = '_manifest.json'
+
+# 컬럼과 dtype은 records.py의 레코드 스키마를 따른다 (시트에 컬럼이 늘면 내보내기도 같이 는다)
+DATASETS = {
+    'main':   {'sheet': 'main', 'record': SalesRecord, 'date_col': '날짜 (D)', 'extra': [('Cnt', 'Int64')]},
+    'invest': {'sheet': '신규투자', 'record': InvestRecord, 'date_col': '공시일', 'extra': []},
+    'merger': {'sheet': '합병', 'record': MergerRecord, 'date_col': '최종보고일',
+               'extra': [('최초보고일', 'datetime64[ns]')]},
+}
+STOCK_CODE_COLS = {'종목코드'}
+
+
+def columns(spec: dict) -> list:
+    # (컬럼명, dtype). 시트에는 레코드에 없는 보조 컬럼(Cnt, 최초보고일)도 있다
+    return [(col, dtype) for _, col, dtype, _ in spec['record'].schema()] + spec['extra']
+
+
+def to_int64(s: pd.Series) -> pd.Series:
+    if s.dtype == object:
+        s = s.astype(str).str.replace(',', '', regex=False)
+    return pd.to_numeric(s, errors='coerce').round().astype('Int64')
+
+
+def to_float(s: pd.Series) -> pd.Series:
+    if s.dtype == object:
+        s = s.astype(str).str.replace(',', '', regex=False)
+    return pd.to_numeric(s, errors='coerce').astype('float64')
+
+
+def to_date(s: pd.Series) -> pd.Series:
+    if s.dtype == object:
+        s = s.astype(str).str.strip()
+        compact = s.str.fullmatch(r'\d{8}')
+        out = pd.to_datetime(s.where(~compact), errors='coerce')
+        out[compact] = pd.to_datetime(s[compact], format='%Y%m%d', errors='coerce')
+        return out.astype('datetime64[ns]')
+    return pd.to_datetime(s, errors='coerce').astype('datetime64[ns]')
+
+
+def to_text(s: pd.Series, zfill: int = 0) -> pd.Series:
+    # 숫자로 읽힌 코드·접수번호는 '.0' 없이 정수 문자열로
+    if pd.api.types.is_numeric_dtype(s):
+        s = pd.to_numeric(s, errors='coerce').round().astype('Int64')
+    s = s.astype('string').str.strip()
+    return s.str.zfill(zfill) if zfill else s
+
+
+def apply_schema(df: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    # 레코드 스키마의 컬럼을 모두 같은 순서·dtype으로. 시트에 없는 컬럼은 빈 값, 스키마 밖의 컬럼은 문자열로 뒤에 붙인다
+    out = {}
+    for col, dtype in columns(spec):
+        s = df[col] if col in df else pd.Series([None] * len(df), index=df.index, dtype=object)
+        if dtype.startswith('datetime'):
+            out[col] = to_date(s)
+        elif dtype == 'Int64':
+            out[col] = to_int64(s)
+        elif dtype == 'float64':
+            out[col] = to_float(s)
+        elif dtype == 'category':
+            out[col] = to_text(s).astype('category')
+        else:
+            out[col] = to_text(s, 6 if col in STOCK_CODE_COLS else 0)
+    for col in df.columns:
+        if col not in out and isinstance(col, str) and not col.startswith('Unnamed'):
+            out[col] = to_text(df[col])
+    return pd.DataFrame(out, index=df.index)
+
+
+def frame_schema(df: pd.DataFrame, spec: dict):
+    # 파티션마다 같은 Parquet 스키마가 되도록 타입을 고정한다 (한 달 내내 빈 숫자 컬럼도 string으로 추론되지 않게)
+    types = dict(columns(spec))
+    return arrow_schema([(col, types.get(col, 'string')) for col in df.columns])
+
+
+def schema_digest(spec: dict) -> str:
+    return format(zlib.crc32(repr(columns(spec)).encode('utf-8')), '08x')
+
+
+def read_sheet(excel_path: str, sheet: str) -> pd.DataFrame:
+    with pd.ExcelFile(excel_path) as xls:
+        if sheet not in xls.sheet_names:
+            return pd.DataFrame()
+        return pd.read_excel(xls, sheet_name=sheet)
+
+
+def month_digest(part: pd.DataFrame) -> str:
+    return format(int(pd.util.hash_pandas_object(part, index=False).sum()) & 0xFFFFFFFFFFFFFFFF, '016x')
+
+
+def load_manifest(ds_dir: str) -> dict:
+    path = os.path.join(ds_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(ds_dir: str, manifest: dict):
+    path = os.path.join(ds_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export_dataset(df: pd.DataFrame, spec: dict, ds_dir: str, full: bool = False, source=None,
+                   frames=None) -> list:
+    frames = frames or get_frames()
+    df = apply_schema(df, spec)
+    date_col = spec['date_col']
+    df = df[df[date_col].notna()].sort_values(date_col, kind='stable').reset_index(drop=True)
+
+    os.makedirs(ds_dir, exist_ok=True)
+    manifest = {} if full else load_manifest(ds_dir)
+    if manifest.get('_schema') != schema_digest(spec):
+        # 컬럼·타입이 바뀌면 모든 달을 새 스키마로 다시 쓴다 (달마다 스키마가 다르면 데이터셋을 읽지 못한다)
+        manifest = {}
+    months = df[date_col].dt.strftime('%Y-%m')
+    digests = {ym: month_digest(part) for ym, part in df.groupby(months, sort=True)}
+    changed = [ym for ym, digest in digests.items() if manifest.get(ym, {}).get('digest') != digest]
+
+    # 바뀐 달의 행만 백엔드 프레임으로 넘겨 월별로 나눠 쓴다
+    schema = frame_schema(df, spec)
+    frame = frames.from_pandas(df[months.isin(changed)].reset_index(drop=True), schema)
+    written = []
+    for ym, part in frames.partitions(frame, date_col):
+        frames.write_parquet(part, os.path.join(ds_dir, f'ym={ym}', 'part-0.parquet'), schema)
+        manifest[ym] = {'rows': len(part), 'digest': digests[ym]}
+        written.append(ym)
+    # 시트에서 사라진 달의 파티션은 지운다
+    for ym in [k for k in manifest if not k.startswith('_') and k not in digests]:
+        path = os.path.join(ds_dir, f'ym={ym}', 'part-0.parquet')
+        if os.path.exists(path):
+            os.remove(path)
+        del manifest[ym]
+        written.append(ym)
+
+    manifest['_schema'] = schema_digest(spec)
+    manifest['_source'] = list(source) if source else None
+    save_manifest(ds_dir, manifest)
+    return written
+
+
+def export_all(excel_path: str = EXCEL_PATH, out_dir: str = OUT_DIR,
+               datasets=None, full: bool = False, backend: str = None) -> dict:
+    # 엑셀이 지난 내보내기 이후 바뀌지 않았으면 시트를 읽지도 않는다. 바뀐 달만 다시 쓴다
+    frames = get_frames(backend)
+    results = {}
+    source = _signature(excel_path)
+    for name in datasets or DATASETS:
+        spec = DATASETS[name]
+        ds_dir = os.path.join(out_dir, name)
+        manifest = load_manifest(ds_dir)
+        if (not full and source is not None and manifest.get('_source') == list(source)
+                and manifest.get('_schema') == schema_digest(spec)):
+            results[name] = []
+            continue
+        df = read_sheet(excel_path, spec['sheet'])
+        if df.empty:
+            results[name] = []
+            continue
+        results[name] = export_dataset(df, spec, ds_dir, full=full, source=source, frames=frames)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공시 데이터셋을 월별 파티션 Parquet으로 내보냅니다.")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="원본 엑셀 파일 경로")
+    parser.add_argument("--out", type=str, default=OUT_DIR, help="Parquet 출력 디렉터리")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS),
+                        help="내보낼 데이터셋 (기본: 전체)")
+    parser.add_argument("--full", action="store_true", help="manifest를 무시하고 모든 파티션을 다시 씁니다")
+    parser.add_argument("--backend", choices=['pandas', 'arrow'], default=None,
+                        help="파티션 분할·Parquet 저장 백엔드 (기본: DART_FRAME_BACKEND 또는 pandas)")
+    args = parser.parse_args()
+
+    results = export_all(args.excel, args.out, args.dataset, args.full, args.backend)
+    for name, months in results.items():
+        if months:
+            print(f"✅ {name}: {len(months)}개 파티션 갱신 ({', '.join(months)})")
+        else:
+            print(f"{name}: 변경된 파티션이 없습니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+import os
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from dart_client import fetch_list
+from workbook_commit import WorkbookCommit
+from records import from_values, to_frame
+from financials import enrich
+
+# 한 공시유형 안에서 문서 다운로드·파싱을 동시에 돌릴 개수
+DOC_WORKERS = int(os.getenv('DART_DOC_WORKERS', '4'))
+
+
+@dataclass
+class ReportType:
+    # 공시유형 하나가 등록하는 것: 목록 필터, 문서 파서, 보강 항목, 중복 키, 시트 스키마(레코드 클래스), 저장 함수
+    name: str
+    label: str
+    detail_ty: str
+    sheet: str
+    record: type
+    select: object              # (DataFrame) -> DataFrame: list.json 결과에서 대상 공시만
+    parse: object               # (session, row: dict, ctx) -> Record | Deferred | None: None이면 건너뜀
+    write: object               # (DataFrame, excel_path, commit) -> None
+    key: tuple = ()
+    needs: tuple = ()           # 'financials': 다중회사 재무 API로 매출액·자기자본 보강
+    fill: object = None         # (session, excel_path, commit=...) -> None: 익일종가 채우기
+    create_sheet: bool = True   # False면 시트가 있을 때만 저장
+
+
+class Deferred:
+    # 같은 목록의 다른 공시가 나온 뒤에야 만들 수 있는 레코드 (원공시와 같은 배치로 들어온 정정공시)
+    # resolve(batch)는 이번 실행에서 내보낸 레코드 목록을 받아 레코드나 None(아직 못 만듦)을 돌려준다
+    def __init__(self, resolve):
+        self.resolve = resolve
+
+
+REGISTRY = {}
+
+
+def register(rt: ReportType) -> ReportType:
+    REGISTRY[rt.name] = rt
+    return rt
+
+
+def load_plugins():
+    # 공시유형은 각 스크립트가 import될 때 등록된다
+    import dart_update, invest_update, merge_update  # noqa: F401
+    return REGISTRY
+
+
+class RunContext:
+    # 한 번의 실행 동안 공시유형끼리 공유하는 캐시 (시장정보, 색인 등)와 실행 저널
+    def __init__(self, target_date: str, excel_path: str, caches: dict = None, journal=None):
+        self.target_date = target_date
+        self.excel_path = excel_path
+        self.caches = caches if caches is not None else {}
+        self.journal = journal
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def mark(self, kind: str, rcept_no: str, state: str):
+        # 파서가 단계(문서 받음 등)를 남길 때. 저널 없이 돌리면 아무것도 하지 않는다
+        if self.journal is not None:
+            self.journal.mark(kind, rcept_no, state)
+
+    def cache(self, name: str) -> dict:
+        with self._lock:
+            return self.caches.setdefault(name, {})
+
+    def _key_lock(self, name: str):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def once(self, name: str, factory):
+        # factory는 네트워크를 쓰기도 하므로 이름별 잠금 안에서만 돈다 (다른 이름의 once·cache는 기다리지 않는다)
+        with self._key_lock(name):
+            if name not in self.caches:
+                value = factory()
+                with self._lock:
+                    self.caches[name] = value
+            return self.caches[name]
+
+
+def list_reports(session, rt: ReportType, target_date: str) -> pd.DataFrame:
+    df = pd.DataFrame(fetch_list(session, target_date, target_date, rt.detail_ty))
+    if df.empty or 'report_nm' not in df.columns:
+        return pd.DataFrame()
+    return rt.select(df)
+
+
+def iter_records(session, rt: ReportType, ctx: RunContext, reports: pd.DataFrame = None,
+                 workers: int = DOC_WORKERS):
+    # 문서는 병렬로 받되 목록 순서대로 내보낸다. 한 건의 실패는 그 건만 건너뛴다
+    if reports is None:
+        reports = list_reports(session, rt, ctx.target_date)
+    if reports.empty:
+        print(f"오늘 {rt.label} 공시가 없습니다.")
+        return
+    journal = ctx.journal
+
+    def parse(row):
+        try:
+            return row, rt.parse(session, row, ctx), None
+        except Exception as e:
+            print(f"⚠️ {row.get('corp_name')} ({row.get('rcept_no')}) 처리 실패: {e}")
+            return row, None, e
+
+    def done(row, rec, error):
+        # 저널 기록은 워커가 아니라 내보내는 쪽에서, 목록 순서대로 남긴다
+        if journal is None:
+            return
+        if error is not None:
+            if journal.fail(rt.name, row['rcept_no'], error):
+                print(f"⚠️ {row.get('corp_name')} ({row['rcept_no']}) 반복 실패로 격리")
+        elif rec is None:
+            journal.mark(rt.name, row['rcept_no'], 'skipped')
+        else:
+            journal.parsed(rt.name, row['rcept_no'], rec)
+
+    rows = reports.to_dict('records')
+    batch, deferred = [], []
+    if journal is not None:
+        # 지난 실행에서 시트 반영까지 끝난 공시는 건너뛰고, 파싱까지 끝난 공시는 저장해 둔 값으로 되살린다
+        rows, resumed = journal.plan(rt.name, rows, ctx.target_date)
+        for rcept_no, values in resumed:
+            journal.handed(rt.name, rcept_no)
+            rec = from_values(rt.record, values)
+            batch.append(rec)
+            yield rec
+    if workers <= 1:
+        results = map(parse, rows)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        results = pool.map(parse, rows)
+    try:
+        for row, rec, error in results:
+            if isinstance(rec, Deferred):
+                deferred.append((row, rec))
+                continue
+            done(row, rec, error)
+            if rec is not None:
+                # 넘기기 직전에 표시한다. --flush-every 저장은 그때까지 넘긴 공시만 반영 완료로 올린다
+                if journal is not None:
+                    journal.handed(rt.name, row['rcept_no'])
+                batch.append(rec)
+                yield rec
+    finally:
+        if workers > 1:
+            pool.shutdown(cancel_futures=True)
+    # 미뤄 둔 레코드는 목록을 다 내보낸 뒤 이번 배치로 다시 맞춘다. 그래도 못 만들면 끝내지 않고 저널에 남겨
+    # 다음 실행에서 다시 처리한다 (skipped로 끝내면 원공시가 나중에 반영돼도 정정이 빠진다)
+    for row, pending in deferred:
+        try:
+            rec = pending.resolve(batch)
+        except Exception as e:
+            print(f"⚠️ {row.get('corp_name')} ({row.get('rcept_no')}) 처리 실패: {e}")
+            done(row, None, e)
+            continue
+        if rec is None:
+            continue
+        done(row, rec, None)
+        if journal is not None:
+            journal.handed(rt.name, row['rcept_no'])
+        batch.append(rec)
+        yield rec
+    # 파서가 모아 둔 원문 라벨은 시트 저장과 상관없이 바로 남긴다 (접수번호 기준이라 다시 써도 같다)
+    store = ctx.caches.get(f'labels:{rt.name}')
+    if store is not None:
+        store.save()
+
+
+def collect(session, rt: ReportType, ctx: RunContext, sinks=None) -> pd.DataFrame:
+    records = []
+    for rec in iter_records(session, rt, ctx):
+        records.append(rec)
+        if sinks is not None:
+            sinks.emit(rec)
+    df = to_frame(records, rt.record)
+    if rt.key and not df.empty:
+        # 관심종목 모드처럼 목록이 겹쳐 같은 공시가 두 번 들어온 경우
+        df = df.drop_duplicates(subset=list(rt.key), keep='first').reset_index(drop=True)
+    return df
+
+
+def collect_all(session, target_date: str, excel_path: str, sinks=None, names=None,
+                caches: dict = None, journal=None) -> dict:
+    # 공시유형별 수집은 네트워크 대기가 대부분이라 스레드로 동시에 돌린다
+    types = [rt for name, rt in load_plugins().items() if names is None or name in names]
+    ctx = RunContext(target_date, excel_path, caches, journal)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(len(types), 1)) as pool:
+        futures = {rt.name: pool.submit(collect, session, rt, ctx, sinks) for rt in types}
+        for name, fut in futures.items():
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                print(f"⚠️ {name} 파이프라인 실패: {e}")
+                results[name] = pd.DataFrame()
+    return results
+
+
+def enrich_all(session, results: dict, target_date: str, journal=None):
+    # 보강 항목별로 모든 공시유형의 행을 모아 한 번에 배치 조회한다
+    frames = [df for name, df in results.items() if 'financials' in REGISTRY[name].needs]
+    out = enrich(session, frames, target_date)
+    if journal is not None:
+        for name in results:
+            journal.advance(name, 'enriched')
+    return out
+
+
+def commit_all(session, results: dict, excel_path: str, commit: WorkbookCommit = None, journal=None):
+    if commit is None:
+        # 끝나면 저장하고, 중간에 실패하면 저장하지 않고 잠금만 놓는다 (상주 서비스가 다음 수집에서 막히지 않게)
+        with WorkbookCommit.open(excel_path) as commit:
+            return commit_all(session, results, excel_path, commit, journal)
+    if journal is not None:
+        def committed():
+            for name in results:
+                journal.advance(name, 'committed')
+        # 통합 문서가 실제로 저장된 뒤에만 반영 완료로 기록한다
+        commit.on_saved(committed)
+    for name, df in results.items():
+        rt = REGISTRY[name]
+        if df.empty:
+            continue
+        if not rt.create_sheet and rt.sheet not in commit.wb.sheetnames:
+            print(f"⚠️ '{rt.sheet}' 시트가 없어 {rt.label} 공시는 반영하지 않습니다.")
+            continue
+        rt.write(df, excel_path, commit)
+        print(f"✅ {rt.label} {len(df)}건 반영")
+    for name in results:
+        rt = REGISTRY[name]
+        if rt.fill is not None:
+            rt.fill(session, excel_path, commit=commit)
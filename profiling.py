@@ -0,0 +1,90 @@
+import io
+import os
+import re
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageProfiler:
+    # out_dir이 없으면 아무 것도 하지 않는다. 있으면 단계마다 pstats 파일과 요약을 남긴다
+    def __init__(self, out_dir: str = None, memory: bool = False, top: int = 20):
+        self.out_dir = out_dir
+        self.memory = memory
+        self.top = top
+        self.results = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.out_dir)
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = f"{len(self.results) + 1:02d}-{re.sub(r'[^0-9A-Za-z_-]+', '_', name)}"
+
+        started_tracing = False
+        before = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        prof = cProfile.Profile()
+        started = time.perf_counter()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            elapsed = time.perf_counter() - started
+            stats_path = os.path.join(self.out_dir, slug + '.pstats')
+            prof.dump_stats(stats_path)
+            result = {'stage': name, 'seconds': elapsed, 'pstats': stats_path,
+                      'hot': self._hot_functions(prof), 'alloc': None, 'peak_mb': None}
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                result['alloc'] = after.compare_to(before, 'lineno')[:self.top]
+                if started_tracing:
+                    tracemalloc.stop()
+            self.results.append(result)
+
+    def _hot_functions(self, prof) -> str:
+        buf = io.StringIO()
+        stats = pstats.Stats(prof, stream=buf)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(self.top)
+        return buf.getvalue()
+
+    def report(self) -> str:
+        if not self.enabled or not self.results:
+            return ''
+        lines = [f"{'stage':<24}{'sec':>9}{'peak(MB)':>10}  pstats"]
+        for r in self.results:
+            peak = f"{r['peak_mb']:.1f}" if r['peak_mb'] is not None else '-'
+            lines.append(f"{r['stage']:<24}{r['seconds']:>9.2f}{peak:>10}  {r['pstats']}")
+        for r in self.results:
+            lines.append('')
+            lines.append(f"=== {r['stage']}: 누적 시간 상위 {self.top}개 함수 ===")
+            lines.append(r['hot'].strip())
+            if r['alloc']:
+                lines.append(f"--- {r['stage']}: 할당 증가 상위 {self.top}개 위치 ---")
+                lines.extend(str(s) for s in r['alloc'])
+        text = '\n'.join(lines) + '\n'
+        with open(os.path.join(self.out_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+        return text
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", nargs='?', const='profile', default=None, metavar='DIR',
+                        help="단계별 cProfile 결과(pstats)와 요약을 DIR(기본: profile/)에 저장")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="--profile과 함께 tracemalloc 스냅샷으로 할당 위치도 기록")
@@ -0,0 +1,146 @@
+import os
+import json
+
+KEY_COL = '접수번호'
+# 접수번호가 없는 예전 행은 정정으로 바뀌지 않는 컬럼으로 식별한다 (행 번호는 보관 회전·정렬로 바뀐다)
+LEGACY_KEY_COLS = {
+    'main': ('공시회사', '날짜 (D)', 'Cnt'),
+    '합병': ('합병법인', '피합병법인', '최초보고일'),
+}
+
+
+def index_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.index.json'
+
+
+def read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_section(path: str, sheet: str, section: dict):
+    # 다른 시트의 섹션을 덮어쓰지 않도록 파일을 다시 읽어 자기 섹션만 교체한다
+    data = read_json(path)
+    data[sheet] = section
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def alias_key(*parts) -> str:
+    return '|'.join('' if p is None else str(p).strip() for p in parts)
+
+
+def _part(value) -> str:
+    # openpyxl 셀 값과 pandas로 읽은 값이 같은 문자열이 되게 맞춘다 (날짜는 YYYYMMDD, 정수 float은 정수)
+    try:
+        if value is None or value != value:
+            return ''
+    except (TypeError, ValueError):
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y%m%d')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def record_key(sheet: str, values) -> str | None:
+    # 접수번호 색인·검색 색인·회사 집계가 같은 행을 같은 키로 부르도록 셋 다 이 함수를 쓴다
+    key = _part(values.get(KEY_COL))
+    if key:
+        return key
+    parts = [_part(values.get(col)) for col in LEGACY_KEY_COLS.get(sheet, ())]
+    if not any(parts):
+        return None
+    return f'{sheet}:' + alias_key(*parts)
+
+
+def legacy_row_key(key: str) -> bool:
+    # 예전 버전이 쓰던 행 번호 키 (row:N, <시트>[:연도]:row:N)
+    return key.startswith('row:') or ':row:' in key
+
+
+class RecordIndex:
+    # 원공시 rcept_no → 시트 행 번호, 보조키(alias) → 원공시 rcept_no
+    def __init__(self, path: str, sheet: str, data: dict):
+        self.path = path
+        self.sheet = sheet
+        section = data.setdefault(sheet, {})
+        self.rows = section.setdefault('rows', {})
+        self.alias = section.setdefault('alias', {})
+        self.dirty = False
+        if any(legacy_row_key(k) for k in self.rows):
+            # 행 번호 키가 남은 예전 색인은 비워서 다음 반영 때 시트에서 다시 만든다
+            self.rows.clear()
+            self.alias.clear()
+            self.dirty = True
+
+    @classmethod
+    def load(cls, excel_path: str, sheet: str) -> 'RecordIndex':
+        path = index_path(excel_path)
+        return cls(path, sheet, read_json(path))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def row_for(self, key):
+        return self.rows.get(key)
+
+    def resolve(self, *aliases):
+        for a in aliases:
+            if a and a in self.alias and self.alias[a] in self.rows:
+                return self.alias[a]
+        return None
+
+    def put(self, key: str, row: int, aliases=()):
+        self.rows[key] = row
+        for a in aliases:
+            if a:
+                self.alias[a] = key
+        self.dirty = True
+
+    def drop(self, key: str):
+        if self.rows.pop(key, None) is not None:
+            for a in [a for a, k in self.alias.items() if k == key]:
+                del self.alias[a]
+            self.dirty = True
+
+    def rebuild(self, ws, alias_fn):
+        # 인덱스가 없을 때 한 번만 시트를 스캔해 만든다
+        self.rows.clear()
+        self.alias.clear()
+        header = [c.value for c in ws[1]]
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
+            values = dict(zip(header, (c.value for c in row)))
+            key = record_key(self.sheet, values)
+            if key is None:
+                continue
+            self.put(key, row[0].row, alias_fn(values))
+        self.dirty = True
+
+    def verify(self, ws, key: str, col: int, expected) -> bool:
+        # 시트가 수동으로 정렬·편집된 경우 오래된 인덱스 항목을 버린다
+        r = self.rows.get(key)
+        if r is None:
+            return False
+        if ws.cell(row=r, column=col).value != expected:
+            self.drop(key)
+            return False
+        return True
+
+    def save(self):
+        if not self.dirty:
+            return
+        write_section(self.path, self.sheet, {'rows': self.rows, 'alias': self.alias})
+        self.dirty = False
@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime
+
+import pandas as pd
+
+from record_index import KEY_COL
+from amounts import to_unit, to_unit_one
+
+
+def column(name: str, dtype: str, fmt: str = None, unit: str = None, scale: int = 1):
+    # name: 시트 컬럼명, dtype: DataFrame으로 모을 때의 dtype, fmt: 문자열 날짜의 형식
+    # unit: 문서의 금액 문자열을 읽을 때 단위 표기가 없으면 쓸 단위('' = 단위 없는 수), scale: 시트 표시 단위(원)
+    return field(default=None, metadata={'col': name, 'dtype': dtype, 'fmt': fmt,
+                                         'unit': unit, 'scale': scale})
+
+
+class Record:
+    # 시트 컬럼명으로도 읽을 수 있는 slots 레코드. 색인·대기열 등은 values.get(컬럼명)으로 접근한다
+    __slots__ = ()
+    _schema = None
+
+    @classmethod
+    def schema(cls) -> list:
+        # (속성명, 컬럼명, dtype, fmt)
+        if cls.__dict__.get('_schema') is None:
+            cls._schema = [(f.name, f.metadata['col'], f.metadata['dtype'], f.metadata['fmt'])
+                           for f in fields(cls)]
+            cls._attrs = {col: name for name, col, _, _ in cls._schema}
+            cls._units = {f.name: (f.metadata['unit'], f.metadata['scale'])
+                          for f in fields(cls) if f.metadata['unit'] is not None}
+        return cls._schema
+
+    @classmethod
+    def columns(cls) -> list:
+        return [col for _, col, _, _ in cls.schema()]
+
+    def _value(self, name):
+        # 금액 필드는 문서 문자열 그대로 들고 있다가 읽을 때 시트 단위 숫자로 바꾼다
+        value = getattr(self, name)
+        if name in self._units:
+            return to_unit_one(value, *self._units[name])
+        return value
+
+    def get(self, col, default=None):
+        name = self._attrs.get(col)
+        return default if name is None else self._value(name)
+
+    def __getitem__(self, col):
+        return self._value(self._attrs[col])
+
+    def to_dict(self) -> dict:
+        return {col: self._value(name) for name, col, _, _ in self.schema()}
+
+
+def _convert(values: list, dtype: str, fmt: str) -> pd.Series:
+    s = pd.Series(values, dtype=object)
+    if dtype.startswith('datetime'):
+        if fmt:
+            s = s.map(lambda v: v.strftime(fmt) if isinstance(v, (date, datetime)) else v)
+        return pd.to_datetime(s, format=fmt, errors='coerce').astype(dtype)
+    if dtype in ('Int64', 'float64'):
+        return pd.to_numeric(s, errors='coerce').astype(dtype)
+    if dtype == 'category':
+        return s.astype('string').astype('category')
+    return s.astype(dtype)
+
+
+def to_frame(records: list, cls) -> pd.DataFrame:
+    # 레코드를 컬럼 단위로 모아 dtype을 한 번에 정한다 (행마다 dict·Series를 만들지 않는다)
+    if not records:
+        return pd.DataFrame()
+    units = cls._units
+    return pd.DataFrame({
+        col: _convert([getattr(r, name) for r in records], dtype, fmt)
+        if name not in units else to_unit([getattr(r, name) for r in records], *units[name]).astype(dtype)
+        for name, col, dtype, fmt in cls.schema()
+    })
+
+
+def from_frame(df: pd.DataFrame, cls) -> list:
+    # 컬럼별로 결측값을 None으로 바꾼 뒤 한 번에 묶는다 (iterrows 대신)
+    cols = []
+    for name, col, _, _ in cls.schema():
+        if col not in df.columns:
+            cols.append([None] * len(df))
+            continue
+        s = df[col].astype(object)
+        cols.append(s.where(s.notna(), None).tolist())
+    return [cls(*values) for values in zip(*cols)]
+
+
+@dataclass(slots=True)
+class SalesRecord(Record):
+    stock_code: str = column('종목코드', 'string')
+    company: str = column('공시회사', 'string')
+    date: datetime = column('날짜 (D)', 'datetime64[ns]', '%Y%m%d')
+    exchange: str = column('거래소', 'category')
+    content: str = column('내용', 'string')
+    amount: float = column('계약 금액(억)', 'float64', unit='원', scale=100_000_000)
+    sales_ratio: float = column('매출액 대비(%) (A)', 'float64')
+    counterparty: str = column('계약상대', 'string')
+    start: datetime = column('시작일 (s)', 'datetime64[ns]', '%Y-%m-%d')
+    end: datetime = column('종료일 (e)', 'datetime64[ns]', '%Y-%m-%d')
+    sector: str = column('업종 분류', 'category')
+    market_cap: int = column('시가총액(억)', 'Int64')
+    prev_close: int = column('전일종가(원)', 'Int64')
+    today_close: int = column('당일종가(원)', 'Int64')
+    next_close: int = column('익일종가(원)', 'Int64')
+    rcept_no: str = column(KEY_COL, 'string')
+    revenue: float = column('최근매출액(억)', 'float64')
+    equity: float = column('자기자본(억)', 'float64')
+    fs_basis: str = column('재무기준', 'string')
+
+
+@dataclass(slots=True)
+class InvestRecord(Record):
+    company: str = column('공시회사', 'string')
+    date: datetime = column('공시일', 'datetime64[ns]', '%Y%m%d')
+    stock_code: str = column('종목코드', 'string')
+    kind: str = column('투자구분', 'string')
+    amount: float = column('투자금액(백만원)', 'float64', unit='원', scale=1_000_000)
+    equity_stated: float = column('자기자본(백만원)', 'float64', unit='원', scale=1_000_000)
+    equity_ratio: float = column('자기자본대비(%)', 'float64')
+    decided: datetime = column('결정일', 'datetime64[ns]', '%Y-%m-%d')
+    start: datetime = column('시작일', 'datetime64[ns]', '%Y-%m-%d')
+    end: datetime = column('종료일', 'datetime64[ns]', '%Y-%m-%d')
+    prev_close: int = column('전일종가', 'Int64')
+    today_close: int = column('당일종가', 'Int64')
+    next_close: int = column('익일종가', 'Int64')
+    revenue: float = column('최근매출액(억)', 'float64')
+    equity: float = column('자기자본(억)', 'float64')
+    fs_basis: str = column('재무기준', 'string')
+
+
+@dataclass(slots=True)
+class MergerRecord(Record):
+    company: str = column('공시회사', 'string')
+    acquirer: str = column('합병법인', 'string')
+    target: str = column('피합병법인', 'string')
+    reported: datetime = column('최종보고일', 'datetime64[ns]', '%Y%m%d')
+    capital_acquirer: int = column('납입자본금(합병)', 'Int64', unit='원')
+    capital_target: int = column('납입자본금(피합병)', 'Int64', unit='원')
+    assets_acquirer: int = column('자산총액(합병)', 'Int64', unit='원')
+    assets_target: int = column('자산총액(피합병)', 'Int64', unit='원')
+    listed_acquirer: str = column('합병법인 상장', 'category')
+    listed_target: str = column('피합병법인 상장', 'category')
+    shares_acquirer: int = column('발행주식수(합병)', 'Int64', unit='')
+    shares_target: int = column('발행주식수(피합병)', 'Int64', unit='')
+    overview: str = column('사업개요', 'string')
+    rcept_no: str = column(KEY_COL, 'string')
+    corp_code: str = column('corp_code', 'string')
+    revenue: float = column('최근매출액(억)', 'float64')
+    equity: float = column('자기자본(억)', 'float64')
+    fs_basis: str = column('재무기준', 'string')
+
+
+for _cls in (SalesRecord, InvestRecord, MergerRecord):
+    _cls.schema()
+
+
+def from_values(cls, values: dict):
+    # 파서가 돌려준 {컬럼명: 값}에서 스키마에 있는 값만 골라 레코드를 만든다
+    return cls(**{cls._attrs[col]: v for col, v in values.items() if col in cls._attrs})
+
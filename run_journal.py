@@ -0,0 +1,171 @@
+import os
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from sinks import to_json
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+# 공시 한 건이 거치는 단계. 뒤로 갈수록 앞 단계가 끝난 것
+STATES = ['listed', 'fetched', 'parsed', 'enriched', 'committed']
+# 다시 실행해도 건너뛰는 상태: 시트 반영 완료, 파서가 일부러 건너뜀(건설 업종 등), 격리
+TERMINAL = {'committed', 'skipped', 'quarantined'}
+MAX_ATTEMPTS = int(os.getenv('DART_JOURNAL_ATTEMPTS', '3'))
+COMPACT_BYTES = 4 * 1024 * 1024
+KEEP_DAYS = 14
+
+
+def journal_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.journal.jsonl'
+
+
+def read_entries(path: str) -> dict:
+    # 줄마다 상태 변화 하나. 같은 공시의 줄을 차례로 합쳐 최신 상태를 만든다 (쓰다 끊긴 마지막 줄은 버린다)
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                e = json.loads(line)
+            except ValueError:
+                continue
+            entries.setdefault((e['kind'], e['rcept_no']), {}).update(e)
+    return entries
+
+
+class RunJournal:
+    # 접수번호별 처리 단계를 추가 전용 JSONL에 남겨, 중간에 죽어도 다음 실행이 끝난 단계부터 이어 간다
+    def __init__(self, path: str, entries: dict):
+        self.path = path
+        self.entries = entries
+        self.touched = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, excel_path: str) -> 'RunJournal':
+        path = journal_path(excel_path)
+        journal = cls(path, read_entries(path))
+        if os.path.exists(path) and os.path.getsize(path) > COMPACT_BYTES:
+            journal.compact()
+        return journal
+
+    def state(self, kind: str, rcept_no: str) -> str | None:
+        return self.entries.get((kind, rcept_no), {}).get('state')
+
+    def _append(self, kind: str, rcept_no: str, state: str, **extra):
+        line = {'kind': kind, 'rcept_no': rcept_no, 'state': state,
+                'at': datetime.now().isoformat(timespec='seconds'), **extra}
+        with self._lock:
+            self.entries.setdefault((kind, rcept_no), {}).update(line)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def mark(self, kind: str, rcept_no: str, state: str, **extra):
+        self._append(kind, str(rcept_no), state, **extra)
+
+    def plan(self, kind: str, rows: list, target_date: str) -> tuple:
+        # 목록 행을 (새로 처리할 행, 파싱까지 끝나 레코드만 되살릴 (접수번호, 값))으로 나눈다
+        todo, resumed, held = [], [], 0
+        for row in rows:
+            rcept_no = str(row['rcept_no'])
+            entry = self.entries.get((kind, rcept_no), {})
+            state = entry.get('state')
+            if state in TERMINAL:
+                held += state == 'quarantined'
+                continue
+            if state in ('parsed', 'enriched') and entry.get('record') is not None:
+                resumed.append((rcept_no, entry['record']))
+                continue
+            if state is None:
+                self.mark(kind, rcept_no, 'listed', date=target_date)
+            todo.append(row)
+        if resumed:
+            print(f"↺ 지난 실행에서 파싱까지 끝난 {len(resumed)}건은 다시 받지 않고 이어서 처리합니다.")
+        if held:
+            print(f"⚠️ 격리된 공시 {held}건은 건너뜁니다. (python run_journal.py --list quarantined)")
+        return todo, resumed
+
+    def parsed(self, kind: str, rcept_no: str, record):
+        self.mark(kind, rcept_no, 'parsed', record=json.loads(to_json(record)))
+
+    def handed(self, kind: str, rcept_no: str):
+        # 레코드를 싱크·커밋 쪽에 넘길 때 부른다. advance는 넘긴 공시만 다음 단계로 올린다
+        with self._lock:
+            self.touched.setdefault(kind, set()).add(str(rcept_no))
+
+    def fail(self, kind: str, rcept_no: str, error: Exception) -> bool:
+        # 실패 횟수가 MAX_ATTEMPTS에 이르면 격리한다. 그 전까지는 다음 실행에서 다시 시도
+        attempts = self.entries.get((kind, str(rcept_no)), {}).get('attempts', 0) + 1
+        state = 'quarantined' if attempts >= MAX_ATTEMPTS else 'failed'
+        self.mark(kind, rcept_no, state, attempts=attempts, error=f'{type(error).__name__}: {error}')
+        return state == 'quarantined'
+
+    def advance(self, kind: str, state: str):
+        # 이번 실행에서 싱크·커밋에 넘긴 공시를 다음 단계로. 보강·시트 저장이 끝난 뒤에 부른다
+        order = STATES.index(state)
+        for rcept_no in sorted(self.touched.get(kind, ())):
+            current = self.state(kind, rcept_no)
+            if current in STATES and STATES.index(current) < order:
+                self.mark(kind, rcept_no, state)
+
+    def release(self, rcept_no: str) -> int:
+        # 격리·실패 기록을 지워 다음 실행에서 처음부터 다시 처리하게 한다
+        n = 0
+        for (kind, r), entry in list(self.entries.items()):
+            if r == rcept_no and entry.get('state') in ('quarantined', 'failed', 'skipped'):
+                self.mark(kind, r, 'listed', attempts=0, error=None)
+                n += 1
+        return n
+
+    def compact(self, keep_days: int = KEEP_DAYS):
+        # 공시마다 최신 상태 한 줄만 남기고, 오래전에 끝난 공시는 지운다
+        cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat(timespec='seconds')
+        with self._lock:
+            self.entries = {k: e for k, e in self.entries.items()
+                            if e.get('state') not in TERMINAL or e.get('at', '') >= cutoff}
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for e in self.entries.values():
+                    f.write(json.dumps(e, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="공시별 처리 단계 기록(실행 저널) 조회·관리")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로 (저널은 <엑셀 이름>.journal.jsonl)")
+    parser.add_argument("--list", nargs='?', const='', default=None, metavar='STATE',
+                        help="공시 목록 출력 (상태를 주면 그 상태만, 예: quarantined)")
+    parser.add_argument("--release", action="append", default=[], metavar='RCEPT_NO',
+                        help="격리·실패·건너뜀 기록을 지워 다음 실행에서 다시 처리")
+    parser.add_argument("--compact", action="store_true", help=f"최신 상태만 남기고 {KEEP_DAYS}일 지난 완료 건 정리")
+    args = parser.parse_args()
+
+    journal = RunJournal.load(args.excel)
+    for rcept_no in args.release:
+        n = journal.release(rcept_no)
+        print(f"✅ {rcept_no} 다시 처리 대기" if n else f"⚠️ {rcept_no}: 격리·실패 기록이 없습니다.")
+    if args.compact:
+        journal.compact()
+        print(f"✅ 저널 정리 완료 ({len(journal.entries)}건)")
+    if args.list is not None:
+        for (kind, rcept_no), e in sorted(journal.entries.items(), key=lambda kv: kv[1].get('at', '')):
+            if args.list and e.get('state') != args.list:
+                continue
+            error = f"  {e['error']}" if e.get('error') else ''
+            print(f"{e.get('at', ''):<20}{kind:<8}{rcept_no:<16}{e.get('state', ''):<12}{error}")
+    if args.list is None and not args.release and not args.compact:
+        counts = {}
+        for (kind, _), e in journal.entries.items():
+            counts.setdefault(kind, {}).setdefault(e.get('state'), 0)
+            counts[kind][e.get('state')] += 1
+        if not counts:
+            print("저널이 비어 있습니다.")
+        for kind, states in counts.items():
+            print(f"{kind:<8}" + ', '.join(f"{s} {n}" for s, n in sorted(states.items())))
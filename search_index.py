@@ -0,0 +1,245 @@
+import os
+import time
+import sqlite3
+import argparse
+
+import pandas as pd
+
+from close_queue import to_yyyymmdd
+from record_index import record_key, legacy_row_key
+from archive import archive_paths
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+FIELDS = ['company', 'content', 'counterparty', 'overview']
+MIN_NGRAM = 3
+
+# 시트 컬럼 → 색인 필드. 합병은 피합병법인을 상대방으로 본다
+SOURCES = {
+    'main': {'company': '공시회사', 'stock_code': '종목코드', 'date': '날짜 (D)', 'amount': '계약 금액(억)',
+             'content': '내용', 'counterparty': '계약상대', 'overview': None},
+    '합병': {'company': '합병법인', 'stock_code': None, 'date': '최종보고일', 'amount': None,
+            'content': None, 'counterparty': '피합병법인', 'overview': '사업개요'},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    rcept_no TEXT PRIMARY KEY,
+    sheet TEXT, company TEXT, stock_code TEXT, date TEXT, amount REAL,
+    content TEXT, counterparty TEXT, overview TEXT
+);
+CREATE INDEX IF NOT EXISTS filings_date ON filings(date);
+CREATE VIRTUAL TABLE IF NOT EXISTS filings_fts USING fts5(
+    company, content, counterparty, overview,
+    content='filings', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS filings_ai AFTER INSERT ON filings BEGIN
+    INSERT INTO filings_fts(rowid, company, content, counterparty, overview)
+    VALUES (new.rowid, new.company, new.content, new.counterparty, new.overview);
+END;
+CREATE TRIGGER IF NOT EXISTS filings_ad AFTER DELETE ON filings BEGIN
+    INSERT INTO filings_fts(filings_fts, rowid, company, content, counterparty, overview)
+    VALUES ('delete', old.rowid, old.company, old.content, old.counterparty, old.overview);
+END;
+CREATE TRIGGER IF NOT EXISTS filings_au AFTER UPDATE ON filings BEGIN
+    INSERT INTO filings_fts(filings_fts, rowid, company, content, counterparty, overview)
+    VALUES ('delete', old.rowid, old.company, old.content, old.counterparty, old.overview);
+    INSERT INTO filings_fts(rowid, company, content, counterparty, overview)
+    VALUES (new.rowid, new.company, new.content, new.counterparty, new.overview);
+END;
+"""
+
+UPSERT = """
+INSERT INTO filings (rcept_no, sheet, company, stock_code, date, amount, content, counterparty, overview)
+VALUES (:rcept_no, :sheet, :company, :stock_code, :date, :amount, :content, :counterparty, :overview)
+ON CONFLICT(rcept_no) DO UPDATE SET
+    sheet=excluded.sheet, company=excluded.company, stock_code=excluded.stock_code,
+    date=excluded.date, amount=excluded.amount, content=excluded.content,
+    counterparty=excluded.counterparty, overview=excluded.overview
+"""
+
+
+def search_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.search.sqlite'
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _text(value) -> str | None:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    s = str(value).strip()
+    return s or None
+
+
+def to_record(sheet: str, key: str, values) -> dict:
+    src = SOURCES[sheet]
+    get = lambda col: values.get(col) if col else None
+    amount = get(src['amount'])
+    try:
+        amount = None if amount is None or pd.isna(amount) else float(amount)
+    except (TypeError, ValueError):
+        amount = None
+    code = _text(get(src['stock_code']))
+    return {
+        'rcept_no': str(key),
+        'sheet': sheet,
+        'company': _text(get(src['company'])),
+        'stock_code': code.split('.')[0].zfill(6) if code else None,
+        'date': to_yyyymmdd(get(src['date'])) if _text(get(src['date'])) else None,
+        'amount': amount,
+        'content': _text(get(src['content'])),
+        'counterparty': _text(get(src['counterparty'])),
+        'overview': _text(get(src['overview'])),
+    }
+
+
+class SearchIndex:
+    # 엑셀 반영과 같은 커밋에서 모아 두었다가 저장 후 한 트랜잭션으로 색인한다
+    def __init__(self, excel_path: str, sheet: str):
+        self.excel_path = excel_path
+        self.path = search_path(excel_path)
+        self.sheet = sheet
+        self.pending = {}
+
+    @classmethod
+    def load(cls, excel_path: str, sheet: str) -> 'SearchIndex':
+        return cls(excel_path, sheet)
+
+    def put(self, key: str, values):
+        # 키는 시트 반영 쪽과 rebuild가 같게 record_key로 만든다 (예전 행 키에는 시트 이름이 붙어 main·합병이 겹치지 않는다)
+        key = key if key is not None else record_key(self.sheet, values)
+        if key is None or self.sheet not in SOURCES:
+            return
+        self.pending[str(key)] = to_record(self.sheet, key, values)
+
+    def save(self):
+        if not self.pending:
+            return
+        conn = connect(self.path)
+        try:
+            stale = any(legacy_row_key(k) for (k,) in
+                        conn.execute("SELECT rcept_no FROM filings WHERE rcept_no LIKE '%row:%'"))
+            if not stale:
+                with conn:
+                    conn.executemany(UPSERT, list(self.pending.values()))
+        finally:
+            conn.close()
+        if stale:
+            # 행 번호 키로 만든 예전 색인은 시트 사이 키가 겹칠 수 있어 새로 만든다
+            rebuild(self.excel_path)
+        self.pending = {}
+
+
+def rebuild(excel_path: str) -> int:
+    # 보관 파일과 현재 시트 전체를 다시 읽어 색인을 새로 만든다 (접수번호가 없는 예전 행은 record_key로 식별)
+    records = []
+    for year, path in archive_paths(excel_path) + [(None, excel_path)]:
+        with pd.ExcelFile(path) as xls:
+            for sheet in SOURCES:
+                if sheet not in xls.sheet_names:
+                    continue
+                df = pd.read_excel(xls, sheet_name=sheet)
+                for values in df.to_dict('records'):
+                    key = record_key(sheet, values)
+                    if key is not None:
+                        records.append(to_record(sheet, key, values))
+    path = search_path(excel_path)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(UPSERT, records)
+            conn.execute("INSERT INTO filings_fts(filings_fts) VALUES ('optimize')")
+    finally:
+        conn.close()
+    return len(records)
+
+
+def build_query(terms: list, field: str = None, sheet: str = None,
+                since: str = None, until: str = None, limit: int = 50):
+    # trigram 토크나이저는 3글자 이상만 색인하므로 짧은 검색어는 LIKE로 찾는다
+    where, params = [], []
+    cols = [field] if field else FIELDS
+    for term in terms:
+        if len(term) >= MIN_NGRAM:
+            phrase = '"' + term.replace('"', '""') + '"'
+            expr = f"{{{' '.join(cols)}}} : {phrase}"
+            where.append("f.rowid IN (SELECT rowid FROM filings_fts WHERE filings_fts MATCH ?)")
+            params.append(expr)
+        else:
+            where.append('(' + ' OR '.join(f"f.{c} LIKE ?" for c in cols) + ')')
+            params.extend([f'%{term}%'] * len(cols))
+    if sheet:
+        where.append("f.sheet = ?")
+        params.append(sheet)
+    if since:
+        where.append("f.date >= ?")
+        params.append(since)
+    if until:
+        where.append("f.date <= ?")
+        params.append(until)
+    sql = ("SELECT f.* FROM filings f"
+           + (" WHERE " + " AND ".join(where) if where else "")
+           + " ORDER BY f.date DESC, f.rcept_no DESC LIMIT ?")
+    return sql, params + [limit]
+
+
+def search(excel_path: str, query: str, field: str = None, sheet: str = None,
+           since: str = None, until: str = None, limit: int = 50) -> list:
+    terms = query.split()
+    if not terms:
+        return []
+    path = search_path(excel_path)
+    if not os.path.exists(path):
+        return []
+    conn = connect(path)
+    try:
+        sql, params = build_query(terms, field, sheet, since, until, limit)
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def excerpt(rec: dict, terms: list, width: int = 40) -> str:
+    for field in ('content', 'counterparty', 'overview', 'company'):
+        text = rec.get(field) or ''
+        pos = next((text.find(t) for t in terms if t in text), -1)
+        if pos >= 0:
+            start = max(pos - width // 2, 0)
+            return ('…' if start else '') + text[start:start + width].replace('\n', ' ')
+    return ''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="계약 내용·계약상대·사업개요 전문 검색")
+    parser.add_argument("query", nargs='?', help="검색어 (공백으로 나눈 단어를 모두 포함하는 공시)")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로")
+    parser.add_argument("--field", choices=FIELDS, help="특정 필드에서만 검색")
+    parser.add_argument("--sheet", choices=list(SOURCES), help="특정 시트에서만 검색")
+    parser.add_argument("--since", type=str, help="이 날짜(YYYYMMDD) 이후 공시만")
+    parser.add_argument("--until", type=str, help="이 날짜(YYYYMMDD) 이전 공시만")
+    parser.add_argument("--limit", type=int, default=50, help="최대 결과 수")
+    parser.add_argument("--rebuild", action="store_true", help="엑셀 전체를 다시 읽어 색인을 새로 생성")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        n = rebuild(args.excel)
+        print(f"✅ 검색 색인 재생성 완료 ({n}건) → {search_path(args.excel)}")
+    if args.query:
+        started = time.perf_counter()
+        rows = search(args.excel, args.query, args.field, args.sheet, args.since, args.until, args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for r in rows:
+            amount = f"{r['amount']:,.1f}억" if r['amount'] is not None else '-'
+            print(f"{r['date'] or '-':<9} {r['sheet']:<4} {r['company'] or '-':<16} {amount:>10}  "
+                  f"{r['rcept_no']}  {excerpt(r, args.query.split())}")
+        print(f"{len(rows)}건 ({elapsed:.1f}ms)")
+    elif not args.rebuild:
+        parser.print_help()
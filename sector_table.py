@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from dart_client import USER_AGENT, make_session
+from record_index import read_json
+from trading_calendar import get_calendar
+from amounts import parse_count
+
+SECTOR_PATH = os.getenv('DART_SECTOR_CACHE', 'sector_table.json')
+# 0이면 일괄 업종표를 쓰지 않고 예전처럼 회사마다 회사 페이지를 받는다
+ENABLED = os.getenv('DART_SECTOR_BULK', '1').lower() not in ('0', 'false', 'no')
+# 네이버 업종 분류(WICS 기반)는 회사 페이지의 'WICS :' 값과 같은 이름을 쓴다
+GROUPS_URL = 'https://finance.naver.com/sise/sise_group.naver?type=upjong'
+GROUP_URL = 'https://finance.naver.com/sise/sise_group_detail.naver?type=upjong&no={no}'
+# KRX 전종목 시세: 한 번의 요청으로 종가·상장주식수
+KRX_URL = 'http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd'
+KRX_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Referer': 'http://data.krx.co.kr/contents/MDC/MDI/mdiLoader/index.cmd?menuId=MDC0201020101',
+}
+# 업종 목록 페이지와 회사 페이지(WICS)가 같은 업종을 다른 이름으로 적어도 같은 분류가 되도록 맞춘다
+SECTOR_NAMES = {'건설업': '건설'}
+# 매출 공시에서 빼는 업종 (수주 공시가 너무 많다)
+EXCLUDED_SECTORS = {'건설'}
+MAX_AGE_DAYS = 7
+WORKERS = 8
+_GROUP = re.compile(r'sise_group_detail\.naver\?type=upjong&(?:amp;)?no=(\d+)"[^>]*>([^<]+)</a>')
+_CODE = re.compile(r'/item/main\.naver\?code=(\d{6})')
+
+
+def normalize_sector(name: str | None) -> str | None:
+    name = (name or '').strip()
+    return SECTOR_NAMES.get(name, name) or None
+
+
+def excluded_sector(name: str | None) -> bool:
+    return normalize_sector(name) in EXCLUDED_SECTORS
+
+
+def parse_groups(html: str) -> dict:
+    # 업종 목록 페이지 → {업종 번호: 업종명}
+    return {no: normalize_sector(name) for no, name in _GROUP.findall(html)}
+
+
+def parse_members(html: str) -> list:
+    # 업종 상세 페이지의 종목 표(type_5)에서만 종목코드를 읽는다 (옆의 인기 검색 종목 링크는 빼고)
+    start = html.find('class="type_5"')
+    if start < 0:
+        return []
+    end = html.find('</table>', start)
+    return list(dict.fromkeys(_CODE.findall(html[start:end if end > 0 else None])))
+
+
+def fetch_sectors(session, workers: int = WORKERS) -> dict:
+    # 종목코드 → 업종명. 업종 목록 1번 + 업종마다 1번 (시장 전체를 회사 페이지로 받는 것보다 수십 배 적다)
+    resp = session.get(GROUPS_URL, headers={'User-Agent': USER_AGENT}, timeout=10)
+    resp.raise_for_status()
+    groups = parse_groups(resp.text)
+    if not groups:
+        raise ValueError("업종 목록을 읽지 못했습니다")
+
+    def members(no):
+        r = session.get(GROUP_URL.format(no=no), headers={'User-Agent': USER_AGENT}, timeout=10)
+        r.raise_for_status()
+        return parse_members(r.text)
+
+    sectors = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (no, name), codes in zip(groups.items(), pool.map(members, groups)):
+            for code in codes:
+                sectors.setdefault(code, name)
+    return sectors
+
+
+def parse_snapshot(data: dict) -> dict:
+    # 종목코드 → [종가, 상장주식수]
+    out = {}
+    for row in data.get('OutBlock_1', []):
+        code = (row.get('ISU_SRT_CD') or '').strip()
+        close, shares = parse_count(row.get('TDD_CLSPRC')), parse_count(row.get('LIST_SHRS'))
+        if code and close and shares:
+            out[code] = [close, shares]
+    return out
+
+
+def fetch_snapshot(session, trd_dd: str) -> dict:
+    resp = session.post(KRX_URL, data={
+        'bld': 'dbms/MDC/STAT/standard/MDCSTAT01501', 'locale': 'ko_KR', 'mktId': 'ALL',
+        'trdDd': trd_dd, 'share': '1', 'money': '1', 'csvxls_isNo': 'false',
+    }, headers=KRX_HEADERS, timeout=15)
+    resp.raise_for_status()
+    return parse_snapshot(resp.json())
+
+
+def snapshot_date(target_date: str, now: datetime = None) -> str:
+    # 기준일 이전(포함)에서 종가가 확정된 마지막 거래일. 회사 페이지의 시가총액도 이 종가 기준이다
+    now = now or datetime.now()
+    calendar = get_calendar()
+    d = min(datetime.strptime(target_date, '%Y%m%d').date(), now.date())
+    for _ in range(15):
+        if calendar.closes_ready(d, now):
+            break
+        d -= timedelta(days=1)
+    return d.strftime('%Y%m%d')
+
+
+class SectorTable:
+    # 일괄로 받은 업종표와 시세 스냅샷. 업종표는 MAX_AGE_DAYS마다, 스냅샷은 기준 거래일이 바뀔 때 다시 받는다
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.sectors = data.get('sectors', {})
+        self.sectors_at = data.get('sectors_at')
+        self.prices = data.get('prices', {})
+        self.prices_date = data.get('prices_date')
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = SECTOR_PATH) -> 'SectorTable':
+        return cls(path, read_json(path))
+
+    def sectors_stale(self, now: datetime = None) -> bool:
+        if not self.sectors or not self.sectors_at:
+            return True
+        age = (now or datetime.now()) - datetime.strptime(self.sectors_at, '%Y%m%d')
+        return age > timedelta(days=MAX_AGE_DAYS)
+
+    def refresh(self, session, target_date: str, force: bool = False):
+        # 실패해도 이전 표를 그대로 쓰고, 빠진 종목은 회사 페이지에서 채운다
+        with self._lock:
+            if force or self.sectors_stale():
+                try:
+                    self.sectors = fetch_sectors(session)
+                    self.sectors_at = datetime.now().strftime('%Y%m%d')
+                    self.dirty = True
+                except Exception as e:
+                    print(f"⚠️ 업종표 일괄 갱신 실패, 회사 페이지로 채웁니다: {e}")
+            trd_dd = snapshot_date(target_date)
+            if force or self.prices_date != trd_dd:
+                try:
+                    prices = fetch_snapshot(session, trd_dd)
+                    if prices:
+                        self.prices, self.prices_date = prices, trd_dd
+                        self.dirty = True
+                    else:
+                        print(f"⚠️ {trd_dd} 시세 스냅샷이 비어 있어 시가총액은 회사 페이지로 채웁니다.")
+                except Exception as e:
+                    print(f"⚠️ 시세 스냅샷 갱신 실패, 시가총액은 회사 페이지로 채웁니다: {e}")
+
+    def lookup(self, stock_code: str) -> dict:
+        # 모르는 값은 None (호출하는 쪽이 회사 페이지로 채운다)
+        code = str(stock_code).zfill(6)
+        price = self.prices.get(code)
+        return {
+            '업종 분류': normalize_sector(self.sectors.get(code)),
+            '시가총액(억)': round(price[0] * price[1] / 100_000_000) if price else None,
+        }
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'sectors_at': self.sectors_at, 'sectors': self.sectors,
+                           'prices_date': self.prices_date, 'prices': self.prices}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+def load_sectors(session, target_date: str) -> SectorTable | None:
+    # 실행마다 한 번: 필요하면 갱신하고 저장한 표를 돌려준다. 꺼져 있으면 None
+    if not ENABLED:
+        return None
+    table = SectorTable.load()
+    table.refresh(session, target_date)
+    table.save()
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="업종표(종목코드 → 업종)와 시가총액 스냅샷을 일괄로 받아 저장")
+    parser.add_argument("--date", type=str, default=datetime.now().strftime("%Y%m%d"),
+                        help="시가총액 기준일(YYYYMMDD). 그날 이전 마지막 거래일 종가를 쓴다")
+    parser.add_argument("--refresh", action="store_true", help="기한과 상관없이 다시 받기")
+    parser.add_argument("--lookup", action="append", default=[], metavar='STOCK_CODE', help="종목 조회")
+    args = parser.parse_args()
+
+    table = SectorTable.load()
+    if args.refresh or not args.lookup:
+        session = make_session()
+        table.refresh(session, args.date, force=args.refresh)
+        table.save()
+        session.close()
+    counts = {}
+    for name in table.sectors.values():
+        counts[name] = counts.get(name, 0) + 1
+    print(f"✅ 업종표 {len(table.sectors)}종목·{len(counts)}개 업종 ({table.sectors_at}), "
+          f"시세 스냅샷 {len(table.prices)}종목 ({table.prices_date}) → {table.path}")
+    for code in args.lookup:
+        info = table.lookup(code)
+        print(f"{code}  {info['업종 분류'] or '-'}  시가총액 {info['시가총액(억)'] or '-'}억")
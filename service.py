@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import argparse
+import threading
+import socketserver
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pipeline
+from dart_client import clear_cache, make_session
+from trading_calendar import get_calendar
+from run_journal import RunJournal
+from search_index import connect as connect_search, search, search_path
+from company_stats import summary
+from watchlist import load_corp_codes
+
+EXCEL_PATH = '국내 주요 공시 정리.xlsx'
+HOST = '127.0.0.1'
+PORT = int(os.getenv('DART_SERVICE_PORT', '8765'))
+RECENT_DAYS = 365
+
+
+class Service:
+    # 한 프로세스에 HTTP 연결 풀, 종목코드→corp_code, 시장정보 캐시, 최근 공시를 들고 있으면서 조회·수집 요청을 받는다
+    def __init__(self, excel_path: str, recent_days: int = RECENT_DAYS):
+        self.excel_path = excel_path
+        self.recent_days = recent_days
+        self.session = make_session()
+        self.started = time.time()
+        self.corp_codes = None
+        # 시가총액·업종은 하루 단위로 바뀌므로 수집 날짜가 바뀌면 비운다
+        self.market = {}
+        self.market_date = None
+        self.recent = {}
+        self.recent_count = 0
+        self.jobs = {}
+        self._ingest_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.load_recent()
+
+    def corp_code(self, stock_code: str) -> str | None:
+        if self.corp_codes is None:
+            self.corp_codes = load_corp_codes(self.session)
+        return self.corp_codes.get(stock_code.zfill(6))
+
+    def load_recent(self):
+        # 검색 색인(시트와 같은 커밋에서 갱신됨)에서 최근 공시를 읽어 종목코드·회사명별로 묶어 둔다
+        path = search_path(self.excel_path)
+        recent = {}
+        n = 0
+        if os.path.exists(path):
+            since = (datetime.now() - timedelta(days=self.recent_days)).strftime('%Y%m%d')
+            conn = connect_search(path)
+            try:
+                rows = conn.execute("SELECT rcept_no, sheet, company, stock_code, date, amount, content, counterparty "
+                                    "FROM filings WHERE date >= ? ORDER BY date DESC, rcept_no DESC", (since,))
+                for r in rows:
+                    r = dict(r)
+                    for key in {r['stock_code'], r['company']} - {None}:
+                        recent.setdefault(key, []).append(r)
+                    n += 1
+            finally:
+                conn.close()
+        with self._lock:
+            self.recent, self.recent_count = recent, n
+
+    def latest(self, key: str, limit: int = 10, sheet: str = None) -> list:
+        rows = self.recent.get(key.zfill(6) if key.isdigit() else key, [])
+        if sheet:
+            rows = [r for r in rows if r['sheet'] == sheet]
+        return rows[:limit]
+
+    def ingest(self, target_date: str, names=None) -> dict:
+        # 일일 실행과 같은 순서(수집 → 보강 → 커밋). 한 번에 하나만 돌리고, 연결 풀과 시장정보 캐시는 그대로 쓴다
+        with self._ingest_lock:
+            started = time.perf_counter()
+            if self.market_date != target_date:
+                self.market, self.market_date = {}, target_date
+            # 같은 날 다시 돌리면 새로 올라온 공시가 보여야 하므로 목록 캐시는 매번 비우고, 거래일 달력도 다시 확인하게 한다
+            clear_cache()
+            get_calendar().reset()
+            journal = RunJournal.load(self.excel_path)
+            results = pipeline.collect_all(self.session, target_date, self.excel_path, names=names,
+                                           caches={'market': self.market}, journal=journal)
+            pipeline.enrich_all(self.session, results, target_date, journal)
+            pipeline.commit_all(self.session, results, self.excel_path, journal=journal)
+            self.load_recent()
+            return {'date': target_date, 'counts': {name: len(df) for name, df in results.items()},
+                    'seconds': round(time.perf_counter() - started, 2)}
+
+    def submit(self, target_date: str, names=None) -> str:
+        with self._lock:
+            job_id = f"{target_date}-{len(self.jobs) + 1}"
+            job = {'id': job_id, 'date': target_date, 'state': 'queued'}
+            self.jobs[job_id] = job
+
+        def run():
+            job['state'] = 'running'
+            try:
+                job.update(self.ingest(target_date, names), state='done')
+            except Exception as e:
+                print(f"⚠️ 수집 작업 {job_id} 실패: {e}")
+                job.update(state='failed', error=f'{type(e).__name__}: {e}')
+
+        threading.Thread(target=run, name=f'ingest-{job_id}', daemon=True).start()
+        return job_id
+
+    def busy(self) -> bool:
+        with self._lock:
+            return any(job['state'] in ('queued', 'running') for job in self.jobs.values())
+
+    def every(self, minutes: float):
+        # 정해진 간격으로 오늘 공시를 수집한다 (cron 대신 상주 프로세스가 직접). 앞 수집이 아직 돌고 있으면 이번 차례는 건너뛴다
+        def loop():
+            while True:
+                if self.busy():
+                    print("앞 수집이 아직 끝나지 않아 이번 주기는 건너뜁니다.")
+                else:
+                    self.submit(datetime.now().strftime('%Y%m%d'))
+                time.sleep(minutes * 60)
+        threading.Thread(target=loop, name='ingest-every', daemon=True).start()
+
+    def health(self) -> dict:
+        return {'uptime': round(time.time() - self.started, 1), 'excel': self.excel_path,
+                'recent': self.recent_count, 'market_cache': len(self.market),
+                'corp_codes': len(self.corp_codes or ()), 'jobs': len(self.jobs)}
+
+
+def make_handler(service: Service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body):
+            data = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self, method: str):
+            # 퍼센트 인코딩 없이 보낸 한글 경로도 받는다 (http.server는 요청 줄을 latin-1로 읽는다)
+            try:
+                path = self.path.encode('latin-1').decode('utf-8')
+            except UnicodeError:
+                path = self.path
+            url = urlparse(path)
+            q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            started = time.perf_counter()
+            if method == 'GET' and url.path == '/health':
+                body = service.health()
+            elif method == 'GET' and url.path == '/latest':
+                key = q.get('stock') or q.get('company')
+                if not key:
+                    return self._send(400, {'error': 'stock 또는 company가 필요합니다'})
+                body = {'rows': service.latest(key, int(q.get('limit', 10)), q.get('sheet'))}
+            elif method == 'GET' and url.path == '/search':
+                body = {'rows': search(service.excel_path, q.get('q', ''), q.get('field'), q.get('sheet'),
+                                       q.get('since'), q.get('until'), int(q.get('limit', 50)))}
+            elif method == 'GET' and url.path == '/stats':
+                body = {'rows': summary(service.excel_path, q.get('company'), as_of=q.get('as_of'),
+                                        limit=int(q.get('limit', 50)))}
+            elif method == 'GET' and url.path == '/corp':
+                body = {'stock_code': q.get('stock'), 'corp_code': service.corp_code(q.get('stock', ''))}
+            elif method == 'GET' and url.path == '/jobs':
+                body = {'jobs': list(service.jobs.values())}
+            elif method == 'POST' and url.path == '/ingest':
+                names = q['names'].split(',') if q.get('names') else None
+                job_id = service.submit(q.get('date') or datetime.now().strftime('%Y%m%d'), names)
+                return self._send(202, {'job': job_id})
+            elif method == 'POST' and url.path == '/reload':
+                service.load_recent()
+                body = service.health()
+            else:
+                return self._send(404, {'error': f'{method} {url.path}'})
+            body['took_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            self._send(200, body)
+
+        def do_GET(self):
+            try:
+                self._route('GET')
+            except Exception as e:
+                self._send(500, {'error': f'{type(e).__name__}: {e}'})
+
+        def do_POST(self):
+            try:
+                self._route('POST')
+            except Exception as e:
+                self._send(500, {'error': f'{type(e).__name__}: {e}'})
+
+        def address_string(self):
+            # 유닉스 소켓은 클라이언트 주소가 없다
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service: Service, host: str = HOST, port: int = PORT, unix_socket: str = None):
+    handler = make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, handler)
+        where = f"unix:{unix_socket}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        where = f"http://{host}:{server.server_address[1]}"
+    print(f"✅ 상주 서비스 시작: {where} (최근 공시 {service.recent_count}건)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.session.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="연결·캐시를 메모리에 둔 채 조회·수집 요청을 받는 상주 서비스")
+    parser.add_argument("--excel", type=str, default=EXCEL_PATH, help="엑셀 파일 경로")
+    parser.add_argument("--host", type=str, default=HOST, help="바인드 주소 (기본: 로컬에서만)")
+    parser.add_argument("--port", type=int, default=PORT, help="포트 (DART_SERVICE_PORT)")
+    parser.add_argument("--socket", type=str, default=None, metavar='PATH', help="TCP 대신 유닉스 소켓으로 받기")
+    parser.add_argument("--recent-days", type=int, default=RECENT_DAYS, help="메모리에 둘 최근 공시 기간(일)")
+    parser.add_argument("--every", type=float, default=None, metavar='MINUTES',
+                        help="이 간격(분)마다 오늘 공시를 수집")
+    args = parser.parse_args()
+
+    pipeline.load_plugins()
+    service = Service(args.excel, args.recent_days)
+    if args.every:
+        service.every(args.every)
+    serve(service, args.host, args.port, args.socket)
@@ -0,0 +1,173 @@
+import json
+import time
+import queue
+import socket
+import threading
+
+import requests
+
+from records import Record
+
+# 웹훅이 느릴 때 쌓아 둘 최대 건수. 넘치면 timeout만큼 기다렸다가 버린다 (수집 스레드를 붙잡지 않는다)
+WEBHOOK_QUEUE = 1000
+_STOP = object()
+
+
+def to_json(record) -> str:
+    if isinstance(record, Record):
+        record = record.to_dict()
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+class JsonlSink:
+    # 처리된 공시를 한 줄씩 바로 덧붙인다 (중간에 죽어도 그때까지의 결과가 남는다)
+    # collect_all의 공시유형별 스레드가 함께 쓰므로 줄이 섞이지 않게 잠근다
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def emit(self, record: dict):
+        line = to_json(record) + '\n'
+        with self._lock:
+            self.f.write(line)
+            self.f.flush()
+
+    def close(self):
+        with self._lock:
+            self.f.close()
+
+
+class WebhookSink:
+    # http(s)://... 는 JSON POST, unix:/경로 는 유닉스 소켓에 JSON 한 줄을 보낸다
+    # 전송은 백그라운드 스레드 하나가 순서대로 하고, 수집 스레드는 크기가 정해진 큐에 넣기만 한다
+    def __init__(self, url: str, timeout: float = 2, maxsize: int = WEBHOOK_QUEUE):
+        self.url = url
+        self.timeout = timeout
+        self.session = None if url.startswith('unix:') else requests.Session()
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name='webhook-sink', daemon=True)
+        self._thread.start()
+
+    def emit(self, record: dict):
+        try:
+            self.queue.put(to_json(record), timeout=self.timeout)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1:
+                print(f"⚠️ 웹훅 대기열이 가득 차 공시를 버립니다: {self.url}")
+
+    def _run(self):
+        while True:
+            line = self.queue.get()
+            if line is _STOP:
+                return
+            try:
+                self.send(line)
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ WebhookSink 전송 실패: {e}")
+
+    def send(self, line: str):
+        if self.session is None:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.settimeout(self.timeout)
+                s.connect(self.url[len('unix:'):])
+                s.sendall((line + '\n').encode('utf-8'))
+        else:
+            resp = self.session.post(self.url, data=line.encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+            resp.raise_for_status()
+
+    def close(self):
+        # 큐에 남은 공시를 다 보낸 뒤 닫는다
+        self.queue.put(_STOP)
+        self._thread.join()
+        if self.session is not None:
+            self.session.close()
+        if self.dropped or self.failed:
+            print(f"⚠️ 웹훅 {self.url}: 버림 {self.dropped}건, 전송 실패 {self.failed}건")
+
+
+class StoreSink:
+    # 영속 저장소(엑셀)는 저장 비용이 커서 모아 두었다가 flush_every건마다, 그리고 닫을 때 쓴다
+    def __init__(self, write, flush_every: int = 0):
+        self.write = write
+        self.flush_every = flush_every
+        self.records = []
+        self._lock = threading.RLock()
+
+    def emit(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+            if self.flush_every and len(self.records) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self.records:
+                records, self.records = self.records, []
+                self.write(records)
+
+    def close(self):
+        self.flush()
+
+
+class Sinks:
+    # 한 싱크가 실패해도 나머지 싱크와 파이프라인은 계속 돈다. 여러 수집 스레드가 같은 Sinks에 넣는다
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.count = 0
+        self.first_at = None
+        self._lock = threading.Lock()
+
+    def append(self, sink):
+        self.sinks.append(sink)
+
+    def emit(self, record: dict):
+        with self._lock:
+            self.count += 1
+            if self.first_at is None:
+                self.first_at = time.perf_counter()
+        for sink in self.sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                print(f"⚠️ {type(sink).__name__} 전송 실패: {e}")
+
+    def close(self):
+        # 모든 싱크를 닫은 뒤 첫 번째 오류를 다시 올린다 (저장 실패를 묻어 두지 않는다)
+        error = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"⚠️ {type(sink).__name__} 종료 실패: {e}")
+                error = error or e
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_sink(spec: str):
+    if spec.startswith(('http://', 'https://', 'unix:')):
+        return WebhookSink(spec)
+    if spec.startswith('jsonl:'):
+        return JsonlSink(spec[len('jsonl:'):])
+    raise ValueError(f"알 수 없는 싱크: {spec} (jsonl:경로, http(s)://..., unix:/경로)")
+
+
+def open_sinks(specs=()) -> Sinks:
+    return Sinks(parse_sink(s) for s in specs or ())
+
+
+def add_sink_args(parser):
+    parser.add_argument("--sink", action="append", default=[], metavar='SPEC',
+                        help="처리된 공시를 즉시 내보낼 곳: jsonl:경로, http(s)://웹훅, unix:/소켓경로 (여러 번 지정 가능)")
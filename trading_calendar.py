@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import threading
+from datetime import date, datetime, time, timedelta
+
+from html_backend import get_backend
+from record_index import read_json
+
+CALENDAR_PATH = os.getenv('DART_CALENDAR_CACHE', 'krx_calendar.json')
+INDEX_URL = "https://finance.naver.com/sise/sise_index_day.naver?code=KOSPI&page={page}"
+# 장 마감은 15:30이지만 네이버 일별 시세가 확정되는 시점까지 여유를 둔다
+CLOSE_READY = time(16, 0)
+# 관측 기록이 없는 미래 날짜는 주말과 양력 고정 휴장일만 빼고 거래일로 본다 (음력 휴일은 관측 후 반영)
+FIXED_HOLIDAYS = {(1, 1), (3, 1), (5, 1), (5, 5), (6, 6), (8, 15), (10, 3), (10, 9), (12, 25), (12, 31)}
+MAX_PAGES = 20
+_DATE = re.compile(r'\d{4}\.\d{2}\.\d{2}')
+
+
+def parse_index_days(html: str) -> list:
+    days = []
+    for cells in get_backend().table_rows(html, 'table.type_1', all_tables=True):
+        m = _DATE.fullmatch(cells[0].text) if cells else None
+        if m:
+            days.append(datetime.strptime(m.group(), '%Y.%m.%d').date())
+    return days
+
+
+class TradingCalendar:
+    # KOSPI 일별 지수에 실제로 찍힌 날을 거래일로 기록한다. [start, through]는 관측값, 그 밖은 추정값
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.sessions = set(data.get('sessions', []))
+        self.start = data.get('start')
+        self.through = data.get('through')
+        # 마지막으로 갱신했을 때의 '장이 끝난 마지막 날'. 날이 바뀌면 상주 프로세스에서도 다시 받는다
+        self.refreshed = None
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = CALENDAR_PATH) -> 'TradingCalendar':
+        return cls(path, read_json(path))
+
+    def is_session(self, d: date) -> bool:
+        if self.observed(d):
+            return d.strftime('%Y%m%d') in self.sessions
+        return d.weekday() < 5 and (d.month, d.day) not in FIXED_HOLIDAYS
+
+    def next_session(self, d: date) -> date:
+        d += timedelta(days=1)
+        while not self.is_session(d):
+            d += timedelta(days=1)
+        return d
+
+    @staticmethod
+    def session_closed(d: date, now: datetime = None) -> bool:
+        now = now or datetime.now()
+        return d < now.date() or (d == now.date() and now.time() >= CLOSE_READY)
+
+    def closes_ready(self, d: date, now: datetime = None) -> bool:
+        # 공시일(D) 종가가 확정됐는지
+        return self.is_session(d) and self.session_closed(d, now)
+
+    def next_close_ready(self, d: date, now: datetime = None) -> bool:
+        # D+1 거래일 장이 끝나 익일종가까지 채울 수 있는지
+        return self.session_closed(self.next_session(d), now)
+
+    def observed(self, d: date) -> bool:
+        return bool(self.through) and self.start <= d.strftime('%Y%m%d') <= self.through
+
+    def refresh(self, session, since: date, now: datetime = None, headers=None):
+        # 장이 끝난 마지막 날마다 최대 한 번만, 마지막 관측일 이후의 지수 일별 페이지만 받는다
+        with self._lock:
+            now = now or datetime.now()
+            last_closed = now.date() if now.time() >= CLOSE_READY else now.date() - timedelta(days=1)
+            if self.refreshed == last_closed:
+                return
+            self.refreshed = last_closed
+            stop = max(since, datetime.strptime(self.through, '%Y%m%d').date()) if self.through else since
+            seen = []
+            try:
+                for page in range(1, MAX_PAGES + 1):
+                    resp = session.get(INDEX_URL.format(page=page), headers=headers, timeout=5)
+                    resp.raise_for_status()
+                    days = parse_index_days(resp.text)
+                    if not days:
+                        break
+                    seen += days
+                    if min(days) <= stop:
+                        break
+            except Exception as e:
+                print(f"⚠️ 거래일 달력 갱신 실패, 추정값을 사용합니다: {e}")
+                return
+            if not seen:
+                return
+            self.sessions.update(d.strftime('%Y%m%d') for d in seen if d <= last_closed)
+            if min(seen) <= stop:
+                # 마지막 관측일까지 빈틈 없이 받았을 때만 관측 범위를 늘린다
+                self.start = min(self.start or '99999999', min(seen).strftime('%Y%m%d'))
+                self.through = max(self.through or '', last_closed.strftime('%Y%m%d'))
+            self.dirty = True
+
+    def reset(self):
+        # 다음 실행에서 다시 받도록 (상주 서비스가 수집마다 부른다)
+        with self._lock:
+            self.refreshed = None
+
+    def ensure(self, session, dates: list, now: datetime = None, headers=None):
+        # 익일종가를 채울 수 있다고 추정된 행 중 D+1이 아직 관측 범위 밖이면 달력을 갱신한다
+        stale = [d for d in dates
+                 if self.next_close_ready(d, now) and not self.observed(self.next_session(d))]
+        if stale:
+            self.refresh(session, min(stale), now, headers)
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'start': self.start, 'through': self.through, 'sessions': sorted(self.sessions)}, f)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar() -> TradingCalendar:
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None:
+            _calendar = TradingCalendar.load()
+        return _calendar
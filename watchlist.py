@@ -0,0 +1,83 @@
+import os
+import io
+import json
+import time
+from zipfile import ZipFile
+
+from lxml import etree
+
+import dart_client
+from dart_client import API_KEY
+
+CORP_CODE_URL = 'https://opendart.fss.or.kr/api/corpCode.xml'
+CORP_CODE_CACHE = os.getenv('DART_CORP_CODE_CACHE', 'corp_codes.json')
+MAX_AGE_DAYS = 7
+
+
+def fetch_corp_codes(session) -> dict:
+    # corpCode.xml(전체 회사 목록 ZIP)에서 상장사만 종목코드 → corp_code로 뽑는다
+    resp = session.get(CORP_CODE_URL, params={'crtfc_key': API_KEY}, timeout=60)
+    resp.raise_for_status()
+    codes = {}
+    with ZipFile(io.BytesIO(resp.content)) as z, z.open(z.namelist()[0]) as member:
+        for _, el in etree.iterparse(member, tag='list', recover=True, huge_tree=True):
+            stock = (el.findtext('stock_code') or '').strip()
+            corp = (el.findtext('corp_code') or '').strip()
+            if stock and corp:
+                codes[stock] = corp
+            el.clear()
+    return codes
+
+
+def load_corp_codes(session, path: str = CORP_CODE_CACHE, max_age_days: int = MAX_AGE_DAYS) -> dict:
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_days * 86400:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    codes = fetch_corp_codes(session)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(codes, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return codes
+
+
+def read_watchlist(path: str) -> list:
+    # 한 줄에 하나씩: 6자리 종목코드 또는 8자리 corp_code. '#' 뒤는 주석
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            entry = line.split('#', 1)[0].strip()
+            if entry:
+                entries.append(entry.split()[0])
+    return entries
+
+
+def resolve(session, entries: list) -> list:
+    corp_codes = [e for e in entries if len(e) == 8]
+    stocks = [e.zfill(6) for e in entries if len(e) != 8]
+    if stocks:
+        table = load_corp_codes(session)
+        missing = [s for s in stocks if s not in table]
+        if missing:
+            print(f"⚠️ corp_code를 찾지 못한 종목코드는 제외합니다: {', '.join(missing)}")
+        corp_codes += [table[s] for s in stocks if s in table]
+    return corp_codes
+
+
+def enable(session, path: str = None) -> list | None:
+    # --watchlist 또는 DART_WATCHLIST가 있으면 이후 fetch_list는 관심종목만 조회한다
+    path = path or os.getenv('DART_WATCHLIST')
+    if not path:
+        return None
+    corp_codes = resolve(session, read_watchlist(path))
+    if not corp_codes:
+        print(f"⚠️ 관심종목 파일에 유효한 종목이 없어 전체 시장을 조회합니다: {path}")
+        return None
+    dart_client.set_corp_filter(corp_codes)
+    print(f"✅ 관심종목 모드: {len(corp_codes)}개 회사만 조회합니다.")
+    return corp_codes
+
+
+def add_watchlist_args(parser):
+    parser.add_argument("--watchlist", type=str, default=None, metavar='FILE',
+                        help="관심종목 파일(한 줄에 종목코드 하나). 지정하면 회사별 list.json만 병렬로 조회 (DART_WATCHLIST)")
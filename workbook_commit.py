@@ -0,0 +1,242 @@
+import os
+import glob
+import time
+import threading
+from copy import copy
+from zipfile import BadZipFile
+
+from openpyxl import load_workbook, Workbook
+from openpyxl.cell.cell import MergedCell
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# 다른 프로세스가 같은 엑셀을 커밋하는 동안 기다릴 최대 시간(초)
+LOCK_TIMEOUT = float(os.getenv('DART_LOCK_TIMEOUT', '600'))
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def lock_path(excel_path: str) -> str:
+    base, _ = os.path.splitext(excel_path)
+    return base + '.lock'
+
+
+class FileLock:
+    # <엑셀 이름>.lock에 거는 권고 잠금. 프로세스 사이에는 OS 잠금, 같은 프로세스 안에서는 스레드 RLock
+    def __init__(self, path: str):
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._f = None
+
+    def _try_lock(self, f) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout: float = LOCK_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        if not self._rlock.acquire(timeout=timeout):
+            raise TimeoutError(f"엑셀 잠금을 {timeout:.0f}초 안에 얻지 못했습니다: {self.path}")
+        if self._depth == 0:
+            f = open(self.path, 'a+')
+            waited = False
+            while not self._try_lock(f):
+                if time.monotonic() > deadline:
+                    f.close()
+                    self._rlock.release()
+                    raise TimeoutError(f"엑셀 잠금을 {timeout:.0f}초 안에 얻지 못했습니다: {self.path}")
+                if not waited:
+                    print(f"다른 작업이 엑셀을 쓰는 중이라 기다립니다: {self.path}")
+                    waited = True
+                time.sleep(0.2)
+            self._f = f
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            else:
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+            self._f.close()
+            self._f = None
+        self._rlock.release()
+
+
+def file_lock(excel_path: str) -> FileLock:
+    path = os.path.abspath(lock_path(excel_path))
+    with _locks_guard:
+        return _locks.setdefault(path, FileLock(path))
+
+
+def atomic_save(wb, path: str):
+    # 같은 폴더의 임시 파일에 다 쓴 뒤 이름을 바꾼다. 저장 중에 죽어도 원래 파일은 그대로 남는다
+    folder, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(folder, f'.{name}.{os.getpid()}.tmp')
+    try:
+        wb.save(tmp)
+        with open(tmp, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def copy_sheet(src, wb):
+    # openpyxl은 통합 문서 사이의 시트 복사를 지원하지 않아 값·서식·열 너비·병합·틀 고정을 직접 옮긴다
+    index = wb.sheetnames.index(src.title) if src.title in wb.sheetnames else len(wb.sheetnames)
+    if src.title in wb.sheetnames:
+        wb.remove(wb[src.title])
+    dst = wb.create_sheet(src.title, index)
+    for row in src.iter_rows():
+        for c in row:
+            if isinstance(c, MergedCell) or (c.value is None and not c.has_style):
+                continue
+            d = dst.cell(row=c.row, column=c.column, value=c.value)
+            if c.has_style:
+                d.font = copy(c.font)
+                d.fill = copy(c.fill)
+                d.border = copy(c.border)
+                d.alignment = copy(c.alignment)
+                d.protection = copy(c.protection)
+                d.number_format = c.number_format
+    for key, dim in src.column_dimensions.items():
+        dst.column_dimensions[key].width = dim.width
+    for key, dim in src.row_dimensions.items():
+        if dim.height is not None:
+            dst.row_dimensions[key].height = dim.height
+    for rng in src.merged_cells.ranges:
+        dst.merge_cells(str(rng))
+    dst.freeze_panes = src.freeze_panes
+    dst.auto_filter.ref = src.auto_filter.ref
+    return dst
+
+
+class WorkbookCommit:
+    # 워크북을 한 번 열어 여러 시트 갱신을 모은 뒤 한 번에 저장한다
+    # 처음 읽을 때 잠금을 잡고 저장(사이드카 기록까지)이 끝나면 놓는다. 그래서 동시에 돈 파이프라인도 항상 최신 파일 위에 쓴다
+    def __init__(self, excel_path: str):
+        self.path = excel_path
+        self._wb = None
+        self._sidecars = {}
+        self._after_save = []
+        self._lock = None
+        self._loaded = None
+        self.touched = set()
+
+    @classmethod
+    def open(cls, excel_path: str) -> 'WorkbookCommit':
+        return cls(excel_path)
+
+    def _acquire(self):
+        if self._lock is None:
+            lock = file_lock(self.path)
+            lock.acquire()
+            self._lock = lock
+            # 잠금을 잡았으니 남아 있는 임시 파일은 저장 중에 죽은 작업의 것이다
+            folder, name = os.path.split(os.path.abspath(self.path))
+            for tmp in glob.glob(os.path.join(folder, f'.{glob.escape(name)}.*.tmp')):
+                os.remove(tmp)
+
+    def _release(self):
+        if self._lock is not None:
+            lock, self._lock = self._lock, None
+            lock.release()
+
+    @property
+    def wb(self):
+        # 실제로 시트를 건드릴 때에만 워크북을 읽는다
+        if self._wb is None:
+            self._acquire()
+            self._loaded = _signature(self.path)
+            if self._loaded is not None:
+                try:
+                    self._wb = load_workbook(self.path)
+                except BadZipFile as e:
+                    # 손상된 파일을 빈 워크북으로 덮어쓰지 않는다
+                    self.close()
+                    raise RuntimeError(f"엑셀 파일이 손상되어 열 수 없습니다. 덮어쓰지 않고 중단합니다: {self.path}") from e
+            else:
+                self._wb = Workbook()
+        return self._wb
+
+    def touch(self, sheet: str):
+        # 이 커밋이 쓰는 시트. 시트를 쓰는 함수는 모두 그 시트의 사이드카를 등록하므로 보통은 sidecar()가 대신 부른다
+        self.touched.add(sheet)
+
+    def sidecar(self, cls, sheet: str):
+        # 인덱스·대기열 파일은 커밋당 시트별로 하나의 인스턴스를 공유하고 저장 후에 기록한다
+        key = (cls, sheet)
+        if key not in self._sidecars:
+            self._acquire()
+            self.touch(sheet)
+            obj = cls.load(self.path, sheet)
+            self._sidecars[key] = obj
+            self.on_saved(obj.save)
+        return self._sidecars[key]
+
+    def on_saved(self, fn):
+        self._after_save.append(fn)
+
+    def _merge(self):
+        # 잠금을 지키지 않는 쪽(엑셀에서 직접 저장 등)이 그사이 파일을 바꿨으면, 디스크의 최신 파일에 이 커밋이 쓴 시트만 옮긴다
+        fresh = load_workbook(self.path)
+        sheets = [name for name in self._wb.sheetnames if name in self.touched]
+        for name in sheets:
+            copy_sheet(self._wb[name], fresh)
+        print(f"⚠️ 엑셀 파일이 다른 곳에서 바뀌어 있어 {', '.join(sheets) or '(없음)'} 시트만 반영합니다: {self.path}")
+        self._wb = fresh
+
+    def save(self):
+        try:
+            if self._wb is not None:
+                current = _signature(self.path)
+                if current is not None and current != self._loaded:
+                    self._merge()
+                atomic_save(self._wb, self.path)
+            callbacks, self._after_save = self._after_save, []
+            self._sidecars = {}
+            for fn in callbacks:
+                fn()
+        finally:
+            self._wb = None
+            self._release()
+
+    def close(self):
+        # 저장하지 않고 끝낼 때 (오류·dry run) 잠금만 놓는다
+        self._wb = None
+        self._sidecars = {}
+        self._after_save = []
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+        else:
+            self.close()